@@ -1,18 +1,35 @@
+import time
+# Taken before the imports below so the startup report includes them
+_import_started = time.perf_counter()
 import os
-import sys
 import logging
+import threading
 import uuid
 from datetime import datetime, timedelta
 from flask import Flask, jsonify, render_template, request, session, redirect, url_for, flash, send_from_directory, has_request_context, g, current_app, make_response
 from flask_wtf.csrf import CSRFError, generate_csrf
 from flask_login import LoginManager, current_user
 from dotenv import load_dotenv
-from extensions import db, login_manager, session as flask_session, csrf
+from extensions import db, login_manager, session as flask_session, csrf, tool_usage_buffer, email_outbox, static_assets, user_cache, request_profiler
 from blueprints.auth import auth_bp
-from translations import trans
+from translations import trans, bind_translator
 from scheduler_setup import init_scheduler
+from bill_jobs import run_bill_reminders, run_overdue_update
+from snapshots import create_snapshot, restore_snapshot, list_snapshots, SNAPSHOT_FORMATS
+from score_index import rebuild_score_index, seed_score_buckets
+from dashboard_summary import register_summary_listeners, get_dashboard_summary, empty_summary
+from session_store import create_redis_client, init_session_interface
+from logging_setup import configure_logging, start_request_sampling
+from static_assets import build_assets
+from course_catalog import register_catalog_listeners
+from upload_storage import StreamingUploadRequest
+from index_advisor import advise_indexes
+from db_engine import configure_engine, init_engine
+from startup_timing import StartupTimer
+from blueprints.learning_hub import catalog_store
 from models import Course, FinancialHealth, Budget, Bill, NetWorth, EmergencyFund, LearningProgress, QuizResult, User, Feedback, ToolUsage
 import json
+import click
 from functools import wraps
 from uuid import uuid4
 from alembic import command
@@ -22,16 +39,8 @@ from werkzeug.security import generate_password_hash
 # Load environment variables
 load_dotenv()
 
-# Set up logging
+# Set up logging; handlers are attached by setup_logging
 root_logger = logging.getLogger('ficore_app')
-root_logger.setLevel(logging.DEBUG)
-
-class SessionFormatter(logging.Formatter):
-    def format(self, record):
-        record.session_id = getattr(record, 'session_id', 'no-session-id')
-        return super().format(record)
-
-formatter = SessionFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s [session: %(session_id)s]')
 
 class SessionAdapter(logging.LoggerAdapter):
     def process(self, msg, kwargs):
@@ -57,22 +66,24 @@ def admin_required(f):
     return decorated_function
 
 def setup_logging(app):
-    handler = logging.StreamHandler(sys.stderr)
-    handler.setLevel(logging.DEBUG)
-    handler.setFormatter(formatter)
-    root_logger.addHandler(handler)
-    log_dir = os.path.join(os.path.dirname(__file__), 'data')
-    os.makedirs(log_dir, exist_ok=True)
-    try:
-        file_handler = logging.FileHandler(os.path.join(log_dir, 'storage.log'))
-        file_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
-        logger.info("Logging setup complete with file handler")
-    except (PermissionError, OSError) as e:
-        logger.warning(f"Failed to set up file logging: {str(e)}")
+    log_path = os.path.join(os.path.dirname(__file__), 'data', 'storage.log')
+    configure_logging(app, log_path)
+    logger.info(f"Logging setup complete: level={app.config['LOG_LEVEL']}, format={app.config['LOG_FORMAT']}, sample_rate={app.config['LOG_SAMPLE_RATE']}")
 
 def setup_session(app):
+    app.config['SESSION_PERMANENT'] = True
+    app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=int(os.environ.get('SESSION_LIFETIME_DAYS', 30)))
+    app.config['SESSION_USE_SIGNER'] = True
+    redis_url = os.environ.get('SESSION_REDIS_URL') or os.environ.get('REDIS_URL')
+    if redis_url:
+        try:
+            app.config['SESSION_REDIS'] = create_redis_client(redis_url)
+            app.config['SESSION_TYPE'] = 'redis'
+            app.config['SESSION_KEY_PREFIX'] = os.environ.get('SESSION_KEY_PREFIX', 'ficore:session:')
+            logger.info(f"Session configured: type=redis, lifetime={app.config['PERMANENT_SESSION_LIFETIME']}")
+            return
+        except Exception as e:
+            logger.error(f"Failed to configure Redis sessions: {str(e)}. Falling back to filesystem sessions.")
     session_dir = os.path.join(os.path.dirname(__file__), 'data', 'sessions')
     try:
         os.makedirs(session_dir, exist_ok=True)
@@ -83,9 +94,6 @@ def setup_session(app):
         return
     app.config['SESSION_FILE_DIR'] = session_dir
     app.config['SESSION_TYPE'] = 'filesystem'
-    app.config['SESSION_PERMANENT'] = True
-    app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=30)
-    app.config['SESSION_USE_SIGNER'] = True
     logger.info(f"Session configured: type={app.config['SESSION_TYPE']}, dir={session_dir}, lifetime={app.config['PERMANENT_SESSION_LIFETIME']}")
 
 def initialize_courses_data(app):
@@ -96,11 +104,41 @@ def initialize_courses_data(app):
                 db.session.add(db_course)
             db.session.commit()
             logger.info("Initialized courses in database")
+
+def get_courses(app):
+    """Course dicts for the index page, read from the database once per process."""
+    if app.config.get('COURSES') is None:
         app.config['COURSES'] = [course.to_dict() for course in Course.query.all()]
+    return app.config['COURSES']
+
+def bootstrap_admin_user():
+    """Create the ADMIN_EMAIL user if it does not exist yet (needs an app context)."""
+    admin_email = os.environ.get('ADMIN_EMAIL')
+    admin_password = os.environ.get('ADMIN_PASSWORD')
+    if not (admin_email and admin_password):
+        logger.warning("ADMIN_EMAIL or ADMIN_PASSWORD not set in environment variables.")
+        return
+    admin_user = User.query.filter_by(email=admin_email).first()
+    if admin_user:
+        logger.info(f"Admin user already exists with email: {admin_email}")
+        return
+    admin_user = User(
+        username='admin_' + str(uuid.uuid4())[:8],  # Unique username
+        email=admin_email,
+        password_hash=generate_password_hash(admin_password),
+        is_admin=True,
+        created_at=datetime.utcnow(),
+        lang='en'
+    )
+    db.session.add(admin_user)
+    db.session.commit()
+    logger.info(f"Admin user created with email: {admin_email}")
 
 def apply_migrations(app):
     alembic_cfg = Config(os.path.join(os.path.dirname(__file__), 'alembic.ini'))
     alembic_cfg.set_main_option('sqlalchemy.url', app.config['SQLALCHEMY_DATABASE_URI'])
+    # Keep the app's logging pipeline; alembic.ini's fileConfig would replace it
+    alembic_cfg.attributes['configure_logger'] = False
     try:
         with app.app_context():
             logger.info("Applying database migrations")
@@ -110,6 +148,48 @@ def apply_migrations(app):
         logger.error(f"Failed to apply migrations: {str(e)}", exc_info=True)
         raise
 
+def initialize_database(app):
+    """
+    Deploy step: apply migrations, create missing tables and seed score buckets, courses and
+    the admin user.
+
+    Runs once per deploy through `flask ficore init` (called by deploy.sh before the
+    Procfile starts gunicorn) instead of in every worker's create_app. Set
+    FICORE_INIT_ON_STARTUP=true to run it in create_app anyway, e.g. for a single-process
+    setup without a deploy step.
+    """
+    with app.app_context():
+        apply_migrations(app)  # Run migrations before creating tables
+        db.create_all()
+        seed_score_buckets()
+        initialize_courses_data(app)
+        bootstrap_admin_user()
+        logger.info("Database tables created and courses initialized")
+
+_background_lock = threading.Lock()
+
+def start_background_services(app):
+    """
+    Start this process's email outbox thread and join the scheduler leader election.
+
+    Called by gunicorn's post_worker_init hook (gunicorn.conf.py) and, for other servers, on
+    the first request; later calls in the same process are no-ops. Kept out of create_app so
+    importing the app (CLI commands, the gunicorn master) starts no threads.
+    """
+    if app.extensions.get('background_services_pid') == os.getpid():
+        return
+    with _background_lock:
+        if app.extensions.get('background_services_pid') == os.getpid():
+            return
+        app.extensions['background_services_pid'] = os.getpid()
+        email_outbox.start()
+        # Only the elected leader runs jobs
+        try:
+            init_scheduler(app)
+            logger.info("Scheduler initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize scheduler: {str(e)}")
+
 # Constants
 SAMPLE_COURSES = [
     {
@@ -142,17 +222,29 @@ SAMPLE_COURSES = [
 ]
 
 def create_app():
+    """
+    Build the app: configuration, extensions, CLI commands, blueprints and routes.
+
+    Nothing here touches the database schema or starts threads, so every worker starts in
+    the time it takes to import the blueprints; see initialize_database and
+    start_background_services for the rest.
+    """
+    timer = StartupTimer(_import_started)
+    timer.mark('imports')
     app = Flask(__name__, template_folder='templates')
+    app.request_class = StreamingUploadRequest
+    setup_logging(app)
     app.config['SECRET_KEY'] = os.environ.get('FLASK_SECRET_KEY', 'dev-secret-key-please-change-me')
     if not os.environ.get('FLASK_SECRET_KEY'):
         logger.warning("FLASK_SECRET_KEY not set. Using fallback for development. Set it in production.")
 
     logger.info("Starting app creation")
-    setup_logging(app)
     setup_session(app)
     app.config['BASE_URL'] = os.environ.get('BASE_URL', 'http://localhost:5000')
     flask_session.init_app(app)
+    init_session_interface(app)
     csrf.init_app(app)
+    timer.mark('logging_and_session')
 
     # Configure database
     db_dir = os.path.join(os.path.dirname(__file__), 'data')
@@ -166,7 +258,16 @@ def create_app():
     if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgres://'):
         app.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI'].replace('postgres://', 'postgresql://')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    configure_engine(app)
     db.init_app(app)
+    init_engine(app, db)
+    timer.mark('database')
+    tool_usage_buffer.init_app(app)
+    email_outbox.init_app(app)
+    static_assets.init_app(app)
+    user_cache.init_app(app)
+    request_profiler.init_app(app)
+    register_summary_listeners()
 
     # Initialize Flask-Login
     login_manager.init_app(app)
@@ -174,43 +275,117 @@ def create_app():
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return user_cache.load(db.session, User, int(user_id))
 
-    # Initialize scheduler
-    try:
-        init_scheduler(app)
-        logger.info("Scheduler initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize scheduler: {str(e)}")
+    register_catalog_listeners(catalog_store)
+    timer.mark('extensions')
 
-    # Apply migrations and initialize database
-    with app.app_context():
-        apply_migrations(app)  # Run migrations before creating tables
-        db.create_all()
-        initialize_courses_data(app)
-        logger.info("Database tables created and courses initialized")
+    app.config.setdefault('FICORE_INIT_ON_STARTUP', os.environ.get('FICORE_INIT_ON_STARTUP', 'false').lower() == 'true')
+    if app.config['FICORE_INIT_ON_STARTUP']:
+        initialize_database(app)
+        timer.mark('initialize_database')
 
-        # Check and create admin user
-        admin_email = os.environ.get('ADMIN_EMAIL')
-        admin_password = os.environ.get('ADMIN_PASSWORD')
-        if admin_email and admin_password:
-            admin_user = User.query.filter_by(email=admin_email).first()
-            if not admin_user:
-                admin_user = User(
-                    username='admin_' + str(uuid.uuid4())[:8],  # Unique username
-                    email=admin_email,
-                    password_hash=generate_password_hash(admin_password),
-                    is_admin=True,
-                    created_at=datetime.utcnow(),
-                    lang='en'
-                )
-                db.session.add(admin_user)
-                db.session.commit()
-                logger.info(f"Admin user created with email: {admin_email}")
+    @app.before_request
+    def ensure_background_services():
+        start_background_services(app)
+
+    @app.cli.group('ficore')
+    def ficore_cli():
+        """Release and diagnostics commands."""
+
+    @ficore_cli.command('init')
+    def ficore_init_command():
+        """Apply migrations and seed courses and the admin user (run once per deploy)."""
+        initialize_database(app)
+        print("Database initialized")
+
+    @ficore_cli.command('timings')
+    def ficore_timings_command():
+        """Print how long each create_app phase took in this process."""
+        print(json.dumps(app.extensions['startup_timings'], indent=2))
+
+    @app.cli.command('rebuild-score-index')
+    def rebuild_score_index_command():
+        """Rebuild the financial health score histogram from the financial_health table."""
+        rebuild_score_index()
+
+    @app.cli.command('send-bill-reminders')
+    def send_bill_reminders_command():
+        """Run the bill reminder job once and print its run report."""
+        print(json.dumps(run_bill_reminders(app), indent=2))
+
+    @app.cli.command('update-overdue-bills')
+    def update_overdue_bills_command():
+        """Run the overdue status job once and print its run report."""
+        print(json.dumps(run_overdue_update(), indent=2))
+
+    @app.cli.group('snapshot')
+    def snapshot_cli():
+        """Create, list and restore database snapshots."""
+
+    @snapshot_cli.command('create')
+    @click.option('--full', is_flag=True, help='Export every row instead of rows since the last run.')
+    @click.option('--format', 'fmt', type=click.Choice(SNAPSHOT_FORMATS), default='ndjson')
+    def snapshot_create_command(full, fmt):
+        manifest = create_snapshot(full=full, fmt=fmt)
+        print(json.dumps({name: info['rows'] for name, info in manifest['tables'].items()}, indent=2))
+        print(f"Snapshot {manifest['run_id']} written")
+
+    @snapshot_cli.command('list')
+    def snapshot_list_command():
+        for manifest in list_snapshots():
+            rows = sum(info['rows'] for info in manifest['tables'].values())
+            print(f"{manifest['run_id']}\t{manifest['type']}\t{manifest['format']}\t{rows} rows")
+
+    @snapshot_cli.command('restore')
+    @click.argument('run_id', required=False)
+    @click.option('--table', 'tables', multiple=True, help='Restore only these tables (repeatable).')
+    @click.confirmation_option(prompt='This replaces the contents of the restored tables. Continue?')
+    def snapshot_restore_command(run_id, tables):
+        print(json.dumps(restore_snapshot(run_id, tables=list(tables) or None), indent=2))
+
+    @app.cli.command('email-worker')
+    def email_worker_command():
+        """Deliver queued emails in the foreground (for EMAIL_WORKER_MODE=external)."""
+        email_outbox.serve()
+
+    @app.cli.command('index-advisor')
+    @click.option('--verbose', is_flag=True, help='Print the full plan of every query shape.')
+    @click.option('--strict', is_flag=True, help='Exit with status 1 when any shape does a full scan.')
+    def index_advisor_command(verbose, strict):
+        """EXPLAIN the app's known query shapes and report full table scans."""
+        report = advise_indexes()
+        flagged = 0
+        for entry in report:
+            if entry.get('error'):
+                status = 'ERROR'
+            elif entry['full_scans']:
+                status = 'FULL SCAN'
+            elif entry['sorts']:
+                status = 'SORT'
             else:
-                logger.info(f"Admin user already exists with email: {admin_email}")
-        else:
-            logger.warning("ADMIN_EMAIL or ADMIN_PASSWORD not set in environment variables.")
+                status = 'ok'
+            flagged += bool(entry['full_scans'] or entry.get('error'))
+            print(f"{status:<10} {entry['name']}")
+            details = entry['plan'] if verbose else entry['full_scans'] + entry['sorts']
+            for line in details:
+                print(f"           {line}")
+            if entry.get('error'):
+                print(f"           {entry['error']}")
+        print(f"{flagged} of {len(report)} query shapes need attention")
+        if strict and flagged:
+            raise SystemExit(1)
+
+    @app.cli.group('assets')
+    def assets_group():
+        """Static asset pipeline."""
+
+    @assets_group.command('build')
+    def assets_build_command():
+        """Fingerprint and precompress static/ into static/build/."""
+        manifest = build_assets(app.static_folder)
+        static_assets.load_manifest()
+        print(f"Built {len(manifest)} assets")
 
     # Register blueprints
     from blueprints.financial_health import financial_health_bp
@@ -232,19 +407,18 @@ def create_app():
     app.register_blueprint(learning_hub_bp, template_folder='templates/LEARNINGHUB')
     app.register_blueprint(auth_bp, template_folder='templates/auth')
     app.register_blueprint(admin_bp, template_folder='templates/admin')
+    timer.mark('blueprints')
 
-    def trans(key, lang='en', logger=logger, **kwargs):
-        translation = trans(key, lang=lang, **kwargs)
-        if translation == key and app.debug:
-            logger.warning(f"Missing translation for key='{key}' in lang='{lang}'")
-        return translation
-
-    app.jinja_env.filters['trans'] = lambda key, **kwargs: trans(
-        key,
-        lang=kwargs.get('lang', session.get('lang', 'en')),
-        logger=g.get('logger', logger) if has_request_context() else logger,
-        **{k: v for k, v in kwargs.items() if k != 'lang'}
-    )
+    def request_translator():
+        """Translator bound to the current request's language, created once per request."""
+        if not has_request_context():
+            return bind_translator('en')
+        translator = g.get('trans')
+        if translator is None or translator.lang != session.get('lang', 'en'):
+            translator = g.trans = bind_translator(session.get('lang', 'en'))
+        return translator
+
+    app.jinja_env.filters['trans'] = lambda key, **kwargs: request_translator()(key, **kwargs)
 
     @app.template_filter('format_number')
     def format_number(value):
@@ -274,7 +448,11 @@ def create_app():
 
     @app.before_request
     def setup_session_and_language():
+        # Static files get no session, language or request log line (see skip_static_sessions)
+        if request.endpoint == 'static':
+            return
         try:
+            start_request_sampling(app)
             if 'sid' not in session:
                 session['sid'] = str(uuid.uuid4())
                 logger.info(f"New session ID generated: {session['sid']}")
@@ -283,19 +461,14 @@ def create_app():
                 logger.info(f"Set default language to {session['lang']}")
             g.logger = logger
             g.logger.info(f"Request started for path: {request.path}")
-            if not os.path.exists(os.path.join(os.path.dirname(__file__), 'data', 'storage.log')):
-                g.logger.warning("data/storage.log not found")
         except Exception as e:
             logger.error(f"Before request error: {str(e)}", exc_info=True)
 
     @app.context_processor
     def inject_translations():
-        lang = session.get('lang', 'en')
-        def context_trans(key, **kwargs):
-            used_lang = kwargs.pop('lang', lang)
-            return trans(key, lang=used_lang, logger=g.get('logger', logger), **kwargs)
+        lang = session.get('lang', 'en') if has_request_context() else 'en'
         return {
-            'trans': context_trans,
+            'trans': request_translator(),
             'current_year': datetime.now().year,
             'LINKEDIN_URL': os.environ.get('LINKEDIN_URL', '#'),
             'TWITTER_URL': os.environ.get('TWITTER_URL', '#'),
@@ -322,7 +495,7 @@ def create_app():
         lang = session.get('lang', 'en')
         logger.info("Serving index page")
         try:
-            courses = current_app.config['COURSES'] or SAMPLE_COURSES
+            courses = get_courses(current_app) or SAMPLE_COURSES
             logger.info(f"Retrieved {len(courses)} courses")
             processed_courses = courses
         except Exception as e:
@@ -373,87 +546,18 @@ def create_app():
     def general_dashboard():
         lang = session.get('lang', 'en')
         logger.info("Serving general dashboard")
-        data = {}
         try:
-            filter_kwargs = {'user_id': current_user.id} if current_user.is_authenticated else {'session_id': session['sid']}
-
-            # Financial Health
-            fh_records = FinancialHealth.query.filter_by(**filter_kwargs).order_by(FinancialHealth.created_at.desc()).all()
-            if not fh_records:
-                logger.warning(f"No FinancialHealth records found for filter: {filter_kwargs}")
-            data['financial_health'] = {
-                'score': fh_records[0].score,
-                'status': fh_records[0].status
-            } if fh_records else {'score': None, 'status': None}
-
-            # Budget
-            budget_records = Budget.query.filter_by(**filter_kwargs).order_by(Budget.created_at.desc()).all()
-            if not budget_records:
-                logger.warning(f"No Budget records found for filter: {filter_kwargs}")
-            data['budget'] = {
-                'surplus_deficit': budget_records[0].surplus_deficit,
-                'savings_goal': budget_records[0].savings_goal
-            } if budget_records else {'surplus_deficit': None, 'savings_goal': None}
-
-            # Bills
-            bills = Bill.query.filter_by(**filter_kwargs).all()
-            if not bills:
-                logger.warning(f"No Bill records found for filter: {filter_kwargs}")
-            total_amount = sum(bill.amount for bill in bills)
-            unpaid_amount = sum(bill.amount for bill in bills if bill.status.lower() != 'paid')
-            data['bills'] = {
-                'bills': [bill.to_dict() for bill in bills],
-                'total_amount': total_amount,
-                'unpaid_amount': unpaid_amount
-            }
-
-            # Net Worth
-            nw_records = NetWorth.query.filter_by(**filter_kwargs).order_by(NetWorth.created_at.desc()).all()
-            if not nw_records:
-                logger.warning(f"No NetWorth records found for filter: {filter_kwargs}")
-            data['net_worth'] = {
-                'net_worth': nw_records[0].net_worth,
-                'total_assets': nw_records[0].total_assets
-            } if nw_records else {'net_worth': None, 'total_assets': None}
-
-            # Emergency Fund
-            ef_records = EmergencyFund.query.filter_by(**filter_kwargs).order_by(EmergencyFund.created_at.desc()).all()
-            if not ef_records:
-                logger.warning(f"No EmergencyFund records found for filter: {filter_kwargs}")
-            data['emergency_fund'] = {
-                'target_amount': ef_records[0].target_amount,
-                'savings_gap': ef_records[0].savings_gap
-            } if ef_records else {'target_amount': None, 'savings_gap': None}
-
-            # Learning Progress
-            lp_records = LearningProgress.query.filter_by(**filter_kwargs).all()
-            if not lp_records:
-                logger.warning(f"No LearningProgress records found for filter: {filter_kwargs}")
-            data['learning_progress'] = {lp.course_id: lp.to_dict() for lp in lp_records}
-
-            # Quiz Result
-            quiz_records = QuizResult.query.filter_by(**filter_kwargs).order_by(QuizResult.created_at.desc()).all()
-            if not quiz_records:
-                logger.warning(f"No QuizResult records found for filter: {filter_kwargs}")
-            data['quiz'] = {
-                'personality': quiz_records[0].personality,
-                'score': quiz_records[0].score
-            } if quiz_records else {'personality': None, 'score': None}
+            if current_user.is_authenticated:
+                data = get_dashboard_summary(user_id=current_user.id)
+            else:
+                data = get_dashboard_summary(session_id=session['sid'])
 
             logger.info(f"Retrieved data for session {session['sid']}")
             return render_template('general_dashboard.html', data=data, t=translate, lang=lang)
         except Exception as e:
             logger.error(f"Error in general_dashboard: {str(e)}", exc_info=True)
             flash(trans('core_global_error_message', default='An error occurred', lang=lang), 'danger')
-            default_data = {
-                'financial_health': {'score': None, 'status': None},
-                'budget': {'surplus_deficit': None, 'savings_goal': None},
-                'bills': {'bills': [], 'total_amount': 0, 'unpaid_amount': 0},
-                'net_worth': {'net_worth': None, 'total_assets': None},
-                'emergency_fund': {'target_amount': None, 'savings_gap': None},
-                'learning_progress': {},
-                'quiz': {'personality': None, 'score': None}
-            }
+            default_data = empty_summary()
             return render_template('general_dashboard.html', data=default_data, t=translate, lang=lang), 500
 
     @app.route('/logout')
@@ -484,9 +588,10 @@ def create_app():
         try:
             with app.app_context():
                 db.session.execute(db.text("SELECT 1"))
-            if not os.path.exists(os.path.join(os.path.dirname(__file__), 'data', 'storage.log')):
+            log_file = app.config.get('LOG_FILE')
+            if not log_file or not os.path.exists(log_file):
                 status["status"] = "warning"
-                status["details"] = "Log file data/storage.log not found"
+                status["details"] = f"Log file {log_file or 'data/storage.log'} not found"
                 return jsonify(status), 200
             return jsonify(status), 200
         except Exception as e:
@@ -513,12 +618,6 @@ def create_app():
         logger.error(f"404 error: {str(e)}")
         return jsonify({'error': '404 not found'}), 404
 
-    @app.route('/static/<path:filename>')
-    def static_files(filename):
-        response = send_from_directory('static', filename)
-        response.headers['Content-Type'] = 'text/plain'
-        return response
-
     @app.route('/feedback', methods=['GET', 'POST'])
     @ensure_session_id
     def feedback():
@@ -560,29 +659,19 @@ def create_app():
             flash(trans('core_global_error', default='Error occurred while submitting feedback', lang=lang), 'error')
             return render_template('feedback.html', t=translate, lang=lang, tool_options=tool_options), 500
 
+    timer.mark('routes')
+    app.extensions['startup_timings'] = timer.report()
+    timer.log()
     logger.info("App creation completed")
     return app
 
-def log_tool_usage(tool_name):
-    try:
-        if current_user.is_authenticated:
-            user_id = current_user.id
-        else:
-            user_id = None
-        session_id = session.get('sid', 'unknown')
-        tool_usage = ToolUsage(user_id=user_id, session_id=session_id, tool_name=tool_name)
-        db.session.add(tool_usage)
-        db.session.commit()
-        logger.info(f"Logged tool usage: {tool_name} for session {session_id}")
-    except Exception as e:
-        logger.error(f"Error logging tool usage: {str(e)}")
-        db.session.rollback()
-
 # Create the Flask app instance for Gunicorn
 app = create_app()
 
 if __name__ == "__main__":
     try:
+        if not app.config['FICORE_INIT_ON_STARTUP']:
+            initialize_database(app)
         app.run(debug=True)
     except Exception as e:
         logger.error(f"Error running app: {str(e)}")
@@ -0,0 +1,85 @@
+"""
+Benchmark: concurrent ToolUsage inserts on SQLite, default settings vs. db_engine's pragmas.
+
+Usage:
+    python -m benchmarks.bench_sqlite_writes [workers] [rows_per_worker]
+
+Each worker is a separate process (like a gunicorn worker) with its own engine, committing
+one row per transaction, which is what synchronous tool usage logging does. Reports
+committed rows per second and how many commits failed with "database is locked".
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+from db_engine import install_sqlite_pragmas, sqlite_pragmas
+from models import ToolUsage
+
+TABLE = ToolUsage.__table__
+
+def make_engine(path, tuned):
+    engine = create_engine(f"sqlite:///{path}")
+    if tuned:
+        install_sqlite_pragmas(engine)
+    return engine
+
+def worker(path, tuned, rows, start_event, results):
+    engine = make_engine(path, tuned)
+    committed = locked = 0
+    start_event.wait()
+    for i in range(rows):
+        try:
+            with engine.begin() as connection:
+                connection.execute(TABLE.insert().values(
+                    id=str(uuid.uuid4()), tool_name='budget', user_id=None,
+                    session_id=str(uuid.uuid4()), action='submit', created_at=datetime.utcnow()
+                ))
+            committed += 1
+        except OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            locked += 1
+    engine.dispose()
+    results.put((committed, locked))
+
+def run(tuned, workers, rows):
+    directory = tempfile.mkdtemp(prefix='bench-sqlite-')
+    path = os.path.join(directory, 'bench.db')
+    engine = make_engine(path, tuned)
+    TABLE.create(engine)
+    engine.dispose()
+
+    start_event = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker, args=(path, tuned, rows, start_event, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    started = time.perf_counter()
+    start_event.set()
+    totals = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+    committed = sum(c for c, _ in totals)
+    locked = sum(l for _, l in totals)
+    return committed, locked, elapsed
+
+def main(workers=8, rows=250):
+    print(f"{workers} processes x {rows} single-row commits")
+    print(f"tuned pragmas: {sqlite_pragmas()}")
+    baseline = None
+    for name, tuned in (('default (rollback journal)', False), ('db_engine pragmas (WAL)', True)):
+        committed, locked, elapsed = run(tuned, workers, rows)
+        throughput = committed / elapsed
+        baseline = baseline or throughput
+        print(f"{name:28s} {throughput:8.0f} rows/s  {locked:5d} locked errors  {elapsed:6.2f}s  ({throughput / baseline:4.1f}x)")
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,71 @@
+"""
+Microbenchmark: compiled translation catalog vs. the previous per-call lookup.
+
+Usage:
+    python -m benchmarks.bench_translations [iterations]
+
+Runs outside a request context, so neither version touches the session; the numbers
+measure key routing, fallback and formatting cost only.
+"""
+import logging
+import random
+import sys
+import timeit
+
+from translations import (
+    trans, Translator, translation_modules, KEY_PREFIX_TO_MODULE, CATALOG, logger
+)
+
+def legacy_trans(key, lang=None, **kwargs):
+    """The lookup algorithm used before the catalog was compiled (request-context branches removed)."""
+    if lang is None:
+        lang = 'en'
+    if lang not in ['en', 'ha']:
+        lang = 'en'
+    module_name = 'core'
+    for prefix, mod in KEY_PREFIX_TO_MODULE.items():
+        if key.startswith(prefix):
+            module_name = mod
+            break
+    module = translation_modules.get(module_name, translation_modules['core'])
+    lang_dict = module.get(lang, {})
+    translation = lang_dict.get(key)
+    if translation is None:
+        en_dict = module.get('en', {})
+        translation = en_dict.get(key, key)
+        if translation == key:
+            logger.warning(f"Missing translation for key='{key}' in module '{module_name}', lang='{lang}'")
+    try:
+        return translation.format(**kwargs) if kwargs else translation
+    except (KeyError, ValueError):
+        return translation
+
+def sample_keys(count=500, seed=42):
+    rng = random.Random(seed)
+    keys = sorted(CATALOG['en'])
+    # Include learning_hub_/net_worth_ keys that sit late in the prefix table
+    return [rng.choice(keys) for _ in range(count)]
+
+def main(iterations=200):
+    logging.getLogger('ficore_app').setLevel(logging.CRITICAL)
+    keys = sample_keys()
+    translator = Translator('ha')
+
+    results = {
+        'legacy trans()': timeit.timeit(lambda: [legacy_trans(k, lang='ha') for k in keys], number=iterations),
+        'compiled trans()': timeit.timeit(lambda: [trans(k, lang='ha') for k in keys], number=iterations),
+        'bound Translator': timeit.timeit(lambda: [translator(k) for k in keys], number=iterations),
+        'legacy trans() + kwargs': timeit.timeit(lambda: [legacy_trans(k, lang='ha', name='Ada') for k in keys], number=iterations),
+        'bound Translator + kwargs': timeit.timeit(lambda: [translator(k, name='Ada') for k in keys], number=iterations),
+    }
+    calls = iterations * len(keys)
+    baseline = results['legacy trans()']
+    print(f"{calls} lookups per variant")
+    for name, seconds in results.items():
+        print(f"{name:28s} {seconds * 1e9 / calls:8.0f} ns/call  ({baseline / seconds:4.1f}x vs legacy)")
+
+    mismatches = [k for k in keys if legacy_trans(k, lang='ha') != translator(k)]
+    print(f"Output mismatches vs legacy: {len(mismatches)}")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
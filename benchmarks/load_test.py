@@ -0,0 +1,243 @@
+"""
+Load test: virtual users walking the multi-step tool wizards end to end.
+
+Usage:
+    python -m benchmarks.load_test [--base-url URL | --in-process] [--users N]
+        [--duration SECONDS] [--flows budget,quiz,...] [--think-ms MS] [--json PATH]
+
+Each virtual user is a thread with its own cookie jar. It picks a flow, GETs every step,
+posts the form back with the page's CSRF token and checks that it is redirected to the next
+step, then loads the tool's dashboard. Requests are timed per route ('POST /budget/step3')
+and the report gives count, errors, throughput and p50/p95/p99 latency, so two runs (e.g.
+before and after a change, or SQLite vs. Postgres) can be compared; --json saves it.
+
+--base-url drives a running server (gunicorn, `python app.py`) over HTTP. --in-process
+imports the app and drives it through Flask's test client, which measures the app without
+the server and network; point DATABASE_URL at a scratch database first.
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+CSRF_RE = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"|value="([^"]+)"[^>]*name="csrf_token"')
+
+def _email():
+    return f"loadtest+{uuid.uuid4().hex[:12]}@example.com"
+
+def _yes_no(first, last):
+    return {f"question_{i}": random.choice(['Yes', 'No']) for i in range(first, last + 1)}
+
+# flow name -> (steps as (path, form data factory), dashboard path)
+FLOWS = {
+    'budget': ([
+        ('/budget/step1', lambda: {'first_name': 'Load', 'email': _email()}),
+        ('/budget/step2', lambda: {'income': random.randint(50, 900) * 1000}),
+        ('/budget/step3', lambda: {'housing': 40000, 'food': 30000, 'transport': 10000, 'dependents': 5000,
+                                   'miscellaneous': 5000, 'others': random.randint(1, 20) * 1000}),
+        ('/budget/step4', lambda: {'savings_goal': random.randint(1, 50) * 1000}),
+    ], '/budget/dashboard'),
+    'financial_health': ([
+        ('/financial_health/step1', lambda: {'first_name': 'Load', 'email': _email(), 'user_type': 'individual'}),
+        ('/financial_health/step2', lambda: {'income': random.randint(50, 900) * 1000, 'expenses': random.randint(20, 400) * 1000}),
+        ('/financial_health/step3', lambda: {'debt': random.randint(0, 500) * 1000, 'interest_rate': random.randint(0, 30)}),
+    ], '/financial_health/dashboard'),
+    'bill': ([
+        ('/bill/form/step1', lambda: {'first_name': 'Load', 'email': _email(), 'bill_name': 'Electricity',
+                                      'amount': random.randint(1, 90) * 1000,
+                                      'due_date': (date.today() + timedelta(days=random.randint(1, 30))).isoformat()}),
+        ('/bill/form/step2', lambda: {'frequency': 'monthly', 'category': 'utilities', 'status': 'unpaid', 'reminder_days': 7}),
+    ], '/bill/dashboard'),
+    'quiz': ([
+        ('/quiz/step1?course_id=financial_quiz', lambda: {'first_name': 'Load', 'email': _email(), 'lang': 'en'}),
+        ('/quiz/step2a?course_id=financial_quiz', lambda: dict(_yes_no(1, 5), submit='Next')),
+        ('/quiz/step2b?course_id=financial_quiz', lambda: dict(_yes_no(6, 10), submit='Next')),
+    ], '/quiz/results?course_id=financial_quiz'),
+    'emergency_fund': ([
+        ('/emergency_fund/step1', lambda: {'first_name': 'Load', 'email': _email()}),
+        ('/emergency_fund/step2', lambda: {'monthly_expenses': f"{random.randint(20, 400) * 1000:,}", 'monthly_income': '500,000'}),
+        ('/emergency_fund/step3', lambda: {'current_savings': '100,000', 'risk_tolerance_level': random.choice(['low', 'medium', 'high']),
+                                           'dependents': random.randint(0, 5)}),
+        ('/emergency_fund/step4', lambda: {'timeline': random.choice(['6', '12', '18'])}),
+    ], '/emergency_fund/dashboard'),
+}
+
+class HttpClient:
+    """One virtual user's cookie jar against a running server."""
+
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+
+    def request(self, method, path, data=None):
+        response = self.session.request(method, self.base_url + path, data=data, allow_redirects=False, timeout=60)
+        return response.status_code, response.headers.get('Location'), response.text
+
+class AppClient:
+    """One virtual user's cookie jar against the app in this process (Flask test client)."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        return response.status_code, response.headers.get('Location'), response.get_data(as_text=True)
+
+def _route(method, path):
+    return f"{method} {urlsplit(path).path}"
+
+class Recorder:
+    """Thread-safe latency samples and error counts per route."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_examples = {}
+        self.flows = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, route, seconds, error=None):
+        with self._lock:
+            self.samples[route].append(seconds)
+            if error:
+                self.errors[route] += 1
+                self.error_examples.setdefault(route, error)
+
+    def flow_completed(self, name):
+        with self._lock:
+            self.flows[name] += 1
+
+def _timed(client, recorder, method, path, data=None, expect=None):
+    """Issue one request; expect is the path (without query) a POST must redirect to."""
+    route = _route(method, path)
+    started = time.perf_counter()
+    try:
+        status, location, body = client.request(method, path, data)
+    except Exception as e:
+        recorder.add(route, time.perf_counter() - started, f"{type(e).__name__}: {e}")
+        return None
+    elapsed = time.perf_counter() - started
+    error = None
+    if status >= 400:
+        error = f"HTTP {status}"
+    elif expect is not None and (status not in (301, 302, 303) or urlsplit(location or '').path != expect):
+        error = f"HTTP {status} to {location or 'no redirect'} instead of {expect}"
+    recorder.add(route, elapsed, error)
+    return None if error else body
+
+def run_flow(client, recorder, name, think):
+    steps, dashboard = FLOWS[name]
+    for index, (path, make_data) in enumerate(steps):
+        page = _timed(client, recorder, 'GET', path)
+        if page is None:
+            return
+        match = CSRF_RE.search(page)
+        data = make_data()
+        if match:
+            data['csrf_token'] = match.group(1) or match.group(2)
+        next_path = steps[index + 1][0] if index + 1 < len(steps) else dashboard
+        if _timed(client, recorder, 'POST', path, data, expect=urlsplit(next_path).path) is None:
+            return
+        if think:
+            time.sleep(random.uniform(0, think))
+    if _timed(client, recorder, 'GET', dashboard) is not None:
+        recorder.flow_completed(name)
+
+def virtual_user(make_client, recorder, flows, deadline, think):
+    while time.monotonic() < deadline:
+        # A fresh cookie jar per walk, like a new visitor
+        run_flow(make_client(), recorder, random.choice(flows), think)
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+def build_report(recorder, elapsed, users):
+    routes = {}
+    for route in sorted(recorder.samples):
+        ordered = sorted(recorder.samples[route])
+        routes[route] = {
+            'count': len(ordered),
+            'errors': recorder.errors.get(route, 0),
+            'rps': round(len(ordered) / elapsed, 2),
+            'p50_ms': round(percentile(ordered, 0.50) * 1000, 1),
+            'p95_ms': round(percentile(ordered, 0.95) * 1000, 1),
+            'p99_ms': round(percentile(ordered, 0.99) * 1000, 1),
+            'max_ms': round(ordered[-1] * 1000, 1)
+        }
+    total = sum(route['count'] for route in routes.values())
+    return {
+        'users': users,
+        'duration_s': round(elapsed, 2),
+        'requests': total,
+        'errors': sum(route['errors'] for route in routes.values()),
+        'rps': round(total / elapsed, 2) if elapsed else 0.0,
+        'flows_completed': dict(recorder.flows),
+        'routes': routes,
+        'error_examples': dict(recorder.error_examples)
+    }
+
+def print_report(report):
+    print(f"{report['users']} users, {report['duration_s']}s: {report['requests']} requests, "
+          f"{report['rps']} req/s, {report['errors']} errors")
+    print(f"Flows completed: {report['flows_completed']}")
+    print(f"{'route':42s} {'count':>6s} {'err':>5s} {'req/s':>7s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'max':>8s}")
+    for route, stats in report['routes'].items():
+        print(f"{route:42s} {stats['count']:6d} {stats['errors']:5d} {stats['rps']:7.2f} "
+              f"{stats['p50_ms']:7.1f}ms {stats['p95_ms']:7.1f}ms {stats['p99_ms']:7.1f}ms {stats['max_ms']:7.1f}ms")
+    for route, example in report['error_examples'].items():
+        print(f"  {route}: {example}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--base-url', default='http://127.0.0.1:5000')
+    target.add_argument('--in-process', action='store_true', help='Drive the app through the Flask test client.')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run.')
+    parser.add_argument('--flows', default=','.join(FLOWS), help='Comma-separated subset of: ' + ', '.join(FLOWS))
+    parser.add_argument('--think-ms', type=float, default=0.0, help='Maximum random pause between steps.')
+    parser.add_argument('--json', dest='json_path', help='Also write the report to this file.')
+    args = parser.parse_args(argv)
+
+    flows = [name.strip() for name in args.flows.split(',') if name.strip()]
+    unknown = [name for name in flows if name not in FLOWS]
+    if unknown:
+        parser.error(f"unknown flows: {', '.join(unknown)}")
+
+    if args.in_process:
+        from app import app
+        make_client = lambda: AppClient(app)
+    else:
+        make_client = lambda: HttpClient(args.base_url)
+
+    recorder = Recorder()
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(target=virtual_user, args=(make_client, recorder, flows, deadline, args.think_ms / 1000), daemon=True)
+        for _ in range(args.users)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report = build_report(recorder, time.perf_counter() - started, args.users)
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if report['errors'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,256 @@
+import logging
+import os
+import time
+import uuid
+from datetime import date, datetime
+from urllib.parse import urlsplit
+from sqlalchemy import select, update, func, literal, cast, or_, and_, Date, String
+from sqlalchemy.orm import contains_eager
+from extensions import db, email_outbox
+from models import Bill, User
+from mailersend_email import send_many, enabled_providers, trans, EMAIL_CONFIG
+from dashboard_summary import refresh_summaries, owner_key
+from blueprints.bill import calculate_next_due_date
+
+logger = logging.getLogger('ficore_app.bills')
+
+DEFAULT_REMINDER_DAYS = 7
+REMINDER_STATUSES = ('pending', 'overdue')
+# Bills fetched per round trip while streaming the reminder query
+REMINDER_FETCH_SIZE = int(os.environ.get('BILL_REMINDER_FETCH_SIZE', 500))
+# Recipients queued (or, with the outbox disabled, sent) per batch
+REMINDER_SEND_BATCH = int(os.environ.get('BILL_REMINDER_SEND_BATCH', 100))
+# Statuses that become 'overdue' once the due date has passed
+OVERDUE_SOURCE_STATUSES = ('pending', 'unpaid')
+# Rows flipped per transaction on PostgreSQL, to keep row locks short
+OVERDUE_CHUNK_SIZE = int(os.environ.get('BILL_OVERDUE_CHUNK_SIZE', 1000))
+# Columns copied into the next occurrence of a recurring bill
+OCCURRENCE_COLUMNS = (
+    'user_id', 'session_id', 'user_email', 'first_name', 'bill_name', 'amount',
+    'due_date', 'frequency', 'category', 'send_email', 'reminder_days'
+)
+
+def external_url_builder(app):
+    """
+    Return url(endpoint, **values) producing absolute URLs from BASE_URL.
+
+    Scheduler jobs have no request to take the host from, and SERVER_NAME is not set.
+    """
+    base = urlsplit(app.config.get('BASE_URL', 'http://localhost:5000'))
+    adapter = app.url_map.bind(base.netloc, script_name=base.path or '/', url_scheme=base.scheme or 'http')
+
+    def url(endpoint, **values):
+        return adapter.build(endpoint, values, force_external=True)
+    return url
+
+def reminder_window_end(today):
+    """SQL expression for the last due date inside each bill's reminder window."""
+    days = func.coalesce(Bill.reminder_days, DEFAULT_REMINDER_DAYS)
+    if db.engine.dialect.name == 'postgresql':
+        return literal(today, Date) + days
+    return func.date(today.isoformat(), '+' + cast(days, String) + ' days')
+
+def reminder_query(today):
+    """
+    Bills that need a reminder, with their owner joined in and ordered by recipient.
+
+    Mirrors the previous Python-side rules: send_email is set, a recipient address exists,
+    and the bill is pending/overdue or falls due within reminder_days (default 7).
+    """
+    recipient = func.coalesce(User.email, Bill.user_email)
+    return select(Bill, recipient.label('recipient'))\
+        .outerjoin(Bill.user)\
+        .options(contains_eager(Bill.user))\
+        .where(
+            Bill.send_email.is_(True),
+            recipient.isnot(None),
+            recipient != '',
+            or_(
+                Bill.status.in_(REMINDER_STATUSES),
+                and_(Bill.due_date >= today, Bill.due_date <= reminder_window_end(today))
+            )
+        )\
+        .order_by(recipient, Bill.due_date, Bill.id)\
+        .execution_options(yield_per=REMINDER_FETCH_SIZE)
+
+def _reminder_bill(bill, lang):
+    return {
+        'bill_name': bill.bill_name,
+        'amount': bill.amount,
+        'due_date': bill.due_date.strftime('%Y-%m-%d'),
+        'category': trans(f"bill_category_{bill.category}", lang=lang),
+        'status': trans(f"bill_status_{bill.status}", lang=lang)
+    }
+
+def run_bill_reminders(app, today=None):
+    """
+    Stream eligible bills and queue one reminder email per recipient.
+
+    Bills arrive grouped by recipient, so only the current recipient's bills and the
+    pending batch are held in memory. Batches go to the email outbox, whose worker delivers
+    them with retries and rate limits; with EMAIL_OUTBOX_ENABLED off they are sent here
+    through send_many instead. Must run in an app context.
+
+    Returns:
+        A run report dict: rows_scanned, recipients, emails_queued, emails_sent,
+        emails_failed, duration_seconds.
+    """
+    started = time.monotonic()
+    today = today or date.today()
+    url = external_url_builder(app)
+    config = EMAIL_CONFIG["bill_reminder"]
+    report = {'started_at': datetime.utcnow().isoformat() + 'Z', 'rows_scanned': 0, 'recipients': 0, 'emails_queued': 0, 'emails_sent': 0, 'emails_failed': 0}
+    if not enabled_providers():
+        logger.warning("Skipping bill reminders: no email providers configured")
+        report['duration_seconds'] = round(time.monotonic() - started, 3)
+        return report
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        if email_outbox.enabled:
+            report['emails_queued'] += email_outbox.enqueue_many(batch)
+            batch.clear()
+            return
+        result = send_many(app, logger, batch)
+        report['emails_sent'] += result['sent']
+        report['emails_failed'] += len(result['failed'])
+        batch.clear()
+
+    current = None
+    for bill, recipient in db.session.execute(reminder_query(today)):
+        report['rows_scanned'] += 1
+        if current is None or current['to_email'] != recipient:
+            if current is not None:
+                batch.append(current)
+                if len(batch) >= REMINDER_SEND_BATCH:
+                    flush()
+            lang = bill.user.lang if bill.user is not None and bill.user.lang in ('en', 'ha') else 'en'
+            current = {
+                'to_email': recipient,
+                'subject': trans(config["subject_key"], lang=lang),
+                'template_key': 'bill_reminder',
+                'data': {
+                    'first_name': bill.first_name or (bill.user.username if bill.user is not None else None) or 'User',
+                    'bills': [],
+                    'cta_url': url('bill.dashboard'),
+                    'unsubscribe_url': url('bill.unsubscribe', email=recipient)
+                },
+                'lang': lang
+            }
+            report['recipients'] += 1
+        current['data']['bills'].append(_reminder_bill(bill, current['lang']))
+    if current is not None:
+        batch.append(current)
+    flush()
+
+    report['duration_seconds'] = round(time.monotonic() - started, 3)
+    logger.info(
+        f"Bill reminder run: scanned {report['rows_scanned']} bills, {report['recipients']} recipients, "
+        f"queued {report['emails_queued']}, sent {report['emails_sent']}, failed {report['emails_failed']} in {report['duration_seconds']}s"
+    )
+    return report
+
+def _overdue_filter(today):
+    return (Bill.status.in_(OVERDUE_SOURCE_STATUSES), Bill.due_date < today)
+
+def _flip_overdue(today, chunk_size):
+    """
+    Flip one batch of past-due bills to 'overdue'.
+
+    Returns:
+        The flipped rows (OCCURRENCE_COLUMNS), taken from UPDATE ... RETURNING where supported.
+    """
+    columns = [getattr(Bill, name) for name in OCCURRENCE_COLUMNS]
+    stmt = update(Bill).where(*_overdue_filter(today)).values(status='overdue')
+    if chunk_size:
+        batch_ids = select(Bill.id).where(*_overdue_filter(today)).limit(chunk_size)\
+            .with_for_update(skip_locked=True).scalar_subquery()
+        stmt = stmt.where(Bill.id.in_(batch_ids))
+    if db.engine.dialect.update_returning:
+        return db.session.execute(stmt.returning(*columns), execution_options={'synchronize_session': False}).all()
+    # No RETURNING: read the rows first, then update exactly those ids
+    rows = db.session.execute(select(Bill.id, *columns).where(*_overdue_filter(today)).limit(chunk_size or None)).all()
+    if rows:
+        db.session.execute(
+            update(Bill).where(Bill.id.in_([row.id for row in rows]), *_overdue_filter(today)).values(status='overdue'),
+            execution_options={'synchronize_session': False}
+        )
+    return rows
+
+def _next_occurrences(rows, today):
+    """Build the next unpaid occurrence of each recurring bill, skipping periods already past."""
+    candidates = []
+    for row in rows:
+        if row.frequency == 'one-time':
+            continue
+        next_due = calculate_next_due_date(row.due_date, row.frequency)
+        if next_due <= row.due_date:
+            continue
+        while next_due < today:
+            next_due = calculate_next_due_date(next_due, row.frequency)
+        candidates.append((row, next_due))
+    if not candidates:
+        return []
+
+    # Skip occurrences that already exist (e.g. created when the bill was marked paid)
+    existing = set(db.session.execute(
+        select(Bill.session_id, Bill.bill_name, Bill.due_date).where(
+            Bill.session_id.in_({row.session_id for row, _ in candidates}),
+            Bill.due_date.in_({next_due for _, next_due in candidates})
+        )
+    ).all())
+    now = datetime.utcnow()
+    occurrences = []
+    for row, next_due in candidates:
+        key = (row.session_id, row.bill_name, next_due)
+        if key in existing:
+            continue
+        existing.add(key)
+        values = {name: getattr(row, name) for name in OCCURRENCE_COLUMNS}
+        values.update(id=str(uuid.uuid4()), due_date=next_due, status='unpaid', created_at=now)
+        occurrences.append(values)
+    return occurrences
+
+def run_overdue_update(today=None):
+    """
+    Mark past-due pending/unpaid bills as overdue with set-based UPDATEs.
+
+    PostgreSQL flips OVERDUE_CHUNK_SIZE rows per transaction (skipping rows locked by
+    requests); other databases use a single statement. Recurring bills that were flipped
+    get their next occurrence inserted, and affected dashboard summaries are rewritten.
+    Must run in an app context.
+
+    Returns:
+        A run report dict: updated, next_occurrences, chunks, duration_seconds.
+    """
+    started = time.monotonic()
+    today = today or date.today()
+    chunk_size = OVERDUE_CHUNK_SIZE if db.engine.dialect.name == 'postgresql' else None
+    report = {'updated': 0, 'next_occurrences': 0, 'chunks': 0}
+    while True:
+        try:
+            rows = _flip_overdue(today, chunk_size)
+            occurrences = _next_occurrences(rows, today)
+            if occurrences:
+                db.session.execute(Bill.__table__.insert(), occurrences)
+            owners = {owner_key(session_id=row.session_id) for row in rows}
+            owners.update(owner_key(user_id=row.user_id) for row in rows if row.user_id is not None)
+            refresh_summaries(owners)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        report['chunks'] += 1
+        report['updated'] += len(rows)
+        report['next_occurrences'] += len(occurrences)
+        if not chunk_size or len(rows) < chunk_size:
+            break
+
+    report['duration_seconds'] = round(time.monotonic() - started, 3)
+    logger.info(
+        f"Overdue update: {report['updated']} bills marked overdue, {report['next_occurrences']} "
+        f"recurring occurrences created in {report['chunks']} chunk(s), {report['duration_seconds']}s"
+    )
+    return report
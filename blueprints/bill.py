@@ -3,7 +3,7 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, FloatField, SelectField, BooleanField, IntegerField, HiddenField
 from wtforms.validators import DataRequired, NumberRange, Email, Optional
 from flask_login import current_user
-from mailersend_email import send_email, EMAIL_CONFIG
+from mailersend_email import queue_email, EMAIL_CONFIG
 from datetime import datetime, date, timedelta
 import uuid
 from translations import trans
@@ -273,13 +273,10 @@ def form_step2():
                     try:
                         config = EMAIL_CONFIG['bill_reminder']
                         subject = trans(config['subject_key'], lang=lang)
-                        template = config['template']
-                        send_email(
-                            app=current_app,
-                            logger=current_app.logger,
+                        queue_email(
                             to_email=bill_step1_data['email'],
                             subject=subject,
-                            template_name=template,
+                            template_key='bill_reminder',
                             data={
                                 'first_name': bill_step1_data['first_name'],
                                 'bills': [{
@@ -294,8 +291,10 @@ def form_step2():
                             },
                             lang=lang
                         )
+                        db.session.commit()
                         current_app.logger.info(f"Email sent to {bill_step1_data['email']}")
                     except Exception as e:
+                        db.session.rollback()
                         current_app.logger.error(f"Failed to send email: {str(e)}")
                         flash(trans('email_send_failed', lang) or 'Failed to send email reminder', 'warning')
 
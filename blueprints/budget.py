@@ -3,7 +3,7 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, FloatField, BooleanField, SubmitField
 from wtforms.validators import DataRequired, NumberRange, Optional, Email, ValidationError
 from flask_login import current_user
-from mailersend_email import send_email, EMAIL_CONFIG
+from mailersend_email import queue_email, EMAIL_CONFIG
 from datetime import datetime
 import uuid
 import re
@@ -343,13 +343,10 @@ def step4():
                     try:
                         config = EMAIL_CONFIG["budget"]
                         subject = trans(config["subject_key"], lang=lang)
-                        template = config["template"]
-                        send_email(
-                            app=current_app,
-                            logger=current_app.logger,
+                        queue_email(
                             to_email=email,
                             subject=subject,
-                            template_name=template,
+                            template_key="budget",
                             data={
                                 "first_name": step1_data.get('first_name', ''),
                                 "income": income,
@@ -367,7 +364,9 @@ def step4():
                             },
                             lang=lang
                         )
+                        db.session.commit()
                     except Exception as e:
+                        db.session.rollback()
                         current_app.logger.error(f"Failed to send email: {str(e)}")
                         flash(trans("email_send_failed", lang=lang), "warning")
 
@@ -3,10 +3,9 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, FloatField, IntegerField, SelectField, BooleanField, SubmitField
 from wtforms.validators import DataRequired, Optional, Email, NumberRange
 from flask_login import current_user
-from mailersend_email import send_email, EMAIL_CONFIG
+from mailersend_email import queue_email, EMAIL_CONFIG
 from datetime import datetime
 import uuid
-import json
 from translations import trans
 from extensions import db
 from models import EmergencyFund, Budget, log_tool_usage
@@ -318,7 +317,7 @@ def step4():
                     savings_gap=gap,
                     monthly_savings=monthly_savings,
                     percent_of_income=percent_of_income,
-                    badges=json.dumps(badges)
+                    badges=badges
                 )
                 db.session.add(emergency_fund)
                 db.session.commit()
@@ -328,13 +327,10 @@ def step4():
                     try:
                         config = EMAIL_CONFIG["emergency_fund"]
                         subject = trans(config["subject_key"], lang=lang)
-                        template = config["template"]
-                        send_email(
-                            app=current_app,
-                            logger=current_app.logger,
+                        queue_email(
                             to_email=step1_data['email'],
                             subject=subject,
-                            template_name=template,
+                            template_key="emergency_fund",
                             data={
                                 'first_name': step1_data['first_name'],
                                 'lang': lang,
@@ -356,7 +352,9 @@ def step4():
                             },
                             lang=lang
                         )
+                        db.session.commit()
                     except Exception as e:
+                        db.session.rollback()
                         current_app.logger.error(f"Failed to send email: {str(e)}")
                         flash(trans("email_send_failed", lang=lang), "danger")
 
@@ -5,11 +5,11 @@ from wtforms.validators import DataRequired, NumberRange, Optional, Email, Valid
 from flask_login import current_user
 from datetime import datetime
 import uuid
-import json
 from extensions import db
-from mailersend_email import send_email, EMAIL_CONFIG
+from mailersend_email import queue_email, EMAIL_CONFIG
 from translations import trans
 from models import FinancialHealth, log_tool_usage
+from score_index import record_score_change, score_ranking
 
 financial_health_bp = Blueprint('financial_health', __name__, url_prefix='/financial_health')
 
@@ -325,6 +325,7 @@ def step3():
                         created_at=datetime.utcnow(),
                     )
                     db.session.add(financial_health)
+                previous_score = financial_health.score
 
                 financial_health.step = 3
                 financial_health.first_name = step1_data.get('first_name', '')
@@ -340,8 +341,9 @@ def step3():
                 financial_health.score = score
                 financial_health.status = status
                 financial_health.status_key = status_key
-                financial_health.badges = json.dumps(badges)
+                financial_health.badges = badges
                 financial_health.send_email = step1_data.get('send_email', False)
+                record_score_change(previous_score, score)
 
                 current_app.logger.info(f"Step3 data updated/saved to database with ID {financial_health.id} for session {session['sid']}")
 
@@ -350,13 +352,10 @@ def step3():
                     try:
                         config = EMAIL_CONFIG["financial_health"]
                         subject = trans(config["subject_key"], lang=lang)
-                        template = config["template"]
-                        send_email(
-                            app=current_app,
-                            logger=current_app.logger,
+                        queue_email(
                             to_email=step1_data['email'],
                             subject=subject,
-                            template_name=template,
+                            template_key="financial_health",
                             data={
                                 "first_name": step1_data['first_name'],
                                 "score": score,
@@ -421,18 +420,11 @@ def dashboard():
             latest_record = stored_records[0].to_dict()
             records = [(record.id, record.to_dict()) for record in stored_records]
 
-        # Query all records with step=3 for comparison
-        all_records = FinancialHealth.query.filter_by(step=3).all()
-        all_scores_for_comparison = [record.score for record in all_records if record.score is not None]
-
-        total_users = len(all_scores_for_comparison)
-        rank = 0
-        average_score = 0
-        if all_scores_for_comparison:
-            all_scores_for_comparison.sort(reverse=True)
-            user_score = latest_record.get("score", 0)
-            rank = sum(1 for s in all_scores_for_comparison if s > user_score) + 1
-            average_score = sum(all_scores_for_comparison) / total_users
+        # Compare against all step-3 scores via the score histogram
+        ranking = score_ranking(latest_record.get("score", 0))
+        total_users = ranking['total_users']
+        rank = ranking['rank']
+        average_score = ranking['average_score']
 
         insights = []
         tips = [
@@ -469,6 +461,7 @@ def dashboard():
             insights=insights,
             tips=tips,
             rank=rank,
+            percentile=ranking['percentile'],
             total_users=total_users,
             average_score=average_score,
             trans=trans,
@@ -489,6 +482,7 @@ def dashboard():
                 trans("financial_health_tip_plan_expenses", lang=lang)
             ],
             rank=0,
+            percentile=0,
             total_users=0,
             average_score=0,
             trans=trans,
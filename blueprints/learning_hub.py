@@ -1,20 +1,25 @@
-from flask import Blueprint, render_template, session, request, redirect, url_for, flash, current_app, send_from_directory
+from flask import Blueprint, render_template, session, request, redirect, url_for, flash, current_app, send_from_directory, make_response
 from flask_wtf import FlaskForm
 from wtforms import StringField, BooleanField, SubmitField, HiddenField, FileField
 from wtforms.validators import DataRequired, Email, Optional
 from flask_wtf.csrf import CSRFProtect, CSRFError
 from flask_login import current_user
 from datetime import datetime
-from mailersend_email import send_email, EMAIL_CONFIG
+from mailersend_email import queue_email, EMAIL_CONFIG
 import uuid
-import json
 import os
 from translations import trans
 from extensions import db
-from models import LearningProgress, Course, log_tool_usage
+from models import LearningProgress, Course, ContentMetadata, log_tool_usage
+from course_catalog import CatalogStore
+from upload_storage import stream_uploads, store_upload, CONTENT_HASH_RE
 from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
+from werkzeug.exceptions import NotFound
+import mimetypes
 
 learning_hub_bp = Blueprint('learning_hub', __name__)
+learning_hub_bp.record_once(lambda state: stream_uploads(f"{state.name}.upload_content", upload_target))
 
 # Initialize CSRF protection
 csrf = CSRFProtect()
@@ -22,6 +27,14 @@ csrf = CSRFProtect()
 # Define allowed file extensions and upload folder
 ALLOWED_EXTENSIONS = {'mp4', 'pdf', 'txt'}
 UPLOAD_FOLDER = 'static/uploads'
+DEFAULT_MAX_UPLOAD_MB = 500
+# Uploaded files whose names carry their content hash never change
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+def upload_target(app):
+    """Directory and byte limit for streamed lesson uploads."""
+    max_mb = app.config.get('LEARNING_HUB_MAX_UPLOAD_MB', int(os.environ.get('LEARNING_HUB_MAX_UPLOAD_MB', DEFAULT_MAX_UPLOAD_MB)))
+    return app.config.get('UPLOAD_FOLDER', UPLOAD_FOLDER), max_mb * 1024 * 1024
 
 # Ensure upload folder exists
 def init_app(app):
@@ -145,6 +158,9 @@ quizzes_data = {
     }
 }
 
+# Indexed, read-only view of courses_data/quizzes_data plus uploaded content; built in create_app
+catalog_store = CatalogStore(courses_data, quizzes_data)
+
 class LearningHubProfileForm(FlaskForm):
     first_name = StringField(validators=[DataRequired()])
     email = StringField(validators=[Optional(), Email()])
@@ -219,8 +235,8 @@ def save_course_progress(course_id, course_progress):
                 session_id=session['sid'],
                 course_id=course_id
             )
-        progress.lessons_completed = json.dumps(course_progress.get('lessons_completed', []))
-        progress.quiz_scores = json.dumps(course_progress.get('quiz_scores', {}))
+        progress.lessons_completed = list(course_progress.get('lessons_completed', []))
+        progress.quiz_scores = dict(course_progress.get('quiz_scores', {}))
         progress.current_lesson = course_progress.get('current_lesson')
         db.session.add(progress)
         db.session.commit()
@@ -257,17 +273,16 @@ def init_storage(app):
 
 def course_lookup(course_id):
     """Retrieve course by ID."""
-    return courses_data.get(course_id)
+    return catalog_store.get().course(course_id)
 
 def lesson_lookup(course, lesson_id):
     """Retrieve lesson and its module by lesson ID."""
-    if not course or 'modules' not in course:
+    if not course:
         return None, None
-    for module in course['modules']:
-        for lesson in module.get('lessons', []):
-            if lesson.get('id') == lesson_id:
-                return lesson, module
-    return None, None
+    entry = catalog_store.get().lesson(course['id'], lesson_id)
+    if entry is None:
+        return None, None
+    return entry.lesson, entry.module
 
 @learning_hub_bp.route('/courses')
 def courses():
@@ -285,11 +300,8 @@ def courses():
             session_id=session['sid'],
             action='courses_view'
         )
-        if not isinstance(courses_data, dict):
-            current_app.logger.error(f"Invalid courses_data type, Path: {request.path}, Type: {type(courses_data)}", extra={'session_id': session.get('sid', 'no-session-id')})
-            raise ValueError("courses_data is not a dictionary")
         current_app.logger.info(f"Rendering courses page, Path: {request.path}", extra={'session_id': session.get('sid', 'no-session-id')})
-        return render_template('LEARNINGHUB/learning_hub_courses.html', courses=courses_data, progress=progress, trans=trans, lang=lang)
+        return render_template('LEARNINGHUB/learning_hub_courses.html', courses=catalog_store.get().courses, progress=progress, trans=trans, lang=lang)
     except Exception as e:
         current_app.logger.error(f"Error rendering courses page, Path: {request.path}: {str(e)}", extra={'session_id': session.get('sid', 'no-session-id')})
         flash(trans("learning_hub_error_loading", default="Error loading courses", lang=lang), "danger")
@@ -318,7 +330,12 @@ def course_overview(course_id):
             action='course_overview_view'
         )
         current_app.logger.info(f"Rendering course overview, Path: {request.path}, Course ID: {course_id}", extra={'session_id': session.get('sid', 'no-session-id')})
-        return render_template('LEARNINGHUB/learning_hub_course_overview.html', course=course, progress=course_progress, trans=trans, lang=lang)
+        catalog = catalog_store.get()
+        return render_template(
+            'LEARNINGHUB/learning_hub_course_overview.html', course=course, progress=course_progress,
+            lessons_total=catalog.lesson_count(course_id), first_lesson_id=catalog.first_lesson_id(course_id),
+            trans=trans, lang=lang
+        )
     except Exception as e:
         current_app.logger.error(f"Error rendering course overview, Path: {request.path}, Course ID: {course_id}: {str(e)}", extra={'session_id': session.get('sid', 'no-session-id')})
         flash(trans("learning_hub_error_loading", default="Error loading course", lang=lang), "danger")
@@ -381,7 +398,8 @@ def lesson(course_id, lesson_id):
         current_app.logger.error(f"Course not found, Path: {request.path}, Course ID: {course_id}", extra={'session_id': session.get('sid', 'no-session-id')})
         flash(trans("learning_hub_course_not_found", default="Course not found"), "danger")
         return redirect(url_for('learning_hub.courses'))
-    lesson, module = lesson_lookup(course, lesson_id)
+    entry = catalog_store.get().lesson(course_id, lesson_id)
+    lesson, module = (entry.lesson, entry.module) if entry else (None, None)
     if not lesson:
         current_app.logger.error(f"Lesson not found, Path: {request.path}, Lesson ID: {lesson_id}", extra={'session_id': session.get('sid', 'no-session-id')})
         flash(trans("learning_hub_lesson_not_found", default="Lesson not found"), "danger")
@@ -422,14 +440,11 @@ def lesson(course_id, lesson_id):
                     if profile.get('send_email') and profile.get('email'):
                         config = EMAIL_CONFIG["learning_hub_lesson_completed"]
                         subject = trans(config["subject_key"], lang=lang)
-                        template = config["template"]
                         try:
-                            send_email(
-                                app=current_app,
-                                logger=current_app.logger,
+                            queue_email(
                                 to_email=profile['email'],
                                 subject=subject,
-                                template_name=template,
+                                template_key="learning_hub_lesson_completed",
                                 data={
                                     "first_name": profile['first_name'],
                                     "course_title": trans(course['title_key'], lang=lang),
@@ -440,27 +455,18 @@ def lesson(course_id, lesson_id):
                                 },
                                 lang=lang
                             )
+                            db.session.commit()
                         except Exception as e:
+                            db.session.rollback()
                             current_app.logger.error(f"Failed to send email: {str(e)}")
                             flash(trans("email_send_failed", lang=lang), "warning")
 
-                    next_lesson_id = None
-                    found = False
-                    for m in course['modules']:
-                        for l in m['lessons']:
-                            if found and l.get('id'):
-                                next_lesson_id = l['id']
-                                break
-                            if l['id'] == lesson_id:
-                                found = True
-                        if next_lesson_id:
-                            break
-                    if next_lesson_id:
-                        return redirect(url_for('learning_hub.lesson', course_id=course_id, lesson_id=next_lesson_id))
+                    if entry.next_lesson_id:
+                        return redirect(url_for('learning_hub.lesson', course_id=course_id, lesson_id=entry.next_lesson_id))
                     else:
                         return redirect(url_for('learning_hub.course_overview', course_id=course_id))
         current_app.logger.info(f"Rendering lesson page, Path: {request.path}, Course ID: {course_id}, Lesson ID: {lesson_id}", extra={'session_id': session.get('sid', 'no-session-id')})
-        return render_template('LEARNINGHUB/learning_hub_lesson.html', course=course, lesson=lesson, module=module, progress=course_progress, form=form, trans=trans, lang=lang)
+        return render_template('LEARNINGHUB/learning_hub_lesson.html', course=course, lesson=lesson, module=module, next_lesson_id=entry.next_lesson_id, progress=course_progress, form=form, trans=trans, lang=lang)
     except Exception as e:
         current_app.logger.error(f"Error in lesson page: {str(e)}", extra={'session_id': session.get('sid', 'no-session-id')})
         flash(trans("learning_hub_error_loading", default="Error loading lesson"), "danger")
@@ -479,7 +485,7 @@ def quiz(course_id, quiz_id):
         current_app.logger.error(f"Course not found, Path: {request.path}, Course ID: {course_id}", extra={'session_id': session.get('sid', 'no-session-id')})
         flash(trans("learning_hub_course_not_found", default="Course not found"), "danger")
         return redirect(url_for('learning_hub.courses'))
-    quiz = quizzes_data.get(quiz_id)
+    quiz = catalog_store.get().quiz(quiz_id)
     if not quiz:
         current_app.logger.error(f"Quiz not found, Path: {request.path}, Quiz ID: {quiz_id}", extra={'session_id': session.get('sid', 'no-session-id')})
         flash(trans("learning_hub_quiz_not_found", default="Quiz not found"), "danger")
@@ -542,14 +548,13 @@ def dashboard():
             session_id=session['sid'],
             action='dashboard_view'
         )
-        for course_id, course in courses_data.items():
+        catalog = catalog_store.get()
+        for course_id, course in catalog.courses.items():
             cp = progress.get(course_id, {'lessons_completed': [], 'current_lesson': None})
-            lessons_total = sum(len(m.get('lessons', [])) for m in course.get('modules', []))
+            lessons_total = catalog.lesson_count(course_id)
             completed = len(cp.get('lessons_completed', []))
             percent = int((completed / lessons_total) * 100) if lessons_total > 0 else 0
-            current_lesson_id = cp.get('current_lesson')
-            if not current_lesson_id and lessons_total > 0:
-                current_lesson_id = course['modules'][0]['lessons'][0]['id'] if course['modules'] and course['modules'][0]['lessons'] else None
+            current_lesson_id = cp.get('current_lesson') or catalog.first_lesson_id(course_id)
             progress_summary.append({
                 'course': course,
                 'completed': completed,
@@ -606,25 +611,20 @@ def upload_content():
         lesson_id = form.lesson_id.data
         content_type = form.content_type.data
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            file_path = os.path.join(current_app.config.get('UPLOAD_FOLDER', UPLOAD_FOLDER), filename)
-            file.save(file_path)
-            # Update courses_data or database
-            course = course_lookup(course_id)
-            if course:
-                for module in course['modules']:
-                    for lesson in module['lessons']:
-                        if lesson['id'] == lesson_id:
-                            lesson['content_type'] = content_type
-                            lesson['content_path'] = f"uploads/{filename}"
-                            break
-            # Optionally, store metadata in a new database table
+            upload_folder, max_bytes = upload_target(current_app)
+            stored = store_upload(file, upload_folder, secure_filename(file.filename), max_bytes)
+            content_path = f"uploads/{stored['filename']}"
+            if catalog_store.get().lesson(course_id, lesson_id) is None:
+                current_app.logger.warning(f"Uploaded content for unknown lesson {course_id}/{lesson_id}", extra={'session_id': session.get('sid', 'no-session-id')})
+            # The catalog picks the new content up from ContentMetadata once this commits
             try:
                 content_metadata = ContentMetadata(
                     course_id=course_id,
                     lesson_id=lesson_id,
                     content_type=content_type,
-                    content_path=f"uploads/{filename}",
+                    content_path=content_path,
+                    checksum=stored['checksum'],
+                    size_bytes=stored['size'],
                     uploaded_by=current_user.id if current_user.is_authenticated else None,
                     upload_date=datetime(2025, 6, 9, 8, 40)
                 )
@@ -641,16 +641,41 @@ def upload_content():
 
 @learning_hub_bp.route('/static/uploads/<path:filename>')
 def serve_uploaded_file(filename):
-    """Serve uploaded files securely."""
+    """
+    Serve uploaded files with byte-range support.
+
+    send_from_directory answers Range requests with 206 Partial Content and sets ETag and
+    Last-Modified, so seeking a video only fetches the bytes it needs. Full responses go
+    through the server's wsgi.file_wrapper (sendfile under gunicorn). With
+    UPLOAD_ACCEL_REDIRECT_PREFIX set, the file is handed to nginx via X-Accel-Redirect instead.
+    """
     try:
-        log_tool_usage(
-            tool_name='learning_hub',
-            user_id=current_user.id if current_user.is_authenticated else None,
-            session_id=session['sid'],
-            action='serve_uploaded_file'
-        )
-        response = send_from_directory(current_app.config.get('UPLOAD_FOLDER', UPLOAD_FOLDER), filename)
-        response.headers['Cache-Control'] = 'public, max-age=31536000'
+        # Seeking a video issues many range requests; count only the initial one
+        if request.range is None or request.range.ranges[0][0] == 0:
+            log_tool_usage(
+                tool_name='learning_hub',
+                user_id=current_user.id if current_user.is_authenticated else None,
+                session_id=session['sid'],
+                action='serve_uploaded_file'
+            )
+        upload_folder = current_app.config.get('UPLOAD_FOLDER', UPLOAD_FOLDER)
+        immutable = CONTENT_HASH_RE.search(filename) is not None
+        accel_prefix = current_app.config.get('UPLOAD_ACCEL_REDIRECT_PREFIX', os.environ.get('UPLOAD_ACCEL_REDIRECT_PREFIX'))
+        if accel_prefix:
+            if not os.path.isfile(safe_join(upload_folder, filename) or ''):
+                raise NotFound()
+            response = make_response('')
+            response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{filename}"
+            response.headers['Content-Type'] = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        else:
+            response = send_from_directory(upload_folder, filename, conditional=True, max_age=IMMUTABLE_MAX_AGE if immutable else 0)
+        response.cache_control.public = True
+        if immutable:
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            # Legacy names can be overwritten by a re-upload; revalidate with ETag/Last-Modified
+            response.cache_control.no_cache = True
         return response
     except Exception as e:
         current_app.logger.error(f"Error serving uploaded file {filename}: {str(e)}", extra={'session_id': session.get('sid', 'no-session-id')})
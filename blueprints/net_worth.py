@@ -6,10 +6,9 @@ from flask_login import current_user
 from translations import trans
 from extensions import db
 from models import NetWorth, log_tool_usage
-from mailersend_email import send_email, EMAIL_CONFIG
+from mailersend_email import queue_email, EMAIL_CONFIG
 from datetime import datetime
 import uuid
-import json
 
 net_worth_bp = Blueprint('net_worth', __name__, url_prefix='/net_worth')
 
@@ -256,7 +255,7 @@ def step3():
                     total_assets=total_assets,
                     total_liabilities=total_liabilities,
                     net_worth=net_worth,
-                    badges=json.dumps(badges),
+                    badges=badges,
                     created_at=datetime.utcnow()
                 )
                 db.session.add(net_worth_record)
@@ -271,13 +270,10 @@ def step3():
                     try:
                         config = EMAIL_CONFIG["net_worth"]
                         subject = trans(config["subject_key"], lang=lang)
-                        template = config["template"]
-                        send_email(
-                            app=current_app,
-                            logger=current_app.logger,
+                        queue_email(
                             to_email=email,
                             subject=subject,
-                            template_name=template,
+                            template_key="net_worth",
                             data={
                                 "first_name": net_worth_record.first_name,
                                 "cash_savings": net_worth_record.cash_savings,
@@ -287,14 +283,16 @@ def step3():
                                 "total_assets": net_worth_record.total_assets,
                                 "total_liabilities": net_worth_record.total_liabilities,
                                 "net_worth": net_worth_record.net_worth,
-                                "badges": json.loads(net_worth_record.badges),
+                                "badges": net_worth_record.badges or [],
                                 "created_at": net_worth_record.created_at.strftime('%Y-%m-%d %H:%M:%S'),
                                 "cta_url": url_for('net_worth.dashboard', _external=True),
                                 "unsubscribe_url": url_for('net_worth.unsubscribe', email=email, _external=True)
                             },
                             lang=lang
                         )
+                        db.session.commit()
                     except Exception as e:
+                        db.session.rollback()
                         current_app.logger.error(f"Failed to send email: {str(e)}")
                         flash(trans("net_worth_email_failed", lang=lang), "warning")
 
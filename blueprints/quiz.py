@@ -5,10 +5,9 @@ from wtforms.validators import DataRequired, Email, Optional
 from flask_login import current_user
 import uuid
 from datetime import datetime
-import json
 import logging
 from translations import trans
-from mailersend_email import send_email, EMAIL_CONFIG
+from mailersend_email import queue_email, EMAIL_CONFIG
 from extensions import db
 from models import QuizResult, log_tool_usage  # Added log_tool_usage import
 
@@ -371,9 +370,9 @@ def step2b():
                     send_email=session['quiz_data'].get('send_email', False),
                     personality=personality['name'],
                     score=score,
-                    badges=json.dumps(badges),
-                    insights=json.dumps(personality['insights']),
-                    tips=json.dumps(personality['tips'])
+                    badges=badges,
+                    insights=personality['insights'],
+                    tips=personality['tips']
                 )
                 db.session.add(quiz_result)
                 db.session.commit()
@@ -389,13 +388,10 @@ def step2b():
                     try:
                         config = EMAIL_CONFIG["quiz"]
                         subject = trans(config["subject_key"], lang=lang)
-                        template = config["template"]
-                        send_email(
-                            app=current_app,
-                            logger=current_app.logger,
+                        queue_email(
                             to_email=session['quiz_data']['email'],
                             subject=subject,
-                            template_name=template,
+                            template_key="quiz",
                             data={
                                 "first_name": results['first_name'],
                                 "score": results['score'],
@@ -409,7 +405,9 @@ def step2b():
                             },
                             lang=lang
                         )
+                        db.session.commit()
                     except Exception as e:
+                        db.session.rollback()
                         logger.error(f"Failed to send quiz results email: {str(e)}", extra={'session_id': session['sid']})
                         flash(trans("email_send_failed", default="Failed to send email.", lang=lang), "warning")
                 
@@ -0,0 +1,197 @@
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger('ficore_app.learning_hub')
+
+# Where a lesson sits in its course
+LessonEntry = namedtuple('LessonEntry', ['course_id', 'lesson', 'module', 'position', 'next_lesson_id'])
+
+def _freeze(value):
+    """Read-only copy: dicts become mappingproxies and lists tuples, recursively."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+class CourseCatalog:
+    """
+    Immutable, indexed view of the course and quiz definitions.
+
+    Built once from the static course data plus the latest ContentMetadata upload per lesson,
+    then only read: every lookup is a dict access instead of a walk over modules and lessons.
+    A new catalog is built (never mutated in place) when uploads change, so request threads
+    holding the previous one keep a consistent view.
+
+    Args:
+        courses: {course_id: course dict} with modules -> lessons.
+        quizzes: {quiz_id: quiz dict}.
+        content_overrides: {(course_id, lesson_id): {'content_type', 'content_path'}}.
+        signature: Opaque value identifying the ContentMetadata state it was built from.
+    """
+
+    def __init__(self, courses, quizzes, content_overrides=None, signature=None):
+        content_overrides = content_overrides or {}
+        self.signature = signature
+        self.built_at = time.time()
+        self._lessons = {}
+        self._first_lesson = {}
+        self._lesson_counts = {}
+        frozen_courses = {}
+        for course_id, course in courses.items():
+            ordered = []
+            modules = []
+            for module in course.get('modules', []):
+                lessons = []
+                for lesson in module.get('lessons', []):
+                    lesson = dict(lesson)
+                    lesson.update(content_overrides.get((course_id, lesson.get('id')), {}))
+                    lessons.append(lesson)
+                modules.append(dict(module, lessons=lessons))
+            frozen = _freeze(dict(course, modules=modules))
+            for module in frozen['modules']:
+                for lesson in module['lessons']:
+                    ordered.append((lesson, module))
+            for position, (lesson, module) in enumerate(ordered):
+                next_lesson_id = ordered[position + 1][0]['id'] if position + 1 < len(ordered) else None
+                self._lessons[(course_id, lesson['id'])] = LessonEntry(course_id, lesson, module, position, next_lesson_id)
+            self._first_lesson[course_id] = ordered[0][0]['id'] if ordered else None
+            self._lesson_counts[course_id] = len(ordered)
+            frozen_courses[course_id] = frozen
+        self.courses = MappingProxyType(frozen_courses)
+        self.quizzes = _freeze(quizzes)
+
+    def course(self, course_id):
+        return self.courses.get(course_id)
+
+    def lesson(self, course_id, lesson_id):
+        """Return the LessonEntry for lesson_id in course_id, or None."""
+        return self._lessons.get((course_id, lesson_id))
+
+    def quiz(self, quiz_id):
+        return self.quizzes.get(quiz_id)
+
+    def lesson_count(self, course_id):
+        return self._lesson_counts.get(course_id, 0)
+
+    def first_lesson_id(self, course_id):
+        return self._first_lesson.get(course_id)
+
+    def next_lesson_id(self, course_id, lesson_id):
+        entry = self._lessons.get((course_id, lesson_id))
+        return entry.next_lesson_id if entry else None
+
+def content_signature():
+    """Cheap fingerprint of the ContentMetadata table, compared to detect uploads by other workers."""
+    from extensions import db
+    from models import ContentMetadata
+    return tuple(db.session.execute(
+        select(func.count(ContentMetadata.id), func.max(ContentMetadata.id), func.max(ContentMetadata.upload_date))
+    ).one())
+
+def load_content_overrides():
+    """Latest uploaded content per (course_id, lesson_id)."""
+    from extensions import db
+    from models import ContentMetadata
+    overrides = {}
+    rows = db.session.execute(
+        select(ContentMetadata.course_id, ContentMetadata.lesson_id, ContentMetadata.content_type, ContentMetadata.content_path)
+        .order_by(ContentMetadata.upload_date, ContentMetadata.id)
+    )
+    for course_id, lesson_id, content_type, content_path in rows:
+        overrides[(course_id, lesson_id)] = {'content_type': content_type, 'content_path': content_path}
+    return overrides
+
+class CatalogStore:
+    """
+    Holds the current CourseCatalog for this process.
+
+    The catalog is built on first use in each process. Commits that touch ContentMetadata
+    mark it stale in the committing process; other workers compare content_signature() at most every
+    CATALOG_REFRESH_SECONDS and rebuild when it changed.
+    """
+
+    def __init__(self, courses, quizzes):
+        self.courses = courses
+        self.quizzes = quizzes
+        self.refresh_seconds = int(os.environ.get('CATALOG_REFRESH_SECONDS', 30))
+        self._catalog = None
+        self._checked_at = 0.0
+        self._stale = True
+        self._lock = threading.Lock()
+
+    def rebuild(self):
+        """Build a new catalog from the course data and ContentMetadata (needs an app context)."""
+        try:
+            signature = content_signature()
+            overrides = load_content_overrides()
+        except Exception as e:
+            # Table may not exist yet (first boot before migrations); serve the static data
+            from extensions import db
+            db.session.rollback()
+            logger.warning(f"Building course catalog without uploaded content: {str(e)}")
+            signature, overrides = None, {}
+        catalog = CourseCatalog(self.courses, self.quizzes, overrides, signature)
+        self._catalog = catalog
+        self._checked_at = time.monotonic()
+        self._stale = False
+        logger.info(f"Built course catalog: {len(catalog.courses)} courses, {len(catalog._lessons)} lessons, {len(catalog.quizzes)} quizzes")
+        return catalog
+
+    def mark_stale(self):
+        self._stale = True
+
+    def get(self):
+        """Current catalog, rebuilt first if stale or if another process changed uploads."""
+        catalog = self._catalog
+        if catalog is not None and not self._stale and time.monotonic() - self._checked_at < self.refresh_seconds:
+            return catalog
+        with self._lock:
+            if self._catalog is None or self._stale:
+                return self.rebuild()
+            if time.monotonic() - self._checked_at >= self.refresh_seconds:
+                self._checked_at = time.monotonic()
+                try:
+                    changed = content_signature() != self._catalog.signature
+                except Exception as e:
+                    # Leave the request's session usable, as rebuild() does
+                    from extensions import db
+                    db.session.rollback()
+                    logger.warning(f"Course catalog freshness check failed: {str(e)}")
+                    changed = False
+                if changed:
+                    return self.rebuild()
+            return self._catalog
+
+_stores = []
+_listeners_registered = False
+
+def _track_content_changes(session, flush_context, instances):
+    from models import ContentMetadata
+    if any(isinstance(obj, ContentMetadata) for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+        session.info['course_content_changed'] = True
+
+def _content_committed(session):
+    if session.info.pop('course_content_changed', False):
+        for store in _stores:
+            store.mark_stale()
+
+def _content_rolled_back(session):
+    session.info.pop('course_content_changed', None)
+
+def register_catalog_listeners(store):
+    """Mark store stale after any commit that inserted, updated or deleted ContentMetadata."""
+    global _listeners_registered
+    if store not in _stores:
+        _stores.append(store)
+    if not _listeners_registered:
+        event.listen(Session, 'before_flush', _track_content_changes)
+        event.listen(Session, 'after_commit', _content_committed)
+        event.listen(Session, 'after_rollback', _content_rolled_back)
+        _listeners_registered = True
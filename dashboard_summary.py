@@ -0,0 +1,172 @@
+import json
+import logging
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from extensions import db
+from models import FinancialHealth, Budget, Bill, NetWorth, EmergencyFund, LearningProgress, QuizResult, DashboardSummary
+
+logger = logging.getLogger('ficore_app.dashboard')
+
+# Models whose writes change the general dashboard
+SUMMARY_MODELS = (FinancialHealth, Budget, Bill, NetWorth, EmergencyFund, LearningProgress, QuizResult)
+
+_listeners_registered = False
+
+def owner_key(user_id=None, session_id=None):
+    """Key a summary by user when authenticated, otherwise by session."""
+    return f"user:{user_id}" if user_id is not None else f"session:{session_id}"
+
+def empty_summary():
+    return {
+        'financial_health': {'score': None, 'status': None},
+        'budget': {'surplus_deficit': None, 'savings_goal': None},
+        'bills': {'bills': [], 'total_amount': 0, 'unpaid_amount': 0},
+        'net_worth': {'net_worth': None, 'total_assets': None},
+        'emergency_fund': {'target_amount': None, 'savings_gap': None},
+        'learning_progress': {},
+        'quiz': {'personality': None, 'score': None}
+    }
+
+def build_summary(session, filter_kwargs):
+    """Compute the general dashboard data for one owner from the source tables."""
+    def latest(model):
+        return session.query(model).filter_by(**filter_kwargs).order_by(model.created_at.desc()).first()
+
+    data = empty_summary()
+    fh = latest(FinancialHealth)
+    if fh:
+        data['financial_health'] = {'score': fh.score, 'status': fh.status}
+    budget = latest(Budget)
+    if budget:
+        data['budget'] = {'surplus_deficit': budget.surplus_deficit, 'savings_goal': budget.savings_goal}
+    bills = session.query(Bill).filter_by(**filter_kwargs).all()
+    data['bills'] = {
+        'bills': [bill.to_dict() for bill in bills],
+        'total_amount': sum(bill.amount for bill in bills),
+        'unpaid_amount': sum(bill.amount for bill in bills if bill.status.lower() != 'paid')
+    }
+    nw = latest(NetWorth)
+    if nw:
+        data['net_worth'] = {'net_worth': nw.net_worth, 'total_assets': nw.total_assets}
+    ef = latest(EmergencyFund)
+    if ef:
+        data['emergency_fund'] = {'target_amount': ef.target_amount, 'savings_gap': ef.savings_gap}
+    lp_records = session.query(LearningProgress).filter_by(**filter_kwargs).all()
+    data['learning_progress'] = {lp.course_id: lp.to_dict() for lp in lp_records}
+    quiz = latest(QuizResult)
+    if quiz:
+        data['quiz'] = {'personality': quiz.personality, 'score': quiz.score}
+    return data
+
+# Dialects with INSERT ... ON CONFLICT
+UPSERT_DIALECTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+def _filter_kwargs(key):
+    kind, _, value = key.partition(':')
+    return {'user_id': int(value)} if kind == 'user' else {'session_id': value}
+
+def _store(connection, key, data):
+    """Insert or replace the summary for key in one statement, so concurrent writers don't collide."""
+    table = DashboardSummary.__table__
+    values = {'data': json.dumps(data), 'updated_at': datetime.utcnow()}
+    insert = UPSERT_DIALECTS.get(connection.dialect.name)
+    if insert is not None:
+        stmt = insert(table).values(owner_key=key, **values)
+        connection.execute(stmt.on_conflict_do_update(index_elements=[table.c.owner_key], set_=values))
+        return
+    result = connection.execute(table.update().where(table.c.owner_key == key).values(**values))
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(owner_key=key, **values))
+
+def _store_if_missing(connection, key, data):
+    """Insert the summary for key unless a writer stored one meanwhile (which is fresher)."""
+    table = DashboardSummary.__table__
+    values = {'owner_key': key, 'data': json.dumps(data), 'updated_at': datetime.utcnow()}
+    insert = UPSERT_DIALECTS.get(connection.dialect.name)
+    if insert is not None:
+        connection.execute(insert(table).values(**values).on_conflict_do_nothing(index_elements=[table.c.owner_key]))
+        return
+    try:
+        with connection.begin_nested():
+            connection.execute(table.insert().values(**values))
+    except IntegrityError:
+        pass
+
+def _write_through(session, keys):
+    """
+    Rebuild and store the summaries for keys in session's current transaction.
+
+    Runs in a savepoint so a failure never aborts the caller's write; the summaries are
+    then deleted instead, and rebuilt on the next read.
+    """
+    table = DashboardSummary.__table__
+    connection = session.connection()
+    try:
+        with connection.begin_nested(), session.no_autoflush:
+            for key in sorted(keys):
+                _store(connection, key, build_summary(session, _filter_kwargs(key)))
+    except Exception as e:
+        logger.error(f"Failed to refresh dashboard summaries {sorted(keys)}: {str(e)}")
+        try:
+            with connection.begin_nested():
+                connection.execute(table.delete().where(table.c.owner_key.in_(list(keys))))
+        except Exception as e:
+            logger.error(f"Failed to invalidate dashboard summaries {sorted(keys)}: {str(e)}")
+
+def refresh_summaries(keys):
+    """Rewrite summaries in db.session's transaction (for bulk SQL updates that bypass the ORM)."""
+    keys = set(keys)
+    if keys:
+        _write_through(db.session, keys)
+
+def _affected_keys(session):
+    keys = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, SUMMARY_MODELS):
+            if obj.user_id is not None:
+                keys.add(owner_key(user_id=obj.user_id))
+            if obj.session_id:
+                keys.add(owner_key(session_id=obj.session_id))
+    return keys
+
+def _after_flush(session, flush_context):
+    # Write-through: the summary is rewritten in the same transaction as the change, so it
+    # commits (or rolls back) with it and readers never see a summary older than the data
+    keys = _affected_keys(session)
+    if keys:
+        _write_through(session, keys)
+
+def register_summary_listeners():
+    """Rewrite dashboard summaries on every flush that touches a summary model."""
+    global _listeners_registered
+    if not _listeners_registered:
+        event.listen(Session, 'after_flush', _after_flush)
+        _listeners_registered = True
+
+def get_dashboard_summary(user_id=None, session_id=None):
+    """
+    Return the general dashboard data for an owner with a single keyed read.
+
+    Summaries are written by the writers (see _after_flush); a miss (first visit, or a
+    failed refresh) is built here and inserted on a separate connection, leaving the
+    request's session untouched. The insert never overwrites a row, so a summary a writer
+    stored after this read began always wins over the one built here.
+    """
+    key = owner_key(user_id=user_id, session_id=session_id)
+    summary = db.session.get(DashboardSummary, key)
+    if summary is not None:
+        try:
+            return json.loads(summary.data)
+        except json.JSONDecodeError:
+            logger.error(f"Invalid JSON in dashboard summary {key}, rebuilding")
+    data = build_summary(db.session, _filter_kwargs(key))
+    if summary is None:
+        try:
+            with db.engine.begin() as connection:
+                _store_if_missing(connection, key, data)
+        except Exception as e:
+            logger.warning(f"Failed to store dashboard summary {key}: {str(e)}")
+    return data
@@ -0,0 +1,112 @@
+import logging
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger('ficore_app.database')
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+def sqlite_pragmas():
+    """
+    PRAGMAs applied to every new SQLite connection.
+
+    WAL lets readers run alongside the single writer and turns each commit into an append to
+    the -wal file; synchronous=NORMAL is durable across application crashes in WAL mode (only
+    a power loss can drop the last commits). busy_timeout makes a writer wait for the lock
+    instead of failing with "database is locked".
+
+    Config (environment variables):
+        SQLITE_JOURNAL_MODE: Default WAL.
+        SQLITE_SYNCHRONOUS: Default NORMAL.
+        SQLITE_BUSY_TIMEOUT_MS: Default 5000.
+        SQLITE_MMAP_SIZE: Bytes of the file memory-mapped for reads (default 256 MB).
+        SQLITE_CACHE_SIZE: Page cache; negative values are KiB (default -65536, i.e. 64 MB).
+    """
+    return {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000),
+        'mmap_size': _env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        'cache_size': _env_int('SQLITE_CACHE_SIZE', -65536)
+    }
+
+def postgres_engine_options():
+    """
+    Pool and session settings for Postgres.
+
+    The pool is per process, so the connections a deployment can open are roughly
+    workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW); keep that below the server's max_connections.
+
+    Config (environment variables):
+        DB_POOL_SIZE: Connections kept open per process (default 5).
+        DB_MAX_OVERFLOW: Extra connections opened under load (default 10).
+        DB_POOL_TIMEOUT: Seconds to wait for a free connection (default 30).
+        DB_POOL_RECYCLE: Seconds before a connection is replaced (default 1800).
+        DB_POOL_PRE_PING: Test connections on checkout (default true).
+        DB_STATEMENT_TIMEOUT_MS: Server-side statement_timeout (default 30000; 0 disables).
+        DB_LOCK_TIMEOUT_MS: Server-side lock_timeout (default 10000; 0 disables).
+    """
+    settings = []
+    statement_timeout = _env_int('DB_STATEMENT_TIMEOUT_MS', 30000)
+    lock_timeout = _env_int('DB_LOCK_TIMEOUT_MS', 10000)
+    if statement_timeout:
+        settings.append(f"-c statement_timeout={statement_timeout}")
+    if lock_timeout:
+        settings.append(f"-c lock_timeout={lock_timeout}")
+    options = {
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    }
+    if settings:
+        options['connect_args'] = {'options': ' '.join(settings)}
+    return options
+
+def engine_options(database_uri):
+    """SQLAlchemy create_engine() keyword arguments for database_uri."""
+    backend = make_url(database_uri).get_backend_name()
+    if backend == 'postgresql':
+        return postgres_engine_options()
+    return {}
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+def install_sqlite_pragmas(engine, pragmas=None):
+    """Run sqlite_pragmas() on every connection engine opens."""
+    pragmas = pragmas or sqlite_pragmas()
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, pragmas)
+    return pragmas
+
+def configure_engine(app):
+    """
+    Set SQLALCHEMY_ENGINE_OPTIONS for the configured database.
+
+    Call before db.init_app(app); options already present in the app config win over the
+    environment-derived defaults.
+    """
+    options = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+def init_engine(app, db):
+    """Attach per-connection setup to the app's engine (call after db.init_app(app))."""
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name == 'sqlite':
+            pragmas = install_sqlite_pragmas(engine)
+            logger.info(f"SQLite engine configured: {', '.join(f'{name}={value}' for name, value in pragmas.items())}")
+        else:
+            logger.info(f"{engine.dialect.name} engine configured: pool={type(engine.pool).__name__}, options={app.config['SQLALCHEMY_ENGINE_OPTIONS']}")
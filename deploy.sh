@@ -23,9 +23,13 @@ ls -l "$DB_PATH" || echo "Database file not found"
 # Install dependencies
 pip install -r requirements.txt
 
-# Run Alembic migrations
-echo "Running Alembic migrations..."
-python -m alembic upgrade head
+# Apply migrations and seed courses and the admin user
+echo "Initializing database..."
+python -m flask ficore init
+
+# Fingerprint and precompress static assets
+echo "Building static assets..."
+python -m flask assets build
 
 # Debug: Verify database schema
 echo "Verifying database schema:"
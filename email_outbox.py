@@ -0,0 +1,447 @@
+import atexit
+import json
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import session, has_request_context
+from sqlalchemy import select as db_select
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger('ficore_app.email')
+
+WORKER_MODES = ('thread', 'external')
+
+# Compare-and-set attempts per acquire before giving up for this round
+RATE_LIMIT_RETRIES = 5
+
+class RateLimiter:
+    """
+    Token bucket allowing `per_minute` sends per minute with bursts up to the same size.
+
+    The bucket lives in the email_rate_limits row for the provider, so every process that
+    drains the outbox (a worker thread per gunicorn worker, `flask email-worker`) draws from
+    the same budget. Each change is a compare-and-set UPDATE on the row's version in its
+    own short transaction; a lost race simply re-reads and retries.
+    """
+
+    def __init__(self, provider, per_minute):
+        self.provider = provider
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+
+    def _tokens(self, row, now):
+        elapsed = max(0.0, (now - row.refilled_at).total_seconds())
+        return min(self.capacity, row.tokens + elapsed * self.rate)
+
+    def _row(self, connection, now):
+        from models import EmailRateLimit
+        table = EmailRateLimit.__table__
+        row = connection.execute(db_select(table).where(table.c.provider == self.provider)).first()
+        if row is None:
+            try:
+                with connection.begin_nested():
+                    connection.execute(table.insert().values(provider=self.provider, tokens=self.capacity, refilled_at=now, version=0))
+            except IntegrityError:
+                pass  # Created by another process
+            row = connection.execute(db_select(table).where(table.c.provider == self.provider)).first()
+        return row
+
+    def acquire(self, count=1):
+        """
+        Take up to count tokens.
+
+        Returns:
+            The number of tokens granted (0 when the bucket is empty).
+        """
+        from extensions import db
+        from models import EmailRateLimit
+        table = EmailRateLimit.__table__
+        for _ in range(RATE_LIMIT_RETRIES):
+            now = datetime.utcnow()
+            with db.engine.begin() as connection:
+                row = self._row(connection, now)
+                tokens = self._tokens(row, now)
+                granted = min(count, int(tokens))
+                if granted == 0:
+                    return 0
+                result = connection.execute(
+                    table.update()
+                    .where(table.c.provider == self.provider, table.c.version == row.version)
+                    .values(tokens=tokens - granted, refilled_at=now, version=row.version + 1)
+                )
+                if result.rowcount == 1:
+                    return granted
+        return 0
+
+    def wait_time(self):
+        """Seconds until the next token is available."""
+        from extensions import db
+        now = datetime.utcnow()
+        with db.engine.begin() as connection:
+            tokens = self._tokens(self._row(connection, now), now)
+        return max(0.0, (1 - tokens) / self.rate)
+
+def parse_rate_limits(value):
+    """Parse 'provider:per_minute,...' into a dict; 0 or a missing provider means unlimited."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        provider, _, per_minute = item.partition(':')
+        try:
+            limits[provider.strip()] = int(per_minute)
+        except ValueError:
+            logger.warning(f"Ignoring invalid email rate limit '{item}'")
+    return limits
+
+class EmailOutbox:
+    """
+    Persistent outbound email queue.
+
+    Request handlers insert a row into email_outbox and return; a worker claims due rows,
+    renders and delivers them through the configured providers in priority order, and
+    reschedules failures with exponential backoff until EMAIL_MAX_ATTEMPTS is reached.
+    Claims are conditional UPDATEs, so several workers (one per gunicorn process, or a
+    separate `flask email-worker` process) can drain the same table.
+
+    Config:
+        EMAIL_OUTBOX_ENABLED: Queue emails (False sends synchronously in the request).
+        EMAIL_WORKER_MODE: 'thread' runs a worker thread in each app process, 'external'
+            leaves delivery to `flask email-worker`.
+        EMAIL_WORKER_POLL_SECONDS: Idle delay between polls of the outbox.
+        EMAIL_BATCH_SIZE: Maximum rows claimed per poll.
+        EMAIL_MAX_ATTEMPTS: Attempts before a message is marked failed.
+        EMAIL_RETRY_BASE_SECONDS / EMAIL_RETRY_MAX_SECONDS: Backoff bounds.
+        EMAIL_SENDING_TIMEOUT_SECONDS: Age after which a 'sending' claim is considered abandoned.
+        EMAIL_PROVIDERS: Comma-separated provider priority (mailersend, gmail, smtp).
+        EMAIL_RATE_LIMITS: Per-provider sends per minute, e.g. 'mailersend:60,gmail:20',
+            shared by all workers (see RateLimiter).
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._limiters = {}
+        self.stats = {'queued': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'deferred': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('EMAIL_OUTBOX_ENABLED', os.environ.get('EMAIL_OUTBOX_ENABLED', 'true').lower() == 'true')
+        app.config.setdefault('EMAIL_WORKER_MODE', os.environ.get('EMAIL_WORKER_MODE', 'thread'))
+        app.config.setdefault('EMAIL_WORKER_POLL_SECONDS', float(os.environ.get('EMAIL_WORKER_POLL_SECONDS', 5)))
+        app.config.setdefault('EMAIL_BATCH_SIZE', int(os.environ.get('EMAIL_BATCH_SIZE', 20)))
+        app.config.setdefault('EMAIL_MAX_ATTEMPTS', int(os.environ.get('EMAIL_MAX_ATTEMPTS', 6)))
+        app.config.setdefault('EMAIL_RETRY_BASE_SECONDS', int(os.environ.get('EMAIL_RETRY_BASE_SECONDS', 30)))
+        app.config.setdefault('EMAIL_RETRY_MAX_SECONDS', int(os.environ.get('EMAIL_RETRY_MAX_SECONDS', 3600)))
+        app.config.setdefault('EMAIL_SENDING_TIMEOUT_SECONDS', int(os.environ.get('EMAIL_SENDING_TIMEOUT_SECONDS', 300)))
+        app.config.setdefault('EMAIL_PROVIDERS', os.environ.get('EMAIL_PROVIDERS', 'mailersend,gmail,smtp'))
+        app.config.setdefault('EMAIL_RATE_LIMITS', os.environ.get('EMAIL_RATE_LIMITS', 'mailersend:60,gmail:20'))
+        if app.config['EMAIL_WORKER_MODE'] not in WORKER_MODES:
+            logger.warning(f"Invalid EMAIL_WORKER_MODE '{app.config['EMAIL_WORKER_MODE']}', falling back to 'thread'")
+            app.config['EMAIL_WORKER_MODE'] = 'thread'
+
+        self.app = app
+        self.enabled = app.config['EMAIL_OUTBOX_ENABLED']
+        self.worker_mode = app.config['EMAIL_WORKER_MODE']
+        self.poll_interval = app.config['EMAIL_WORKER_POLL_SECONDS']
+        self.batch_size = app.config['EMAIL_BATCH_SIZE']
+        self.max_attempts = app.config['EMAIL_MAX_ATTEMPTS']
+        self.retry_base = app.config['EMAIL_RETRY_BASE_SECONDS']
+        self.retry_max = app.config['EMAIL_RETRY_MAX_SECONDS']
+        self.sending_timeout = timedelta(seconds=app.config['EMAIL_SENDING_TIMEOUT_SECONDS'])
+        self.providers = [p.strip() for p in app.config['EMAIL_PROVIDERS'].split(',') if p.strip()]
+        self._limiters = {
+            provider: RateLimiter(provider, per_minute)
+            for provider, per_minute in parse_rate_limits(app.config['EMAIL_RATE_LIMITS']).items()
+            if per_minute > 0
+        }
+        app.extensions['email_outbox'] = self
+        atexit.register(self.shutdown)
+        logger.info(f"Email outbox configured: enabled={self.enabled}, mode={self.worker_mode}, providers={self.providers}, rate_limits={ {p: l.capacity for p, l in self._limiters.items()} }")
+
+    def start(self):
+        """Start the in-process worker thread (thread mode only); call once the schema exists."""
+        self._ensure_started()
+
+    def _ensure_started(self):
+        """Start the worker thread lazily, restarting it in forked worker processes."""
+        if not self.enabled or self.worker_mode != 'thread':
+            return
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='email-outbox-worker', daemon=True)
+            self._thread.start()
+
+    def enqueue(self, to_email, subject, template_key, data=None, lang='en'):
+        """
+        Add an email to the caller's transaction and wake the worker.
+
+        The row is flushed inside a savepoint but not committed: it is stored together with
+        the caller's own changes when the caller commits, and a failure here leaves those
+        changes untouched.
+
+        Returns:
+            The id of the email_outbox row.
+
+        Raises:
+            ValueError: If template_key is not in EMAIL_CONFIG or data is not a dict.
+        """
+        from extensions import db
+        from models import OutboundEmail
+        from mailersend_email import EMAIL_CONFIG
+        if template_key not in EMAIL_CONFIG:
+            raise ValueError(f"Template key '{template_key}' not found in EMAIL_CONFIG. Valid keys: {list(EMAIL_CONFIG.keys())}")
+        if data is not None and not isinstance(data, dict):
+            raise ValueError(f"Data must be a dictionary, got {type(data)}")
+        now = datetime.utcnow()
+        message = OutboundEmail(
+            to_email=to_email,
+            subject=subject,
+            template_key=template_key,
+            data=json.dumps(data or {}, default=str),
+            lang=lang if lang in ('en', 'ha') else 'en',
+            status='pending',
+            attempts=0,
+            next_attempt_at=now,
+            session_id=session.get('sid') if has_request_context() else None,
+            created_at=now,
+            updated_at=now
+        )
+        with db.session.begin_nested():
+            db.session.add(message)
+        self.stats['queued'] += 1
+        logger.info(f"Queued {template_key} email {message.id} to {to_email}")
+        self._ensure_started()
+        self._wake.set()
+        return message.id
+
+    def enqueue_many(self, messages):
+        """
+        Store a batch of emails with one multi-row INSERT and wake the worker.
+
+        The insert runs in its own transaction on a separate connection, so it can be called
+        while db.session is still streaming rows (e.g. from a yield_per query).
+
+        Args:
+            messages: Dicts with to_email, subject, template_key and optional data and lang,
+                as accepted by send_many.
+
+        Returns:
+            The number of rows queued.
+
+        Raises:
+            ValueError: If a template_key is not in EMAIL_CONFIG or data is not a dict.
+        """
+        from extensions import db
+        from models import OutboundEmail
+        from mailersend_email import EMAIL_CONFIG
+        if not messages:
+            return 0
+        now = datetime.utcnow()
+        rows = []
+        for message in messages:
+            if message['template_key'] not in EMAIL_CONFIG:
+                raise ValueError(f"Template key '{message['template_key']}' not found in EMAIL_CONFIG. Valid keys: {list(EMAIL_CONFIG.keys())}")
+            data = message.get('data')
+            if data is not None and not isinstance(data, dict):
+                raise ValueError(f"Data must be a dictionary, got {type(data)}")
+            rows.append({
+                'to_email': message['to_email'],
+                'subject': message['subject'],
+                'template_key': message['template_key'],
+                'data': json.dumps(data or {}, default=str),
+                'lang': message.get('lang') if message.get('lang') in ('en', 'ha') else 'en',
+                'status': 'pending',
+                'attempts': 0,
+                'next_attempt_at': now,
+                'session_id': None,
+                'created_at': now,
+                'updated_at': now
+            })
+        with db.engine.begin() as connection:
+            connection.execute(OutboundEmail.__table__.insert(), rows)
+        self.stats['queued'] += len(rows)
+        logger.info(f"Queued {len(rows)} emails")
+        self._ensure_started()
+        self._wake.set()
+        return len(rows)
+
+    def serve(self):
+        """Run the worker loop in the foreground (used by `flask email-worker`)."""
+        self.shutdown()
+        self._stop.clear()
+        self._run()
+
+    def _run(self):
+        """Worker loop: drain due messages, then sleep until woken or the poll interval elapses."""
+        logger.info(f"Email outbox worker started in process {os.getpid()}")
+        while not self._stop.is_set():
+            processed = 0
+            try:
+                with self.app.app_context():
+                    processed = self.process_due()
+            except Exception as e:
+                logger.error(f"Email outbox worker iteration failed: {str(e)}")
+            if processed < self.batch_size:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def process_due(self, now=None):
+        """
+        Claim and deliver up to EMAIL_BATCH_SIZE due messages. Must run in an app context.
+
+        Returns:
+            The number of messages claimed.
+        """
+        from extensions import db
+        from models import OutboundEmail
+        table = OutboundEmail.__table__
+        now = now or datetime.utcnow()
+        try:
+            released = db.session.execute(
+                table.update()
+                .where(table.c.status == 'sending', table.c.updated_at < now - self.sending_timeout)
+                .values(status='pending', updated_at=now)
+            ).rowcount
+            if released:
+                logger.warning(f"Released {released} abandoned email claims")
+            due_ids = db.session.execute(
+                db.select(table.c.id)
+                .where(table.c.status == 'pending', table.c.next_attempt_at <= now)
+                .order_by(table.c.next_attempt_at)
+                .limit(self.batch_size)
+            ).scalars().all()
+            db.session.commit()
+
+            claimed_ids = []
+            for message_id in due_ids:
+                result = db.session.execute(
+                    table.update()
+                    .where(table.c.id == message_id, table.c.status == 'pending')
+                    .values(status='sending', updated_at=datetime.utcnow())
+                )
+                db.session.commit()
+                if result.rowcount == 1:
+                    claimed_ids.append(message_id)  # Otherwise claimed by another worker
+            if claimed_ids:
+                messages = OutboundEmail.query.filter(OutboundEmail.id.in_(claimed_ids)).order_by(OutboundEmail.next_attempt_at).all()
+                self._process_batch(messages)
+                db.session.commit()
+            return len(claimed_ids)
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            db.session.remove()
+
+    def _backoff(self, attempts):
+        delay = min(self.retry_max, self.retry_base * 2 ** (attempts - 1))
+        return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+    def _process_batch(self, messages):
+        """
+        Deliver claimed messages with one deliver_many call per provider.
+
+        Providers are tried in priority order for the messages still unsent. Each provider
+        takes as many messages as its rate limit grants; the rest move on to the next
+        provider. Messages only held back by rate limits are deferred without spending an
+        attempt, the others are retried with backoff or marked failed.
+        """
+        from mailersend_email import enabled_providers, render_email, deliver_many
+        now = datetime.utcnow()
+        providers = enabled_providers(self.providers)
+        errors = {message.id: [] for message in messages}
+        rate_limited = {message.id: [] for message in messages}
+        payloads = {}
+        for message in messages:
+            try:
+                payloads[message.id] = json.loads(message.data or '{}')
+            except json.JSONDecodeError as e:
+                errors[message.id].append(f"invalid payload: {str(e)}")
+        pending = [message for message in messages if message.id in payloads]
+        if pending and not providers:
+            for message in pending:
+                errors[message.id].append("no email providers configured")
+
+        sent = set()
+        for provider in providers:
+            if not pending:
+                break
+            limiter = self._limiters.get(provider)
+            allowed = pending if limiter is None else pending[:limiter.acquire(len(pending))]
+            for message in pending[len(allowed):]:
+                rate_limited[message.id].append(provider)
+            rendered, batch = [], []
+            for message in allowed:
+                try:
+                    html_content = render_email(self.app, message.template_key, provider, payloads[message.id], message.lang)
+                except Exception as e:
+                    errors[message.id].append(f"{provider}: {str(e)}")
+                    logger.warning(f"Email {message.id} to {message.to_email} could not be rendered for {provider}: {str(e)}")
+                    continue
+                rendered.append({'to_email': message.to_email, 'subject': message.subject, 'html': html_content})
+                batch.append(message)
+            results = deliver_many(provider, rendered) if rendered else []
+            for message, error in zip(batch, results):
+                if error is not None:
+                    errors[message.id].append(f"{provider}: {str(error)}")
+                    logger.warning(f"Email {message.id} to {message.to_email} failed via {provider}: {str(error)}")
+                    continue
+                message.status = 'sent'
+                message.provider = provider
+                message.attempts += 1
+                message.sent_at = message.updated_at = datetime.utcnow()
+                message.last_error = None
+                sent.add(message.id)
+                self.stats['sent'] += 1
+                logger.info(f"Email {message.id} ({message.template_key}) sent to {message.to_email} via {provider}")
+            pending = [message for message in pending if message.id not in sent]
+
+        waits = {}
+        for message in messages:
+            if message.id in sent:
+                continue
+            message.updated_at = now
+            if rate_limited[message.id] and not errors[message.id]:
+                # Every usable provider is at its rate limit: defer without spending an attempt
+                for p in rate_limited[message.id]:
+                    if p not in waits:
+                        waits[p] = self._limiters[p].wait_time()
+                wait = min(waits[p] for p in rate_limited[message.id])
+                message.status = 'pending'
+                message.next_attempt_at = now + timedelta(seconds=max(wait, 1.0))
+                self.stats['deferred'] += 1
+                continue
+
+            message.attempts += 1
+            message.last_error = '; '.join(errors[message.id] + [f"{p}: rate limited" for p in rate_limited[message.id]])[:2000]
+            if message.attempts >= self.max_attempts:
+                message.status = 'failed'
+                self.stats['failed'] += 1
+                logger.error(f"Email {message.id} to {message.to_email} failed permanently after {message.attempts} attempts: {message.last_error}")
+            else:
+                message.status = 'pending'
+                message.next_attempt_at = now + self._backoff(message.attempts)
+                self.stats['retried'] += 1
+                logger.warning(f"Email {message.id} to {message.to_email} will be retried at {message.next_attempt_at} (attempt {message.attempts}/{self.max_attempts})")
+
+    def shutdown(self, timeout=5.0):
+        """Stop the worker thread; undelivered messages stay in the outbox."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=timeout)
+        logger.info(f"Email outbox worker shut down: {self.stats}")
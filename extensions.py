@@ -3,10 +3,20 @@ from flask_session import Session
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
 from datetime import datetime  # Ensure datetime is imported
+from usage_buffer import ToolUsageBuffer
+from email_outbox import EmailOutbox
+from static_assets import StaticAssets
+from user_cache import UserCache
+from request_profiler import RequestProfiler
 
 db = SQLAlchemy()
 login_manager = LoginManager()
 session = Session()
 csrf = CSRFProtect()
+tool_usage_buffer = ToolUsageBuffer()
+email_outbox = EmailOutbox()
+static_assets = StaticAssets()
+user_cache = UserCache()
+request_profiler = RequestProfiler()
 
 
@@ -0,0 +1,6 @@
+# Loaded automatically by gunicorn from the working directory
+
+def post_worker_init(worker):
+    """Start the email outbox thread and scheduler election as soon as a worker is ready."""
+    from app import app, start_background_services
+    start_background_services(app)
@@ -0,0 +1,56 @@
+import hashlib
+import math
+
+# 2**10 one-byte registers: 1 KB per sketch, about 3% standard error
+PRECISION = 10
+REGISTERS = 1 << PRECISION
+HASH_BITS = 64
+
+class HyperLogLog:
+    """
+    Mergeable distinct-count sketch.
+
+    add() is idempotent, so the same value can be fed again (e.g. when a window is
+    reprocessed) without inflating the count, and merge() gives the sketch of the union.
+    Stored as REGISTERS raw bytes (see to_bytes / from_bytes).
+    """
+
+    def __init__(self, registers=None):
+        self.registers = bytearray(registers) if registers else bytearray(REGISTERS)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data is not None and len(data) != REGISTERS:
+            raise ValueError(f"Expected {REGISTERS} register bytes, got {len(data)}")
+        return cls(data)
+
+    def to_bytes(self):
+        return bytes(self.registers)
+
+    def add(self, value):
+        hashed = int.from_bytes(hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest(), 'big')
+        index = hashed >> (HASH_BITS - PRECISION)
+        remainder = hashed & ((1 << (HASH_BITS - PRECISION)) - 1)
+        rank = (HASH_BITS - PRECISION) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """Fold other into this sketch (union) and return self."""
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / REGISTERS)
+        estimate = alpha * REGISTERS * REGISTERS / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * REGISTERS and zeros:
+            # Small-range correction (linear counting)
+            estimate = REGISTERS * math.log(REGISTERS / zeros)
+        return int(round(estimate))
+
+def union(sketches):
+    merged = HyperLogLog()
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
@@ -0,0 +1,77 @@
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import select, func
+from extensions import db
+from models import FinancialHealth, Budget, Bill, NetWorth, EmergencyFund, LearningProgress, QuizResult, ToolUsage
+
+logger = logging.getLogger('ficore_app.index_advisor')
+
+# Models the dashboards read newest-first for one owner
+OWNER_HISTORY_MODELS = (FinancialHealth, Budget, NetWorth, EmergencyFund, QuizResult)
+
+def query_shapes():
+    """
+    The app's hot query shapes as (name, statement) pairs.
+
+    Literal values are placeholders; only the plan matters. Keep this list in step with the
+    queries in the blueprints, dashboard_summary and score_index when they change.
+    """
+    since = datetime.utcnow() - timedelta(days=30)
+    until = datetime.utcnow()
+    shapes = []
+    for model in OWNER_HISTORY_MODELS:
+        table = model.__tablename__
+        shapes.append((f"{table}: latest by user", select(model).where(model.user_id == 1).order_by(model.created_at.desc()).limit(1)))
+        shapes.append((f"{table}: history by session", select(model).where(model.session_id == 'session').order_by(model.created_at.desc())))
+    shapes.append(("financial_health: step-3 history by user", select(FinancialHealth).where(
+        FinancialHealth.step == 3, FinancialHealth.user_id == 1).order_by(FinancialHealth.created_at.desc())))
+    shapes.append(("financial_health: score histogram", select(func.round(FinancialHealth.score), func.count()).where(
+        FinancialHealth.step == 3, FinancialHealth.score.isnot(None)).group_by(func.round(FinancialHealth.score))))
+    for model in (Bill, LearningProgress):
+        shapes.append((f"{model.__tablename__}: by user", select(model).where(model.user_id == 1)))
+        shapes.append((f"{model.__tablename__}: by session", select(model).where(model.session_id == 'session')))
+    shapes.append(("tool_usage: admin date range", select(ToolUsage).where(
+        ToolUsage.created_at >= since, ToolUsage.created_at < until).order_by(ToolUsage.created_at.desc()).limit(100)))
+    shapes.append(("tool_usage: admin date range by tool and action", select(ToolUsage).where(
+        ToolUsage.created_at >= since, ToolUsage.created_at < until,
+        ToolUsage.tool_name == 'budget', ToolUsage.action == 'submit').order_by(ToolUsage.created_at.desc()).limit(100)))
+    shapes.append(("tool_usage: export range", select(ToolUsage.id, ToolUsage.tool_name, ToolUsage.action, ToolUsage.created_at).where(
+        ToolUsage.created_at >= since, ToolUsage.created_at < until).order_by(ToolUsage.created_at)))
+    return shapes
+
+def _explain(connection, statement):
+    """Plan lines for statement and which of them are full table scans or explicit sorts."""
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+    if connection.dialect.name == 'sqlite':
+        lines = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+        full_scans = [line for line in lines if line.startswith('SCAN ') and ' INDEX ' not in line]
+        sorts = [line for line in lines if 'TEMP B-TREE' in line]
+    else:
+        lines = [row[0] for row in connection.exec_driver_sql(f"EXPLAIN {sql}")]
+        full_scans = [line.strip() for line in lines if 'Seq Scan' in line]
+        sorts = [line.strip() for line in lines if line.strip().lstrip('-> ').startswith('Sort  (')]
+    return lines, full_scans, sorts
+
+def advise_indexes():
+    """
+    EXPLAIN every shape from query_shapes() against the configured database.
+
+    Postgres plans depend on table statistics: on small or un-ANALYZEd tables a sequential
+    scan can be the cheapest plan even when a matching index exists, so run this against a
+    database with realistic data.
+
+    Returns:
+        A list of dicts with name, plan (lines), full_scans and sorts.
+    """
+    report = []
+    with db.engine.connect() as connection:
+        for name, statement in query_shapes():
+            try:
+                plan, full_scans, sorts = _explain(connection, statement)
+            except Exception as e:
+                logger.error(f"EXPLAIN failed for query shape '{name}': {str(e)}")
+                connection.rollback()
+                report.append({'name': name, 'plan': [], 'full_scans': [], 'sorts': [], 'error': str(e)})
+                continue
+            report.append({'name': name, 'plan': plan, 'full_scans': full_scans, 'sorts': sorts})
+    return report
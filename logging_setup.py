@@ -0,0 +1,214 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import traceback
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+from flask import has_request_context, g
+
+# Attributes every LogRecord has; anything else was passed through extra= and is emitted
+# as a structured field by JsonFormatter
+RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'session_id'}
+ROTATION_MODES = ('external', 'size')
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s [session: %(session_id)s]'
+
+class SessionFormatter(logging.Formatter):
+    def format(self, record):
+        record.session_id = getattr(record, 'session_id', 'no-session-id')
+        return super().format(record)
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, session_id and extra fields."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'session_id': getattr(record, 'session_id', None),
+            'process': record.process,
+            'thread': record.threadName
+        }
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = ''.join(traceback.format_exception(*record.exc_info))
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class RequestSampler(logging.Filter):
+    """
+    Keep INFO and lower records for a sample of requests only.
+
+    The keep/drop decision is taken once per request (g.log_sampled, set by
+    start_request_sampling) so a sampled request keeps all of its lines. WARNING and above,
+    and records logged outside a request, always pass.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if self.rate >= 1 or record.levelno > logging.INFO or not has_request_context():
+            return True
+        return g.get('log_sampled', True)
+
+class RequestQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: records are dropped (and counted) when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        record.session_id = getattr(record, 'session_id', 'no-session-id')
+        if record.exc_info:
+            # Tracebacks can't cross the queue as objects; render them on the caller's thread
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+def parse_log_levels(value):
+    """Parse LOG_LEVELS ('ficore_app.analytics=WARNING,sqlalchemy.engine=WARNING') into a dict."""
+    levels = {}
+    for item in (value or '').split(','):
+        if '=' not in item:
+            continue
+        name, level = item.split('=', 1)
+        level = level.strip().upper()
+        if not isinstance(logging.getLevelName(level), int):
+            raise ValueError(f"Invalid log level '{level}' for logger '{name.strip()}'")
+        levels[name.strip()] = level
+    return levels
+
+def start_request_sampling(app):
+    """Decide whether the current request's INFO lines are kept."""
+    rate = app.config['LOG_SAMPLE_RATE']
+    g.log_sampled = rate >= 1 or random.random() < rate
+
+def _build_handlers(app, log_path):
+    formatter = JsonFormatter() if app.config['LOG_FORMAT'] == 'json' else SessionFormatter(TEXT_FORMAT)
+    handlers = []
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(formatter)
+    handlers.append(stream_handler)
+    try:
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        if app.config['LOG_ROTATION'] == 'size':
+            # Each process rotates only its own file; renaming a shared file under other
+            # workers loses lines or keeps them writing to the rotated-away file
+            root, ext = os.path.splitext(log_path)
+            file_handler = RotatingFileHandler(
+                f"{root}.{os.getpid()}{ext}",
+                maxBytes=app.config['LOG_MAX_BYTES'],
+                backupCount=app.config['LOG_BACKUP_COUNT'],
+                encoding='utf-8',
+                delay=True
+            )
+        else:
+            # Appends from several workers are safe; reopens the file after logrotate moves it
+            file_handler = WatchedFileHandler(log_path, encoding='utf-8', delay=True)
+        app.config['LOG_FILE'] = file_handler.baseFilename
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+    except (PermissionError, OSError) as e:
+        sys.stderr.write(f"Failed to set up file logging at {log_path}: {str(e)}\n")
+    return handlers
+
+def configure_logging(app, log_path):
+    """
+    Route the 'ficore_app' loggers through a QueueHandler to a background QueueListener.
+
+    Request threads only filter and enqueue records; formatting and writing to stderr and
+    the log file happen on the listener thread.
+
+    Every gunicorn worker has its own listener, so the file handler must be safe with
+    several processes writing at once. By default all workers append to log_path through a
+    WatchedFileHandler and rotation is left to logrotate (use its default create mode, not
+    copytruncate), e.g.:
+
+        /path/to/data/storage.log {
+            daily
+            rotate 7
+            compress
+            delaycompress
+            missingok
+        }
+
+    Where logrotate is not available, LOG_ROTATION=size gives each process its own
+    size-rotated file, storage.<pid>.log.
+
+    Config (environment variables of the same name):
+        LOG_LEVEL: Level of the 'ficore_app' logger (default INFO).
+        LOG_LEVELS: Per-logger overrides, e.g. 'ficore_app.analytics=WARNING,sqlalchemy.engine=WARNING'.
+        LOG_FORMAT: 'text' (default) or 'json'.
+        LOG_SAMPLE_RATE: Fraction of requests whose INFO lines are kept (default 1.0).
+        LOG_ROTATION: 'external' (default, logrotate) or 'size' (per-process files).
+        LOG_MAX_BYTES / LOG_BACKUP_COUNT: Size rotation of each per-process file (default 10 MB x 5).
+        LOG_QUEUE_SIZE: Queued records before new ones are dropped (default 10000).
+
+    Returns:
+        The running QueueListener.
+    """
+    app.config.setdefault('LOG_LEVEL', os.environ.get('LOG_LEVEL', 'INFO').upper())
+    app.config.setdefault('LOG_LEVELS', parse_log_levels(os.environ.get('LOG_LEVELS')))
+    app.config.setdefault('LOG_FORMAT', os.environ.get('LOG_FORMAT', 'text').lower())
+    app.config.setdefault('LOG_SAMPLE_RATE', float(os.environ.get('LOG_SAMPLE_RATE', 1.0)))
+    app.config.setdefault('LOG_ROTATION', os.environ.get('LOG_ROTATION', 'external').lower())
+    if app.config['LOG_ROTATION'] not in ROTATION_MODES:
+        sys.stderr.write(f"Invalid LOG_ROTATION '{app.config['LOG_ROTATION']}', falling back to 'external'\n")
+        app.config['LOG_ROTATION'] = 'external'
+    app.config.setdefault('LOG_MAX_BYTES', int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024)))
+    app.config.setdefault('LOG_BACKUP_COUNT', int(os.environ.get('LOG_BACKUP_COUNT', 5)))
+    app.config.setdefault('LOG_QUEUE_SIZE', int(os.environ.get('LOG_QUEUE_SIZE', 10000)))
+
+    root_logger = logging.getLogger('ficore_app')
+    root_logger.setLevel(app.config['LOG_LEVEL'])
+    for name, level in app.config['LOG_LEVELS'].items():
+        logging.getLogger(name).setLevel(level)
+
+    previous = app.extensions.get('log_listener')
+    if previous is not None:
+        previous.stop()
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, RequestQueueHandler):
+            root_logger.removeHandler(handler)
+
+    log_queue = queue.Queue(maxsize=app.config['LOG_QUEUE_SIZE'])
+    queue_handler = RequestQueueHandler(log_queue)
+    queue_handler.addFilter(RequestSampler(app.config['LOG_SAMPLE_RATE']))
+    root_logger.addHandler(queue_handler)
+    handlers = _build_handlers(app, log_path)
+    listener = QueueListener(log_queue, *handlers)
+    listener.start()
+    app.extensions['log_listener'] = listener
+    atexit.register(_stop_listener, app)
+
+    # A forked worker (gunicorn --preload) inherits the queue but not the listener thread
+    def restart_in_child():
+        app.extensions['log_listener'] = QueueListener(log_queue, *_build_handlers(app, log_path))
+        app.extensions['log_listener'].start()
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=restart_in_child)
+    return listener
+
+def _stop_listener(app):
+    listener = app.extensions.get('log_listener')
+    if listener is not None and listener._thread is not None:
+        listener.stop()
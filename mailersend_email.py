@@ -1,15 +1,20 @@
+import atexit
 import logging
 import os
 import smtplib
+import threading
+import time
 import requests
+import requests.adapters
 from email.mime.text import MIMEText
-from flask import Flask, session, has_request_context, render_template, current_app, g
-from typing import Dict, Optional
-from translations import trans
+from flask import Flask, session, has_request_context, render_template
+from typing import Dict, List, Optional
+from translations import trans, Translator
 
 # Email configuration dictionary with provider-specific templates
 EMAIL_CONFIG = {
     "financial_health": {
+        "folder": "HEALTHSCORE",
         "subject_key": "financial_health_financial_health_report",
         "template": {
             "mailersend": "health_score_email.html",
@@ -17,6 +22,7 @@ EMAIL_CONFIG = {
         }
     },
     "budget": {
+        "folder": "BUDGET",
         "subject_key": "budget_plan_summary",
         "template": {
             "mailersend": "budget_email.html",
@@ -24,6 +30,7 @@ EMAIL_CONFIG = {
         }
     },
     "quiz": {
+        "folder": "QUIZ",
         "subject_key": "quiz_results_summary",
         "template": {
             "mailersend": "quiz_email.html",
@@ -31,6 +38,7 @@ EMAIL_CONFIG = {
         }
     },
     "bill_reminder": {
+        "folder": "BILL",
         "subject_key": "bill_payment_reminder",
         "template": {
             "mailersend": "bill_reminder.html",
@@ -38,6 +46,7 @@ EMAIL_CONFIG = {
         }
     },
     "net_worth": {
+        "folder": "NETWORTH",
         "subject_key": "net_worth_net_worth_summary",
         "template": {
             "mailersend": "net_worth_email.html",
@@ -45,6 +54,7 @@ EMAIL_CONFIG = {
         }
     },
     "emergency_fund": {
+        "folder": "EMERGENCYFUND",
         "subject_key": "emergency_fund_email_subject",
         "template": {
             "mailersend": "emergency_fund_email.html",
@@ -52,6 +62,7 @@ EMAIL_CONFIG = {
         }
     },
     "learning_hub_lesson_completed": {
+        "folder": "LEARNINGHUB",
         "subject_key": "learning_hub_lesson_completed_subject",
         "template": {
             "mailersend": "learning_hub_lesson_completed.html",
@@ -60,6 +71,264 @@ EMAIL_CONFIG = {
     }
 }
 
+
+# Provider priority; a provider is only used when its credentials are configured
+PROVIDERS = ('mailersend', 'gmail', 'smtp')
+
+def provider_enabled(provider: str) -> bool:
+    """Return True if the credentials for provider are present in the environment."""
+    if provider == 'mailersend':
+        return bool(os.environ.get('MAILERSEND_API_TOKEN') and os.environ.get('MAILERSEND_FROM_EMAIL'))
+    if provider == 'gmail':
+        return bool(os.environ.get('GMAIL_SMTP_USER') and os.environ.get('GMAIL_SMTP_PASSWORD'))
+    if provider == 'smtp':
+        return bool(os.environ.get('SMTP_HOST'))
+    return False
+
+def enabled_providers(order: Optional[List[str]] = None) -> List[str]:
+    return [provider for provider in (order or PROVIDERS) if provider_enabled(provider)]
+
+def email_template_name(template_key: str, provider: str) -> str:
+    """Resolve the template path for template_key and provider, falling back to the MailerSend template."""
+    config = EMAIL_CONFIG.get(template_key)
+    if not config:
+        raise ValueError(f"Template key '{template_key}' not found in EMAIL_CONFIG. Valid keys: {list(EMAIL_CONFIG.keys())}")
+    template_name = config["template"].get(provider, config["template"].get('mailersend'))
+    if not template_name.endswith('.html'):
+        template_name += '.html'
+    return f"{config['folder']}/{template_name}" if config.get('folder') else template_name
+
+def render_email(app: Flask, template_key: str, provider: str, data: Dict, lang: str) -> str:
+    """
+    Render the email body for provider.
+
+    Works with or without a request: rendering happens in a request context built from
+    BASE_URL (so url_for produces external links) and the template receives a translator
+    and session language bound to lang rather than to the current visitor.
+    """
+    template_name = email_template_name(template_key, provider)
+    data = dict(data or {})
+    data.pop('lang', None)
+    with app.app_context(), app.test_request_context(base_url=app.config.get('BASE_URL')):
+        return render_template(
+            template_name,
+            data=data,
+            **data,
+            lang=lang,
+            trans=Translator(lang),
+            session={'lang': lang}
+        )
+
+MAILERSEND_API_URL = "https://api.mailersend.com/v1"
+# MailerSend accepts at most 500 messages per bulk request
+MAILERSEND_BULK_LIMIT = 500
+SMTP_POOL_SIZE = int(os.environ.get('SMTP_POOL_SIZE', 2))
+# Idle pooled SMTP connections are re-checked with NOOP after this many seconds
+SMTP_IDLE_CHECK_SECONDS = 30
+
+_http_session = None
+_http_lock = threading.Lock()
+
+def http_session() -> requests.Session:
+    """Shared keep-alive session for MailerSend API calls."""
+    global _http_session
+    if _http_session is None:
+        with _http_lock:
+            if _http_session is None:
+                session_ = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=int(os.environ.get('MAILERSEND_POOL_SIZE', 4)))
+                session_.mount('https://', adapter)
+                session_.headers.update({"Content-Type": "application/json"})
+                _http_session = session_
+    return _http_session
+
+class SMTPConnectionPool:
+    """
+    Pool of authenticated SMTP connections for one provider.
+
+    Connections are reused across messages and only re-checked with NOOP after being idle;
+    a connection that fails mid-send is discarded instead of being returned to the pool.
+    """
+
+    def __init__(self, provider: str, max_idle: int = SMTP_POOL_SIZE):
+        self.provider = provider
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _settings(self):
+        if self.provider == 'gmail':
+            user = os.environ.get('GMAIL_SMTP_USER')
+            return {
+                'host': 'smtp.gmail.com', 'port': 465, 'ssl': True,
+                'user': user, 'password': os.environ.get('GMAIL_SMTP_PASSWORD'),
+                'from': f"FiCore Africa <{user}>"
+            }
+        return {
+            'host': os.environ.get('SMTP_HOST'),
+            'port': int(os.environ.get('SMTP_PORT', 25)),
+            'ssl': os.environ.get('SMTP_USE_SSL', 'false').lower() == 'true',
+            'user': os.environ.get('SMTP_USER'),
+            'password': os.environ.get('SMTP_PASSWORD', ''),
+            'from': f"FiCore Africa <{os.environ.get('SMTP_FROM_EMAIL', 'noreply@ficore.africa')}>"
+        }
+
+    def from_address(self) -> str:
+        return self._settings()['from']
+
+    def _connect(self, timeout: int):
+        settings = self._settings()
+        smtp_class = smtplib.SMTP_SSL if settings['ssl'] else smtplib.SMTP
+        server = smtp_class(settings['host'], settings['port'], timeout=timeout)
+        if settings['user']:
+            server.login(settings['user'], settings['password'])
+        return server
+
+    def acquire(self, timeout: int = 10):
+        """Return an open connection, reusing an idle one when it still answers."""
+        while True:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                return self._connect(timeout)
+            server, idle_since = entry
+            if time.monotonic() - idle_since < SMTP_IDLE_CHECK_SECONDS:
+                return server
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close(server)
+
+    def release(self, server, healthy: bool = True) -> None:
+        if healthy:
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append((server, time.monotonic()))
+                    return
+        self._close(server)
+
+    def send(self, msg: MIMEText, timeout: int = 10) -> None:
+        """Send msg on a pooled connection, retrying once on a fresh connection if the pooled one dropped."""
+        for attempt in (1, 2):
+            server = self.acquire(timeout)
+            try:
+                server.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                self._close(server)
+                if attempt == 2:
+                    raise
+                continue
+            except Exception:
+                self.release(server, healthy=False)
+                raise
+            self.release(server)
+            return
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._close(server)
+
+    @staticmethod
+    def _close(server) -> None:
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            try:
+                server.close()
+            except OSError:
+                pass
+
+SMTP_POOLS = {provider: SMTPConnectionPool(provider) for provider in ('gmail', 'smtp')}
+
+def close_transports() -> None:
+    """Close pooled SMTP connections and the MailerSend HTTP session."""
+    global _http_session
+    for pool in SMTP_POOLS.values():
+        pool.close_all()
+    with _http_lock:
+        if _http_session is not None:
+            _http_session.close()
+            _http_session = None
+
+atexit.register(close_transports)
+
+def _mailersend_message(to_email: str, subject: str, html_content: str) -> Dict:
+    return {
+        "from": {"email": os.environ.get('MAILERSEND_FROM_EMAIL'), "name": "FiCore Africa"},
+        "to": [{"email": to_email}],
+        "subject": subject,
+        "html": html_content
+    }
+
+def _mailersend_post(path: str, payload, timeout: int):
+    response = http_session().post(
+        f"{MAILERSEND_API_URL}/{path}",
+        json=payload,
+        headers={"Authorization": f"Bearer {os.environ.get('MAILERSEND_API_TOKEN')}"},
+        timeout=timeout
+    )
+    if not 200 <= response.status_code < 300:
+        raise RuntimeError(f"MailerSend API error: {response.status_code} {response.text}")
+    return response
+
+def deliver_email(provider: str, to_email: str, subject: str, html_content: str, timeout: int = 10) -> None:
+    """
+    Make a single delivery attempt through provider over a pooled transport.
+
+    Raises:
+        RuntimeError: If the provider rejects the message.
+        requests.RequestException, smtplib.SMTPException, OSError: On network failures.
+
+    Notes:
+        - 'smtp' is a plain SMTP relay configured with SMTP_HOST, SMTP_PORT (default 25),
+          SMTP_USE_SSL, SMTP_USER, SMTP_PASSWORD and SMTP_FROM_EMAIL. Pointing it at a local
+          stub (see smtp_stub.py) captures mail in development and tests.
+    """
+    if provider == 'mailersend':
+        _mailersend_post('email', _mailersend_message(to_email, subject, html_content), timeout)
+        return
+    pool = SMTP_POOLS.get(provider)
+    if pool is None:
+        raise ValueError(f"Unknown email provider '{provider}'")
+    msg = MIMEText(html_content, 'html')
+    msg['Subject'] = subject
+    msg['From'] = pool.from_address()
+    msg['To'] = to_email
+    pool.send(msg, timeout)
+
+def deliver_many(provider: str, messages: List[Dict], timeout: int = 30) -> List[Optional[Exception]]:
+    """
+    Deliver already-rendered messages ({'to_email', 'subject', 'html'}) through one provider.
+
+    MailerSend batches go to the bulk endpoint in chunks of MAILERSEND_BULK_LIMIT; SMTP
+    providers send every message over pooled, already-authenticated connections.
+
+    Returns:
+        One entry per message: None on success, otherwise the exception for that message.
+    """
+    if provider == 'mailersend' and len(messages) > 1:
+        results = []
+        for start in range(0, len(messages), MAILERSEND_BULK_LIMIT):
+            chunk = messages[start:start + MAILERSEND_BULK_LIMIT]
+            try:
+                _mailersend_post('bulk-email', [_mailersend_message(m['to_email'], m['subject'], m['html']) for m in chunk], timeout)
+                results.extend([None] * len(chunk))
+            except Exception as e:
+                results.extend([e] * len(chunk))
+        return results
+    results = []
+    for message in messages:
+        try:
+            deliver_email(provider, message['to_email'], message['subject'], message['html'], timeout)
+            results.append(None)
+        except Exception as e:
+            results.append(e)
+    return results
+
 def send_email(
     app: Flask,
     logger: logging.LoggerAdapter,
@@ -70,7 +339,9 @@ def send_email(
     lang: Optional[str] = None
 ) -> None:
     """
-    Send an email using a prioritized list of providers (MailerSend, Gmail) with provider-specific templates.
+    Send an email synchronously using a prioritized list of providers with provider-specific templates.
+
+    Request handlers should use queue_email instead so delivery happens outside the request.
 
     Args:
         app: Flask application instance for context.
@@ -82,144 +353,150 @@ def send_email(
         lang: Language code ('en' or 'ha'). Defaults to session['lang'] or 'en'.
 
     Raises:
-        ValueError: If API token, from email, template, or template_key is invalid.
+        ValueError: If data, template_key or the provider configuration is invalid.
         RuntimeError: If all providers fail to send the email.
 
     Notes:
         - Requires environment variables:
           - MAILERSEND_API_TOKEN, MAILERSEND_FROM_EMAIL for MailerSend.
           - GMAIL_SMTP_USER, GMAIL_SMTP_PASSWORD (must be an App Password for Gmail with 2FA).
-        - Uses provider-specific templates from EMAIL_CONFIG, falling back to 'mailersend' template if needed.
-        - Logs errors with session ID and provider details for debugging.
-        - Includes retry logic for API/network failures and provider fallback.
+          - SMTP_HOST (and optionally SMTP_PORT, SMTP_USER, SMTP_PASSWORD) for a plain SMTP relay.
+        - Retries each provider up to 3 times before falling back to the next one.
     """
     session_id = session.get('sid', 'no-session-id') if has_request_context() else 'no-session-id'
-    logger.info(f"send_email called with: to_email={to_email}, subject={subject}, template_key={template_key}, data_type={type(data)}, data={data}, lang={lang}", extra={'session_id': session_id})
+    logger.info(f"send_email called with: to_email={to_email}, subject={subject}, template_key={template_key}, lang={lang}", extra={'session_id': session_id})
 
-    # Default language from session
     if lang is None:
         lang = session.get('lang', 'en') if has_request_context() else 'en'
     if lang not in ['en', 'ha']:
         logger.warning(f"Invalid language '{lang}', falling back to 'en'", extra={'session_id': session_id})
         lang = 'en'
 
-    # Ensure data is a dictionary
     data = data or {}
     if not isinstance(data, dict):
         logger.error(f"Data must be a dictionary, got {type(data)}: {data}", extra={'session_id': session_id})
         raise ValueError(f"Data must be a dictionary, got {type(data)}")
-
-    # Validate template_key
-    if template_key is None:
-        logger.error("template_key must be provided", extra={'session_id': session_id})
-        raise ValueError("template_key must be provided")
-
-    config = EMAIL_CONFIG.get(template_key)
-    if not config:
+    if template_key not in EMAIL_CONFIG:
         logger.error(f"Invalid template_key '{template_key}'", extra={'session_id': session_id})
         raise ValueError(f"Template key '{template_key}' not found in EMAIL_CONFIG. Valid keys: {list(EMAIL_CONFIG.keys())}")
 
-    # Validate environment variables upfront
-    mailersend_enabled = bool(os.environ.get('MAILERSEND_API_TOKEN') and os.environ.get('MAILERSEND_FROM_EMAIL'))
-    gmail_enabled = bool(os.environ.get('GMAIL_SMTP_USER') and os.environ.get('GMAIL_SMTP_PASSWORD'))
-    if not (mailersend_enabled or gmail_enabled):
-        logger.error("No email providers configured: missing MailerSend or Gmail credentials", extra={'session_id': session_id})
+    providers = enabled_providers()
+    if not providers:
+        logger.error("No email providers configured: missing MailerSend, Gmail or SMTP settings", extra={'session_id': session_id})
         raise ValueError("No email providers configured")
 
-    # Define provider priority
-    providers = ['mailersend', 'gmail']
     last_error = None
-
     for provider in providers:
-        if (provider == 'mailersend' and not mailersend_enabled) or (provider == 'gmail' and not gmail_enabled):
-            logger.info(f"Skipping provider {provider} due to missing credentials", extra={'session_id': session_id})
-            continue
-
         try:
-            # Select template based on provider
-            template_name = config["template"].get(provider, config["template"].get('mailersend'))
-            if not template_name.endswith('.html'):
-                template_name += '.html'
-            template_path = os.path.join(current_app.template_folder, template_name)
-            # Check blueprint template folder if request context exists
-            if has_request_context() and hasattr(g, 'blueprint'):
-                blueprint = current_app.blueprints.get(g.blueprint)
-                if blueprint and os.path.exists(os.path.join(blueprint.template_folder or current_app.template_folder, template_name)):
-                    template_path = os.path.join(blueprint.template_folder or current_app.template_folder, template_name)
-            if not os.path.exists(template_path):
-                raise ValueError(f"Template {template_name} for provider {provider} not found at {template_path}")
-
-            # Render email template
-            with app.app_context():
-                try:
-                    html_content = render_template(template_name, **data, lang=lang)
-                    logger.info(f"Template {template_name} rendered successfully, content length: {len(html_content)}", extra={'session_id': session_id})
-                except KeyError as e:
-                    logger.warning(f"Missing key {e} in data for template {template_name}, using empty string", extra={'session_id': session_id})
-                    data[str(e)] = ""
-                    html_content = render_template(template_name, **data, lang=lang)
-                except Exception as e:
-                    logger.error(f"Cannot render email template {template_name}: {str(e)}", extra={'session_id': session_id})
-                    raise RuntimeError(f"Cannot render email template {template_name}: {str(e)}")
-
-            if provider == 'mailersend':
-                api_token = os.environ.get('MAILERSEND_API_TOKEN')
-                from_email = os.environ.get('MAILERSEND_FROM_EMAIL')
-                url = "https://api.mailersend.com/v1/email"
-                headers = {
-                    "Authorization": f"Bearer {api_token}",
-                    "Content-Type": "application/json"
-                }
-                payload = {
-                    "from": {"email": from_email, "name": "FiCore Africa"},
-                    "to": [{"email": to_email}],
-                    "subject": subject,
-                    "html": html_content
-                }
-
-                max_retries = 3
-                for attempt in range(1, max_retries + 1):
-                    try:
-                        response = requests.post(url, json=payload, headers=headers, timeout=10)
-                        if 200 <= response.status_code < 300:
-                            logger.info(f"Email sent successfully to {to_email} via {provider}", extra={'session_id': session_id, 'provider': provider})
-                            return
-                        else:
-                            raise RuntimeError(f"MailerSend API error: {response.status_code} {response.text}")
-                    except requests.RequestException as e:
-                        if attempt < max_retries:
-                            delay = 2 ** attempt
-                            logger.warning(f"Network error sending email to {to_email} via {provider}: {str(e)}. Retrying... (attempt {attempt})", extra={'session_id': session_id, 'provider': provider})
-                            continue
-                        raise
-
-            elif provider == 'gmail':
-                smtp_user = os.environ.get('GMAIL_SMTP_USER')
-                smtp_password = os.environ.get('GMAIL_SMTP_PASSWORD')
-                msg = MIMEText(html_content, 'html')
-                msg['Subject'] = subject
-                msg['From'] = f"FiCore Africa <{smtp_user}>"
-                msg['To'] = to_email
-
-                max_retries = 3
-                for attempt in range(1, max_retries + 1):
-                    try:
-                        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-                            server.login(smtp_user, smtp_password)
-                            server.send_message(msg)
-                        logger.info(f"Email sent successfully to {to_email} via {provider}", extra={'session_id': session_id, 'provider': provider})
-                        return
-                    except smtplib.SMTPException as e:
-                        if attempt < max_retries:
-                            delay = 2 ** attempt
-                            logger.warning(f"Gmail SMTP error sending email to {to_email}: {str(e)}. Retrying... (attempt {attempt})", extra={'session_id': session_id, 'provider': provider})
-                            continue
-                        raise RuntimeError(f"Gmail SMTP error: {str(e)}")
-
+            html_content = render_email(app, template_key, provider, data, lang)
         except Exception as e:
-            logger.error(f"Failed to send email to {to_email} via {provider}: {str(e)}", extra={'session_id': session_id, 'provider': provider})
+            logger.error(f"Cannot render email template for {template_key} via {provider}: {str(e)}", extra={'session_id': session_id})
             last_error = e
             continue
 
+        max_retries = 3
+        for attempt in range(1, max_retries + 1):
+            try:
+                deliver_email(provider, to_email, subject, html_content)
+                logger.info(f"Email sent successfully to {to_email} via {provider}", extra={'session_id': session_id, 'provider': provider})
+                return
+            except (requests.RequestException, smtplib.SMTPException, OSError) as e:
+                last_error = e
+                if attempt < max_retries:
+                    logger.warning(f"Network error sending email to {to_email} via {provider}: {str(e)}. Retrying... (attempt {attempt})", extra={'session_id': session_id, 'provider': provider})
+                    continue
+            except Exception as e:
+                last_error = e
+                break
+        logger.error(f"Failed to send email to {to_email} via {provider}: {str(last_error)}", extra={'session_id': session_id, 'provider': provider})
+
     logger.error(f"All providers failed to send email to {to_email}", extra={'session_id': session_id, 'providers_attempted': providers})
     raise RuntimeError(f"All email providers failed: {str(last_error)}")
+
+def queue_email(
+    to_email: str,
+    subject: str,
+    template_key: str,
+    data: Dict = None,
+    lang: Optional[str] = None
+) -> None:
+    """
+    Queue an email for delivery by the outbox worker.
+
+    The message is added to the email_outbox table in the caller's transaction, so the caller
+    commits it (with its own changes), and is delivered outside the request with retries and
+    provider fallback. When the outbox is disabled the email is sent synchronously.
+
+    Raises:
+        ValueError: If template_key is invalid.
+    """
+    from flask import current_app
+    from extensions import email_outbox
+    if lang is None:
+        lang = session.get('lang', 'en') if has_request_context() else 'en'
+    if email_outbox.enabled:
+        email_outbox.enqueue(to_email, subject, template_key, data, lang)
+    else:
+        send_email(current_app._get_current_object(), current_app.logger, to_email, subject, template_key, data, lang)
+
+def send_many(
+    app: Flask,
+    logger: logging.LoggerAdapter,
+    messages: List[Dict]
+) -> Dict:
+    """
+    Send a batch of emails, reusing provider connections across the whole batch.
+
+    Args:
+        app: Flask application instance for rendering.
+        logger: Logger instance.
+        messages: Dicts with 'to_email', 'subject', 'template_key', 'data' and 'lang'.
+
+    Returns:
+        A dict with 'sent' (count), 'failed' (list of (to_email, error) tuples) and
+        'providers' ({provider: count sent}).
+
+    Notes:
+        - Each provider is tried in priority order for the messages still unsent, so a
+          provider outage only moves the affected messages to the next provider.
+        - MailerSend batches use the bulk endpoint; the bulk request is accepted
+          asynchronously, so per-recipient rejections surface in the MailerSend dashboard.
+    """
+    providers = enabled_providers()
+    if not providers:
+        logger.error("No email providers configured: missing MailerSend, Gmail or SMTP settings")
+        raise ValueError("No email providers configured")
+
+    pending = list(range(len(messages)))
+    errors = {}
+    sent_by = {}
+    for provider in providers:
+        if not pending:
+            break
+        rendered, indexes = [], set()
+        for i in pending:
+            message = messages[i]
+            try:
+                html = render_email(app, message['template_key'], provider, message.get('data') or {}, message.get('lang') or 'en')
+            except Exception as e:
+                errors[i] = e
+                continue
+            rendered.append({'to_email': message['to_email'], 'subject': message['subject'], 'html': html})
+            indexes.add(i)
+        results = deliver_many(provider, rendered)
+        still_pending = [i for i in pending if i not in indexes]
+        # pending is kept sorted, so sorted(indexes) is the order the messages were rendered in
+        for i, error in zip(sorted(indexes), results):
+            if error is None:
+                sent_by[provider] = sent_by.get(provider, 0) + 1
+                errors.pop(i, None)
+            else:
+                errors[i] = error
+                still_pending.append(i)
+        logger.info(f"send_many: {sent_by.get(provider, 0)}/{len(rendered)} emails sent via {provider}")
+        pending = sorted(still_pending)
+
+    failed = [(messages[i]['to_email'], str(errors.get(i))) for i in pending]
+    for to_email, error in failed:
+        logger.error(f"All providers failed to send email to {to_email}: {error}")
+    return {'sent': sum(sent_by.values()), 'failed': failed, 'providers': sent_by}
@@ -3,14 +3,14 @@ import os
 from sqlalchemy import engine_from_config, pool
 from alembic import context
 from app import db
-from models import User, Course, FinancialHealth, Budget, Bill, NetWorth, EmergencyFund, LearningProgress, QuizResult, Feedback, ToolUsage
+from models import User, Course, ContentMetadata, FinancialHealth, Budget, Bill, NetWorth, EmergencyFund, LearningProgress, QuizResult, Feedback, ToolUsage, ToolUsageDailyRollup, ToolUsageDailySketch, RollupState, FinancialHealthScoreBucket, DashboardSummary, OutboundEmail, EmailRateLimit, SchedulerLeader
 
 # Alembic Config object
 config = context.config
 
-# Set up logging
-if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+# Set up logging, unless invoked from a running app that has configured it already
+if config.config_file_name is not None and config.attributes.get('configure_logger', True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 # Set SQLAlchemy URL from environment variable or default to SQLite
 database_url = os.getenv('DATABASE_URL', 'sqlite:///ficore.db')
@@ -0,0 +1,44 @@
+"""Record checksum and size of uploaded lesson content
+
+Revision ID: content_metadata_checksum
+Revises: json_columns
+Create Date: 2026-10-17 16:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'content_metadata_checksum'
+down_revision = 'json_columns'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # content_metadata was only ever created by db.create_all(), so it may not exist yet
+    if not sa.inspect(op.get_bind()).has_table('content_metadata'):
+        op.create_table(
+            'content_metadata',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('course_id', sa.String(length=50), nullable=False),
+            sa.Column('lesson_id', sa.String(length=100), nullable=False),
+            sa.Column('content_type', sa.String(length=50), nullable=False),
+            sa.Column('content_path', sa.String(length=255), nullable=False),
+            sa.Column('checksum', sa.String(length=64), nullable=True),
+            sa.Column('size_bytes', sa.BigInteger(), nullable=True),
+            sa.Column('uploaded_by', sa.Integer(), nullable=True),
+            sa.Column('upload_date', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['uploaded_by'], ['users.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_content_metadata_course_id', 'content_metadata', ['course_id'], unique=False)
+        op.create_index('ix_content_metadata_lesson_id', 'content_metadata', ['lesson_id'], unique=False)
+        op.create_index('ix_content_metadata_uploaded_by', 'content_metadata', ['uploaded_by'], unique=False)
+        return
+    with op.batch_alter_table('content_metadata') as batch_op:
+        batch_op.add_column(sa.Column('checksum', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('size_bytes', sa.BigInteger(), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table('content_metadata') as batch_op:
+        batch_op.drop_column('size_bytes')
+        batch_op.drop_column('checksum')
@@ -0,0 +1,27 @@
+"""Add per-owner general dashboard summaries
+
+Revision ID: dashboard_summaries
+Revises: financial_health_score_index
+Create Date: 2026-10-17 11:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'dashboard_summaries'
+down_revision = 'financial_health_score_index'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Summaries are built lazily on first read, so no backfill is needed
+    op.create_table(
+        'dashboard_summaries',
+        sa.Column('owner_key', sa.String(length=64), nullable=False),
+        sa.Column('data', sa.Text(), nullable=False, server_default='{}'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('owner_key')
+    )
+
+def downgrade():
+    op.drop_table('dashboard_summaries')
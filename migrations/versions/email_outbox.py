@@ -0,0 +1,40 @@
+"""Add email outbox for out-of-request delivery
+
+Revision ID: email_outbox
+Revises: dashboard_summaries
+Create Date: 2026-10-17 12:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'email_outbox'
+down_revision = 'dashboard_summaries'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'email_outbox',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('to_email', sa.String(length=120), nullable=False),
+        sa.Column('subject', sa.String(length=255), nullable=False),
+        sa.Column('template_key', sa.String(length=50), nullable=False),
+        sa.Column('data', sa.Text(), nullable=False, server_default='{}'),
+        sa.Column('lang', sa.String(length=2), nullable=False, server_default='en'),
+        sa.Column('status', sa.String(length=10), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('provider', sa.String(length=20), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('session_id', sa.String(length=36), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_email_outbox_status_next_attempt_at', 'email_outbox', ['status', 'next_attempt_at'])
+
+def downgrade():
+    op.drop_index('ix_email_outbox_status_next_attempt_at', table_name='email_outbox')
+    op.drop_table('email_outbox')
@@ -0,0 +1,27 @@
+"""Shared per-provider email rate limit buckets
+
+Revision ID: email_rate_limits
+Revises: tool_usage_session_sketches
+Create Date: 2026-10-18 10:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'email_rate_limits'
+down_revision = 'tool_usage_session_sketches'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'email_rate_limits',
+        sa.Column('provider', sa.String(length=20), nullable=False),
+        sa.Column('tokens', sa.Float(), nullable=False),
+        sa.Column('refilled_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('provider')
+    )
+
+def downgrade():
+    op.drop_table('email_rate_limits')
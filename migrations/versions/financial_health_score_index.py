@@ -0,0 +1,43 @@
+"""Add financial health score histogram
+
+Revision ID: financial_health_score_index
+Revises: tool_usage_rollups
+Create Date: 2026-10-17 10:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'financial_health_score_index'
+down_revision = 'tool_usage_rollups'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    buckets = op.create_table(
+        'financial_health_score_buckets',
+        sa.Column('bucket', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('score_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('bucket')
+    )
+
+    # Backfill from existing step-3 records
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        "SELECT ROUND(score), COUNT(*), SUM(score) FROM financial_health "
+        "WHERE step = 3 AND score IS NOT NULL GROUP BY ROUND(score)"
+    )).fetchall()
+    counts = {}
+    for value, count, total in rows:
+        bucket = max(0, min(100, int(round(value))))
+        entry = counts.setdefault(bucket, [0, 0.0])
+        entry[0] += count
+        entry[1] += total or 0.0
+    op.bulk_insert(buckets, [
+        {'bucket': b, 'count': counts.get(b, [0, 0.0])[0], 'score_sum': counts.get(b, [0, 0.0])[1]}
+        for b in range(0, 101)
+    ])
+
+def downgrade():
+    op.drop_table('financial_health_score_buckets')
@@ -0,0 +1,116 @@
+"""Store badges, insights, tips and learning progress as JSON
+
+Revision ID: json_columns
+Revises: scheduler_leader
+Create Date: 2026-10-17 15:00:00
+"""
+
+import json
+import logging
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = 'json_columns'
+down_revision = 'scheduler_leader'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+# (table, primary key, column, expected Python type, value written for invalid rows)
+JSON_COLUMNS = [
+    ('financial_health', 'id', 'badges', list, None),
+    ('net_worth', 'id', 'badges', list, None),
+    ('emergency_fund', 'id', 'badges', list, None),
+    ('quiz_results', 'id', 'badges', list, None),
+    ('quiz_results', 'id', 'insights', list, None),
+    ('quiz_results', 'id', 'tips', list, None),
+    ('learning_progress', 'id', 'lessons_completed', list, '[]'),
+    ('learning_progress', 'id', 'quiz_scores', dict, '{}'),
+]
+# Text server defaults that have to be recreated with the new column type
+SERVER_DEFAULTS = {
+    ('learning_progress', 'lessons_completed'): '[]',
+    ('learning_progress', 'quiz_scores'): '{}',
+}
+
+def _backfill(conn):
+    """
+    Validate every stored value before the type change.
+
+    Blank strings, unparsable JSON and values of the wrong shape were already read as the
+    empty default by the old to_dict methods; they are rewritten to that default (NULL for
+    nullable columns) so the cast to JSON cannot fail.
+    """
+    for table, pk, column, expected, fallback in JSON_COLUMNS:
+        rows = conn.execute(sa.text(f"SELECT {pk}, {column} FROM {table} WHERE {column} IS NOT NULL")).fetchall()
+        invalid = []
+        for key, value in rows:
+            try:
+                valid = isinstance(json.loads(value), expected)
+            except (TypeError, ValueError):
+                valid = False
+            if not valid:
+                invalid.append(key)
+        for start in range(0, len(invalid), 500):
+            conn.execute(
+                sa.text(f"UPDATE {table} SET {column} = :fallback WHERE {pk} IN :keys")
+                .bindparams(sa.bindparam('keys', expanding=True)),
+                {'fallback': fallback, 'keys': invalid[start:start + 500]}
+            )
+        if invalid:
+            logger.warning(f"Reset {len(invalid)} invalid {table}.{column} values out of {len(rows)}")
+
+def _columns_by_table():
+    tables = {}
+    for table, _, column, _, fallback in JSON_COLUMNS:
+        tables.setdefault(table, []).append((column, fallback is None))
+    return tables
+
+def upgrade():
+    conn = op.get_bind()
+    _backfill(conn)
+    if conn.dialect.name == 'postgresql':
+        for table, columns in _columns_by_table().items():
+            for column, nullable in columns:
+                default = SERVER_DEFAULTS.get((table, column))
+                if default is not None:
+                    op.alter_column(table, column, server_default=None)
+                op.alter_column(
+                    table, column,
+                    type_=postgresql.JSONB(),
+                    existing_nullable=nullable,
+                    postgresql_using=f"{column}::jsonb"
+                )
+                if default is not None:
+                    op.alter_column(table, column, server_default=sa.text(f"'{default}'::jsonb"))
+        return
+    # SQLite stores JSON as text, so existing values are kept as-is; the table rebuild only
+    # records the declared type
+    for table, columns in _columns_by_table().items():
+        with op.batch_alter_table(table) as batch_op:
+            for column, nullable in columns:
+                batch_op.alter_column(column, type_=sa.JSON(), existing_type=sa.Text(), existing_nullable=nullable)
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == 'postgresql':
+        for table, columns in _columns_by_table().items():
+            for column, nullable in columns:
+                default = SERVER_DEFAULTS.get((table, column))
+                if default is not None:
+                    op.alter_column(table, column, server_default=None)
+                op.alter_column(
+                    table, column,
+                    type_=sa.Text(),
+                    existing_nullable=nullable,
+                    postgresql_using=f"{column}::text"
+                )
+                if default is not None:
+                    op.alter_column(table, column, server_default=default)
+        return
+    for table, columns in _columns_by_table().items():
+        with op.batch_alter_table(table) as batch_op:
+            for column, nullable in columns:
+                batch_op.alter_column(column, type_=sa.Text(), existing_type=sa.JSON(), existing_nullable=nullable)
@@ -0,0 +1,41 @@
+"""Composite owner+time indexes for per-user history queries
+
+Revision ID: owner_time_indexes
+Revises: content_metadata_checksum
+Create Date: 2026-10-17 18:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'owner_time_indexes'
+down_revision = 'content_metadata_checksum'
+branch_labels = None
+depends_on = None
+
+# Dashboards filter these by user_id or session_id and order by created_at desc; the
+# composite index serves both, and its leading column replaces the single-column index
+OWNER_HISTORY_TABLES = ('financial_health', 'budget', 'net_worth', 'emergency_fund', 'quiz_results')
+
+def _existing_indexes(table):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+def upgrade():
+    for table in OWNER_HISTORY_TABLES:
+        existing = _existing_indexes(table)
+        for column in ('session_id', 'user_id'):
+            op.create_index(f'ix_{table}_{column}_created_at', table, [column, 'created_at'], unique=False)
+            if f'ix_{table}_{column}' in existing:
+                op.drop_index(f'ix_{table}_{column}', table_name=table)
+    # Score histogram rebuild and step-3 lookups
+    op.create_index('ix_financial_health_step_score', 'financial_health', ['step', 'score'], unique=False)
+    # Admin date-range filters, optionally narrowed by tool and action
+    op.create_index('ix_tool_usage_created_at_tool_name_action', 'tool_usage', ['created_at', 'tool_name', 'action'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_tool_usage_created_at_tool_name_action', table_name='tool_usage')
+    op.drop_index('ix_financial_health_step_score', table_name='financial_health')
+    for table in OWNER_HISTORY_TABLES:
+        for column in ('session_id', 'user_id'):
+            op.create_index(f'ix_{table}_{column}', table, [column], unique=False)
+            op.drop_index(f'ix_{table}_{column}_created_at', table_name=table)
@@ -0,0 +1,29 @@
+"""Add scheduler leader heartbeat table
+
+Revision ID: scheduler_leader
+Revises: email_outbox
+Create Date: 2026-10-17 13:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'scheduler_leader'
+down_revision = 'email_outbox'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'scheduler_leader',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('holder', sa.String(length=255), nullable=False),
+        sa.Column('hostname', sa.String(length=255), nullable=False),
+        sa.Column('pid', sa.Integer(), nullable=False),
+        sa.Column('acquired_at', sa.DateTime(), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+def downgrade():
+    op.drop_table('scheduler_leader')
@@ -0,0 +1,81 @@
+"""Daily tool usage rollups replace the per-session rollup
+
+Revision ID: tool_usage_daily_rollups
+Revises: owner_time_indexes
+Create Date: 2026-10-17 20:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'tool_usage_daily_rollups'
+down_revision = 'owner_time_indexes'
+branch_labels = None
+depends_on = None
+
+def _day(column):
+    if op.get_bind().dialect.name == 'postgresql':
+        return f"CAST({column} AS DATE)"
+    return f"date({column})"
+
+def upgrade():
+    # Daily counts per tool and action
+    op.create_table(
+        'tool_usage_daily_rollup',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('tool_name', sa.String(length=50), nullable=False),
+        sa.Column('action', sa.String(length=100), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('session_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('day', 'tool_name', 'action')
+    )
+    op.create_index('ix_tool_usage_daily_rollup_tool_name', 'tool_usage_daily_rollup', ['tool_name'], unique=False)
+
+    # Distinct engaged sessions per day
+    op.create_table(
+        'tool_usage_daily_sessions',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('sessions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('multi_tool_sessions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('anonymous_sessions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('converted_sessions', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('day')
+    )
+
+    # Carry history already rolled up. Hourly distinct sessions are summed, so backfilled
+    # session_count is an upper bound, and sessions are attributed to the day they started.
+    op.execute(
+        f"INSERT INTO tool_usage_daily_rollup (day, tool_name, action, count, session_count) "
+        f"SELECT {_day('bucket')}, tool_name, action, SUM(count), SUM(session_count) "
+        f"FROM tool_usage_hourly_rollup GROUP BY {_day('bucket')}, tool_name, action"
+    )
+    op.execute(
+        f"INSERT INTO tool_usage_daily_sessions (day, sessions, multi_tool_sessions, anonymous_sessions, converted_sessions) "
+        f"SELECT {_day('first_seen')}, COUNT(*), "
+        f"SUM(CASE WHEN tool_count > 1 THEN 1 ELSE 0 END), "
+        f"SUM(CASE WHEN anonymous_tool_use THEN 1 ELSE 0 END), "
+        f"SUM(CASE WHEN anonymous_tool_use AND registered THEN 1 ELSE 0 END) "
+        f"FROM tool_usage_session_rollup WHERE tool_count > 0 GROUP BY {_day('first_seen')}"
+    )
+
+    op.drop_index('ix_tool_usage_session_rollup_tool_count', table_name='tool_usage_session_rollup')
+    op.drop_table('tool_usage_session_rollup')
+
+def downgrade():
+    # Per-session history is not recoverable from the daily rows; the table comes back empty
+    op.create_table(
+        'tool_usage_session_rollup',
+        sa.Column('session_id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('tools', sa.String(length=255), nullable=False, server_default=''),
+        sa.Column('tool_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('anonymous_tool_use', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('registered', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('first_seen', sa.DateTime(), nullable=False),
+        sa.Column('last_seen', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('session_id')
+    )
+    op.create_index('ix_tool_usage_session_rollup_tool_count', 'tool_usage_session_rollup', ['tool_count'], unique=False)
+    op.drop_table('tool_usage_daily_sessions')
+    op.drop_index('ix_tool_usage_daily_rollup_tool_name', table_name='tool_usage_daily_rollup')
+    op.drop_table('tool_usage_daily_rollup')
@@ -0,0 +1,58 @@
+"""Add tool usage rollup tables for the admin overview
+
+Revision ID: tool_usage_rollups
+Revises: initial_schema
+Create Date: 2026-10-17 09:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'tool_usage_rollups'
+down_revision = 'initial_schema'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Hourly counts per tool and action
+    op.create_table(
+        'tool_usage_hourly_rollup',
+        sa.Column('bucket', sa.DateTime(), nullable=False),
+        sa.Column('tool_name', sa.String(length=50), nullable=False),
+        sa.Column('action', sa.String(length=100), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('session_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('bucket', 'tool_name', 'action')
+    )
+    op.create_index('ix_tool_usage_hourly_rollup_tool_name', 'tool_usage_hourly_rollup', ['tool_name'], unique=False)
+
+    # Per-session engagement flags
+    op.create_table(
+        'tool_usage_session_rollup',
+        sa.Column('session_id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('tools', sa.String(length=255), nullable=False, server_default=''),
+        sa.Column('tool_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('anonymous_tool_use', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('registered', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('first_seen', sa.DateTime(), nullable=False),
+        sa.Column('last_seen', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('session_id')
+    )
+    op.create_index('ix_tool_usage_session_rollup_tool_count', 'tool_usage_session_rollup', ['tool_count'], unique=False)
+
+    # Incremental processing watermarks
+    op.create_table(
+        'rollup_state',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('watermark', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+def downgrade():
+    op.drop_table('rollup_state')
+    op.drop_index('ix_tool_usage_session_rollup_tool_count', table_name='tool_usage_session_rollup')
+    op.drop_table('tool_usage_session_rollup')
+    op.drop_index('ix_tool_usage_hourly_rollup_tool_name', table_name='tool_usage_hourly_rollup')
+    op.drop_table('tool_usage_hourly_rollup')
@@ -0,0 +1,54 @@
+"""Distinct-session sketches replace per-day session counts and the hourly rollup
+
+Revision ID: tool_usage_session_sketches
+Revises: tool_usage_daily_rollups
+Create Date: 2026-10-18 09:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'tool_usage_session_sketches'
+down_revision = 'tool_usage_daily_rollups'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # HyperLogLog registers per day for each tracked tool, 'anonymous' and 'register'
+    op.create_table(
+        'tool_usage_daily_sketch',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('registers', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'name')
+    )
+    op.drop_table('tool_usage_daily_sessions')
+    op.drop_index('ix_tool_usage_hourly_rollup_tool_name', table_name='tool_usage_hourly_rollup')
+    op.drop_table('tool_usage_hourly_rollup')
+
+    # Sketches cannot be derived from the old aggregates: clear the watermark so the next
+    # rollup run rebuilds the daily rows and sketches from the raw tool_usage rows
+    op.execute("UPDATE rollup_state SET watermark = NULL WHERE name = 'tool_usage'")
+
+def downgrade():
+    # The dropped tables come back empty
+    op.create_table(
+        'tool_usage_hourly_rollup',
+        sa.Column('bucket', sa.DateTime(), nullable=False),
+        sa.Column('tool_name', sa.String(length=50), nullable=False),
+        sa.Column('action', sa.String(length=100), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('session_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('bucket', 'tool_name', 'action')
+    )
+    op.create_index('ix_tool_usage_hourly_rollup_tool_name', 'tool_usage_hourly_rollup', ['tool_name'], unique=False)
+    op.create_table(
+        'tool_usage_daily_sessions',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('sessions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('multi_tool_sessions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('anonymous_sessions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('converted_sessions', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('day')
+    )
+    op.drop_table('tool_usage_daily_sketch')
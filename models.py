@@ -1,9 +1,13 @@
-from extensions import db
+from extensions import db, tool_usage_buffer
 from flask_login import UserMixin
 import uuid
 from datetime import datetime, date
-import json
 from flask import current_app, session
+from sqlalchemy.dialects.postgresql import JSONB
+
+# JSONB on PostgreSQL, JSON elsewhere; values are decoded once by the driver/dialect on load.
+# none_as_null keeps Python None as SQL NULL rather than the JSON literal 'null'.
+JSONColumn = db.JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), 'postgresql')
 
 class User(db.Model, UserMixin):
     __tablename__ = 'users'
@@ -50,6 +54,8 @@ class ContentMetadata(db.Model):
     lesson_id = db.Column(db.String(100), nullable=False)
     content_type = db.Column(db.String(50), nullable=False)
     content_path = db.Column(db.String(255), nullable=False)
+    checksum = db.Column(db.String(64), nullable=True)
+    size_bytes = db.Column(db.BigInteger, nullable=True)
     uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     upload_date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     user = db.relationship('User', backref='content_metadata_records')
@@ -83,21 +89,17 @@ class FinancialHealth(db.Model):
     score = db.Column(db.Float, nullable=True)
     status = db.Column(db.String(50), nullable=True)
     status_key = db.Column(db.String(50), nullable=True)
-    badges = db.Column(db.Text, nullable=True)
+    badges = db.Column(JSONColumn, nullable=True)
     step = db.Column(db.Integer, nullable=True)
     user = db.relationship('User', backref='financial_health_records')
 
     __table_args__ = (
-        db.Index('ix_financial_health_session_id', 'session_id'),
-        db.Index('ix_financial_health_user_id', 'user_id')
+        db.Index('ix_financial_health_session_id_created_at', 'session_id', 'created_at'),
+        db.Index('ix_financial_health_user_id_created_at', 'user_id', 'created_at'),
+        db.Index('ix_financial_health_step_score', 'step', 'score')
     )
 
     def to_dict(self):
-        try:
-            badges = json.loads(self.badges) if self.badges and self.badges.strip() else []
-        except json.JSONDecodeError:
-            current_app.logger.error(f"Invalid JSON in badges for FinancialHealth ID {self.id}")
-            badges = []
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -117,10 +119,16 @@ class FinancialHealth(db.Model):
             'score': self.score,
             'status': self.status,
             'status_key': self.status_key,
-            'badges': badges,
+            'badges': self.badges or [],
             'step': self.step
         }
 
+class FinancialHealthScoreBucket(db.Model):
+    __tablename__ = 'financial_health_score_buckets'
+    bucket = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0.0)
+
 class Budget(db.Model):
     __tablename__ = 'budget'
     id = db.Column(db.String(36), primary_key=True)
@@ -142,8 +150,8 @@ class Budget(db.Model):
     user = db.relationship('User', backref='budgets')
 
     __table_args__ = (
-        db.Index('ix_budget_session_id', 'session_id'),
-        db.Index('ix_budget_user_id', 'user_id')
+        db.Index('ix_budget_session_id_created_at', 'session_id', 'created_at'),
+        db.Index('ix_budget_user_id_created_at', 'user_id', 'created_at')
     )
 
     def to_dict(self):
@@ -223,20 +231,15 @@ class NetWorth(db.Model):
     total_assets = db.Column(db.Float, nullable=True)
     total_liabilities = db.Column(db.Float, nullable=True)
     net_worth = db.Column(db.Float, nullable=True)
-    badges = db.Column(db.Text, nullable=True)
+    badges = db.Column(JSONColumn, nullable=True)
     user = db.relationship('User', backref='net_worth_records')
 
     __table_args__ = (
-        db.Index('ix_net_worth_session_id', 'session_id'),
-        db.Index('ix_net_worth_user_id', 'user_id')
+        db.Index('ix_net_worth_session_id_created_at', 'session_id', 'created_at'),
+        db.Index('ix_net_worth_user_id_created_at', 'user_id', 'created_at')
     )
 
     def to_dict(self):
-        try:
-            badges = json.loads(self.badges) if self.badges and self.badges.strip() else []
-        except json.JSONDecodeError:
-            current_app.logger.error(f"Invalid JSON in badges for NetWorth ID {self.id}")
-            badges = []
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -252,7 +255,7 @@ class NetWorth(db.Model):
             'total_assets': self.total_assets,
             'total_liabilities': self.total_liabilities,
             'net_worth': self.net_worth,
-            'badges': badges
+            'badges': self.badges or []
         }
 
 class EmergencyFund(db.Model):
@@ -276,20 +279,15 @@ class EmergencyFund(db.Model):
     savings_gap = db.Column(db.Float, nullable=True)
     monthly_savings = db.Column(db.Float, nullable=True)
     percent_of_income = db.Column(db.Float, nullable=True)
-    badges = db.Column(db.Text, nullable=True)
+    badges = db.Column(JSONColumn, nullable=True)
     user = db.relationship('User', backref='emergency_funds')
 
     __table_args__ = (
-        db.Index('ix_emergency_fund_session_id', 'session_id'),
-        db.Index('ix_emergency_fund_user_id', 'user_id')
+        db.Index('ix_emergency_fund_session_id_created_at', 'session_id', 'created_at'),
+        db.Index('ix_emergency_fund_user_id_created_at', 'user_id', 'created_at')
     )
 
     def to_dict(self):
-        try:
-            badges = json.loads(self.badges) if self.badges and self.badges.strip() else []
-        except json.JSONDecodeError:
-            current_app.logger.error(f"Invalid JSON in badges for EmergencyFund ID {self.id}")
-            badges = []
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -310,7 +308,7 @@ class EmergencyFund(db.Model):
             'savings_gap': self.savings_gap,
             'monthly_savings': self.monthly_savings,
             'percent_of_income': self.percent_of_income,
-            'badges': badges
+            'badges': self.badges or []
         }
 
 class LearningProgress(db.Model):
@@ -319,8 +317,8 @@ class LearningProgress(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     session_id = db.Column(db.String(36), nullable=False)
     course_id = db.Column(db.String(50), nullable=False)
-    lessons_completed = db.Column(db.Text, default='[]', nullable=False)
-    quiz_scores = db.Column(db.Text, default='{}', nullable=False)
+    lessons_completed = db.Column(JSONColumn, default=list, nullable=False)
+    quiz_scores = db.Column(JSONColumn, default=dict, nullable=False)
     current_lesson = db.Column(db.String(50), nullable=True)
     user = db.relationship('User', backref='learning_progress_records')
 
@@ -332,20 +330,15 @@ class LearningProgress(db.Model):
     )
 
     def to_dict(self):
-        try:
-            lessons_completed = json.loads(self.lessons_completed)
-            quiz_scores = json.loads(self.quiz_scores)
-        except json.JSONDecodeError:
-            current_app.logger.error(f"Invalid JSON in LearningProgress ID {self.id}")
-            lessons_completed = []
-            quiz_scores = {}
         return {
             'id': self.id,
             'user_id': self.user_id,
             'session_id': self.session_id,
             'course_id': self.course_id,
-            'lessons_completed': lessons_completed,
-            'quiz_scores': quiz_scores,
+            # Copies, so callers mutating the result don't also mutate the loaded state
+            # (which would hide the change from the flush)
+            'lessons_completed': list(self.lessons_completed or []),
+            'quiz_scores': dict(self.quiz_scores or {}),
             'current_lesson': self.current_lesson
         }
 
@@ -360,21 +353,17 @@ class QuizResult(db.Model):
     send_email = db.Column(db.Boolean, default=False, nullable=False)
     personality = db.Column(db.String(50), nullable=True)
     score = db.Column(db.Integer, nullable=True)
-    badges = db.Column(db.Text, nullable=True)
-    insights = db.Column(db.Text, nullable=True)
-    tips = db.Column(db.Text, nullable=True)
+    badges = db.Column(JSONColumn, nullable=True)
+    insights = db.Column(JSONColumn, nullable=True)
+    tips = db.Column(JSONColumn, nullable=True)
     user = db.relationship('User', backref='quiz_results')
 
+    __table_args__ = (
+        db.Index('ix_quiz_results_session_id_created_at', 'session_id', 'created_at'),
+        db.Index('ix_quiz_results_user_id_created_at', 'user_id', 'created_at')
+    )
+
     def to_dict(self):
-        try:
-            badges = json.loads(self.badges) if self.badges and self.badges.strip() else []
-            insights = json.loads(self.insights) if self.insights and self.insights.strip() else []
-            tips = json.loads(self.tips) if self.tips and self.tips.strip() else []
-        except json.JSONDecodeError:
-            current_app.logger.error(f"Invalid JSON in QuizResult ID {self.id}")
-            badges = []
-            insights = []
-            tips = []
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -385,9 +374,9 @@ class QuizResult(db.Model):
             'send_email': self.send_email,
             'personality': self.personality,
             'score': self.score,
-            'badges': badges,
-            'insights': insights,
-            'tips': tips
+            'badges': self.badges or [],
+            'insights': self.insights or [],
+            'tips': self.tips or []
         }
 
 class Feedback(db.Model):
@@ -430,7 +419,8 @@ class ToolUsage(db.Model):
     __table_args__ = (
         db.Index('ix_tool_usage_session_id', 'session_id'),
         db.Index('ix_tool_usage_user_id', 'user_id'),
-        db.Index('ix_tool_usage_tool_name', 'tool_name')
+        db.Index('ix_tool_usage_tool_name', 'tool_name'),
+        db.Index('ix_tool_usage_created_at_tool_name_action', 'created_at', 'tool_name', 'action')
     )
 
     def __init__(self, tool_name, user_id, session_id, action):
@@ -449,9 +439,107 @@ class ToolUsage(db.Model):
             'created_at': self.created_at.isoformat() + 'Z' if self.created_at else None
         }
 
+class DashboardSummary(db.Model):
+    __tablename__ = 'dashboard_summaries'
+    owner_key = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.Text, nullable=False, default='{}')
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class ToolUsageDailyRollup(db.Model):
+    __tablename__ = 'tool_usage_daily_rollup'
+    day = db.Column(db.Date, primary_key=True)
+    tool_name = db.Column(db.String(50), primary_key=True)
+    action = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    session_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_tool_usage_daily_rollup_tool_name', 'tool_name'),
+    )
+
+class ToolUsageDailySketch(db.Model):
+    __tablename__ = 'tool_usage_daily_sketch'
+    day = db.Column(db.Date, primary_key=True)
+    # A tracked tool name, 'anonymous' (anonymous tool use) or 'register'
+    name = db.Column(db.String(50), primary_key=True)
+    registers = db.Column(db.LargeBinary, nullable=False)
+
+class RollupState(db.Model):
+    __tablename__ = 'rollup_state'
+    name = db.Column(db.String(50), primary_key=True)
+    watermark = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class SchedulerLeader(db.Model):
+    __tablename__ = 'scheduler_leader'
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(255), nullable=False)
+    hostname = db.Column(db.String(255), nullable=False)
+    pid = db.Column(db.Integer, nullable=False)
+    acquired_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'holder': self.holder,
+            'hostname': self.hostname,
+            'pid': self.pid,
+            'acquired_at': self.acquired_at.isoformat() + 'Z' if self.acquired_at else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() + 'Z' if self.heartbeat_at else None
+        }
+
+class OutboundEmail(db.Model):
+    __tablename__ = 'email_outbox'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    to_email = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    template_key = db.Column(db.String(50), nullable=False)
+    data = db.Column(db.Text, nullable=False, default='{}')
+    lang = db.Column(db.String(2), nullable=False, default='en')
+    status = db.Column(db.String(10), nullable=False, default='pending')  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    provider = db.Column(db.String(20), nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    session_id = db.Column(db.String(36), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'to_email': self.to_email,
+            'subject': self.subject,
+            'template_key': self.template_key,
+            'lang': self.lang,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() + 'Z' if self.next_attempt_at else None,
+            'provider': self.provider,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() + 'Z' if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() + 'Z' if self.sent_at else None
+        }
+
+class EmailRateLimit(db.Model):
+    __tablename__ = 'email_rate_limits'
+    provider = db.Column(db.String(20), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    refilled_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Bumped on every change; updates are compare-and-set on it
+    version = db.Column(db.Integer, nullable=False, default=0)
+
 def log_tool_usage(tool_name, user_id=None, session_id=None, action=None, details=None):
     """
-    Log tool usage to the database in a separate transaction.
+    Log tool usage to the database.
+
+    When the tool usage buffer is enabled the row is only enqueued here and written by the
+    background flusher in a batched INSERT; otherwise it is written in a separate transaction.
     
     Args:
         tool_name (str): Name of the tool (e.g., 'financial_health', 'budget')
@@ -460,13 +548,19 @@ def log_tool_usage(tool_name, user_id=None, session_id=None, action=None, detail
         action (str): Action performed (e.g., 'step1_view', 'dashboard_submit')
         details (dict): Additional details for logging
     """
+    session_id = session_id or session.get('sid', 'unknown')
+    action = action or 'unknown'
+    if tool_usage_buffer.enabled:
+        if not tool_usage_buffer.enqueue(tool_name, user_id, session_id, action):
+            current_app.logger.warning(f"Tool usage buffer full, dropped event: {tool_name}/{action}", extra={'session_id': session_id})
+        return
     try:
         with db.session.begin_nested():  # Use nested transaction to isolate logging
             usage = ToolUsage(
                 tool_name=tool_name,
                 user_id=user_id,
-                session_id=session_id or session.get('sid', 'unknown'),
-                action=action or 'unknown'
+                session_id=session_id,
+                action=action
             )
             db.session.add(usage)
             db.session.commit()
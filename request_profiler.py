@@ -0,0 +1,294 @@
+import contextvars
+import cProfile
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import request, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:  # Optional: PROFILER_CAPTURE=pyinstrument needs it
+    PyinstrumentProfiler = None
+
+logger = logging.getLogger('ficore_app.profiler')
+
+CAPTURE_MODES = ('off', 'cprofile', 'pyinstrument')
+# Slow requests listed by the admin endpoint
+RECENT_SLOW_LIMIT = 50
+
+# Profile of the request running in this thread (None outside profiled requests)
+_current = contextvars.ContextVar('request_profile', default=None)
+
+def _new_profile():
+    return {'endpoint': None, 'queries': 0, 'sql_ms': 0.0, 'templates': 0, 'template_ms': 0.0, 'trans_calls': 0, '_template_started': []}
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+class RouteStats:
+    """Running totals for one endpoint plus the latest wall times for percentiles."""
+
+    def __init__(self, sample_size):
+        self.count = 0
+        self.slow = 0
+        self.wall_ms = 0.0
+        self.max_ms = 0.0
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.trans_calls = 0
+        self.samples = deque(maxlen=sample_size)
+
+    def add(self, wall_ms, profile, slow):
+        self.count += 1
+        self.slow += slow
+        self.wall_ms += wall_ms
+        self.max_ms = max(self.max_ms, wall_ms)
+        self.queries += profile['queries']
+        self.sql_ms += profile['sql_ms']
+        self.template_ms += profile['template_ms']
+        self.trans_calls += profile['trans_calls']
+        self.samples.append(wall_ms)
+
+    def to_dict(self):
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'slow': self.slow,
+            'total_ms': round(self.wall_ms, 1),
+            'avg_ms': round(self.wall_ms / self.count, 1),
+            'p50_ms': round(_percentile(ordered, 0.50), 1),
+            'p95_ms': round(_percentile(ordered, 0.95), 1),
+            'p99_ms': round(_percentile(ordered, 0.99), 1),
+            'max_ms': round(self.max_ms, 1),
+            'avg_queries': round(self.queries / self.count, 2),
+            'avg_sql_ms': round(self.sql_ms / self.count, 2),
+            'avg_template_ms': round(self.template_ms / self.count, 2),
+            'avg_trans_calls': round(self.trans_calls / self.count, 1)
+        }
+
+class RequestProfiler:
+    """
+    Opt-in per-route request profiling.
+
+    Wraps app.wsgi_app and records, per request: wall time, number of SQL statements and time
+    spent in them (cursor execute events), template render time (Flask's render signals) and
+    the number of translation lookups. Totals and recent wall-time percentiles are kept per
+    endpoint and served as JSON by /admin/profiler. Requests slower than PROFILER_SLOW_MS are
+    logged and, with a capture mode set, their cProfile (.prof, open with snakeviz or pstats)
+    or pyinstrument (.html) profile is written to PROFILER_DUMP_DIR.
+
+    Wall time ends when the app returns its response; work done while a streamed body is
+    iterated is not counted.
+
+    Config (environment variables of the same name):
+        PROFILER_ENABLED: Default false; when off nothing is wrapped or listened to.
+        PROFILER_SLOW_MS: Slow request threshold (default 1000).
+        PROFILER_CAPTURE: 'off' (default), 'cprofile' or 'pyinstrument'. Profiles every
+            request and keeps the slow ones, so expect noticeably slower requests.
+        PROFILER_DUMP_DIR: Where profiles are written (default data/profiles).
+        PROFILER_SAMPLE_SIZE: Wall times kept per endpoint for percentiles (default 1000).
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILER_ENABLED', os.environ.get('PROFILER_ENABLED', 'false').lower() == 'true')
+        app.config.setdefault('PROFILER_SLOW_MS', float(os.environ.get('PROFILER_SLOW_MS', 1000)))
+        app.config.setdefault('PROFILER_CAPTURE', os.environ.get('PROFILER_CAPTURE', 'off').lower())
+        app.config.setdefault('PROFILER_DUMP_DIR', os.environ.get('PROFILER_DUMP_DIR', os.path.join(os.path.dirname(__file__), 'data', 'profiles')))
+        app.config.setdefault('PROFILER_SAMPLE_SIZE', int(os.environ.get('PROFILER_SAMPLE_SIZE', 1000)))
+        if app.config['PROFILER_CAPTURE'] not in CAPTURE_MODES:
+            logger.warning(f"Invalid PROFILER_CAPTURE '{app.config['PROFILER_CAPTURE']}', falling back to 'off'")
+            app.config['PROFILER_CAPTURE'] = 'off'
+        if app.config['PROFILER_CAPTURE'] == 'pyinstrument' and PyinstrumentProfiler is None:
+            logger.warning("PROFILER_CAPTURE=pyinstrument but pyinstrument is not installed, falling back to 'cprofile'")
+            app.config['PROFILER_CAPTURE'] = 'cprofile'
+
+        self.app = app
+        self.enabled = app.config['PROFILER_ENABLED']
+        self.slow_ms = app.config['PROFILER_SLOW_MS']
+        self.capture = app.config['PROFILER_CAPTURE']
+        self.dump_dir = app.config['PROFILER_DUMP_DIR']
+        self.sample_size = app.config['PROFILER_SAMPLE_SIZE']
+        app.extensions['request_profiler'] = self
+        if not self.enabled:
+            return
+        register_profiler_listeners()
+        app.before_request(_record_endpoint)
+        app.wsgi_app = ProfilingMiddleware(app.wsgi_app, self)
+        logger.info(f"Request profiler enabled: slow_ms={self.slow_ms}, capture={self.capture}")
+
+    def reset(self):
+        with self._lock:
+            self.routes = {}
+            self.recent_slow = deque(maxlen=RECENT_SLOW_LIMIT)
+            self.since = datetime.utcnow()
+
+    def _start_capture(self):
+        if self.capture == 'cprofile':
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another request in this process is being profiled (one profiler at a time)
+                return None
+            return profiler
+        if self.capture == 'pyinstrument':
+            profiler = PyinstrumentProfiler()
+            try:
+                profiler.start()
+            except RuntimeError:
+                return None
+            return profiler
+        return None
+
+    def _dump(self, profiler, endpoint, wall_ms):
+        os.makedirs(self.dump_dir, exist_ok=True)
+        name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{re.sub(r'[^A-Za-z0-9_.-]', '_', endpoint)}-{wall_ms:.0f}ms"
+        if self.capture == 'cprofile':
+            path = os.path.join(self.dump_dir, f"{name}.prof")
+            profiler.dump_stats(path)
+        else:
+            path = os.path.join(self.dump_dir, f"{name}.html")
+            with open(path, 'w') as f:
+                f.write(profiler.output_html())
+        return path
+
+    def record(self, method, path, wall_ms, profile, profiler=None):
+        endpoint = profile['endpoint'] or 'unmatched'
+        slow = wall_ms >= self.slow_ms
+        dump_path = None
+        if profiler is not None:
+            if self.capture == 'cprofile':
+                profiler.disable()
+            else:
+                profiler.stop()
+            if slow:
+                try:
+                    dump_path = self._dump(profiler, endpoint, wall_ms)
+                except OSError as e:
+                    logger.error(f"Failed to write profile for {method} {path}: {str(e)}")
+        with self._lock:
+            stats = self.routes.get(endpoint)
+            if stats is None:
+                stats = self.routes[endpoint] = RouteStats(self.sample_size)
+            stats.add(wall_ms, profile, slow)
+            if slow:
+                self.recent_slow.append({
+                    'at': datetime.utcnow().isoformat() + 'Z',
+                    'endpoint': endpoint,
+                    'method': method,
+                    'path': path,
+                    'wall_ms': round(wall_ms, 1),
+                    'queries': profile['queries'],
+                    'sql_ms': round(profile['sql_ms'], 1),
+                    'template_ms': round(profile['template_ms'], 1),
+                    'trans_calls': profile['trans_calls'],
+                    'profile': dump_path
+                })
+        if slow:
+            logger.warning(
+                f"Slow request {method} {path} ({endpoint}): {wall_ms:.0f}ms, {profile['queries']} queries in {profile['sql_ms']:.0f}ms, "
+                f"templates {profile['template_ms']:.0f}ms, {profile['trans_calls']} trans calls" + (f", profile {dump_path}" if dump_path else '')
+            )
+
+    def report(self, sort='total_ms'):
+        """Aggregated stats per endpoint, highest sort value first."""
+        with self._lock:
+            routes = {endpoint: stats.to_dict() for endpoint, stats in self.routes.items()}
+            recent_slow = list(self.recent_slow)
+        if routes and sort not in next(iter(routes.values())):
+            sort = 'total_ms'
+        return {
+            'enabled': self.enabled,
+            'since': self.since.isoformat() + 'Z',
+            'slow_ms': self.slow_ms,
+            'capture': self.capture,
+            'routes': dict(sorted(routes.items(), key=lambda item: item[1][sort], reverse=True)),
+            'recent_slow': recent_slow
+        }
+
+class ProfilingMiddleware:
+    """WSGI wrapper that opens a profile for each request and hands it to RequestProfiler.record."""
+
+    def __init__(self, wsgi_app, profiler):
+        self.wsgi_app = wsgi_app
+        self.profiler = profiler
+
+    def __call__(self, environ, start_response):
+        profile = _new_profile()
+        token = _current.set(profile)
+        capture = self.profiler._start_capture()
+        started = time.perf_counter()
+        try:
+            return self.wsgi_app(environ, start_response)
+        finally:
+            wall_ms = (time.perf_counter() - started) * 1000
+            _current.reset(token)
+            try:
+                self.profiler.record(environ.get('REQUEST_METHOD', ''), environ.get('PATH_INFO', ''), wall_ms, profile, capture)
+            except Exception as e:
+                logger.error(f"Failed to record request profile: {str(e)}")
+
+def _record_endpoint():
+    profile = _current.get()
+    if profile is not None:
+        profile['endpoint'] = request.endpoint
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context, which is discarded with the statement even when it fails
+    if context is not None and _current.get() is not None:
+        context._profiler_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    started = getattr(context, '_profiler_started', None)
+    if profile is not None and started is not None:
+        profile['queries'] += 1
+        profile['sql_ms'] += (time.perf_counter() - started) * 1000
+
+def _before_render(sender, template, context, **extra):
+    profile = _current.get()
+    if profile is not None:
+        profile['_template_started'].append(time.perf_counter())
+
+def _after_render(sender, template, context, **extra):
+    profile = _current.get()
+    if profile is not None and profile['_template_started']:
+        profile['templates'] += 1
+        profile['template_ms'] += (time.perf_counter() - profile['_template_started'].pop()) * 1000
+
+def _count_trans():
+    profile = _current.get()
+    if profile is not None:
+        profile['trans_calls'] += 1
+
+_listeners_registered = False
+
+def register_profiler_listeners():
+    """Hook SQL execution, template rendering and translation lookups (once per process)."""
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    from translations import set_lookup_observer
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    before_render_template.connect(_before_render)
+    template_rendered.connect(_after_render)
+    set_lookup_observer(_count_trans)
+    _listeners_registered = True
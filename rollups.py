@@ -0,0 +1,177 @@
+import logging
+from datetime import datetime, time, timedelta
+from sqlalchemy import func, case
+from extensions import db
+from models import ToolUsage, ToolUsageDailyRollup, ToolUsageDailySketch, RollupState
+from hll import HyperLogLog, union
+
+logger = logging.getLogger('ficore_app.analytics')
+
+# Tools counted for engagement metrics (sessions, multi-tool use, conversion)
+TRACKED_TOOLS = [
+    'financial_health', 'budget', 'bill', 'net_worth',
+    'emergency_fund', 'learning_hub', 'quiz'
+]
+
+# Sessions sketched per day besides the tracked tools
+ANONYMOUS_SKETCH = 'anonymous'
+REGISTER_SKETCH = 'register'
+
+ROLLUP_NAME = 'tool_usage'
+# Rows are only rolled up once their hour is older than this, so late buffered inserts are not missed
+ROLLUP_LAG = timedelta(minutes=5)
+
+def floor_hour(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+def next_midnight(value):
+    return datetime.combine(value.date() + timedelta(days=1), time())
+
+def _to_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.strptime(str(value)[:19], '%Y-%m-%d %H:%M:%S')
+
+def _rollup_day(day, window_end):
+    """
+    Recompute the per tool/action rows of day from its raw rows up to window_end.
+
+    Distinct sessions cannot be added up across windows, so the day is recounted each time
+    one of its windows is processed; that scans at most one day of tool_usage.
+    """
+    day_start = datetime.combine(day, time())
+    rows = db.session.query(
+        ToolUsage.tool_name,
+        ToolUsage.action,
+        func.count(ToolUsage.id),
+        func.count(func.distinct(ToolUsage.session_id))
+    ).filter(
+        ToolUsage.created_at >= day_start,
+        ToolUsage.created_at < window_end
+    ).group_by(ToolUsage.tool_name, ToolUsage.action).all()
+    for tool_name, action, count, session_count in rows:
+        rollup = db.session.get(ToolUsageDailyRollup, (day, tool_name, action))
+        if rollup is None:
+            rollup = ToolUsageDailyRollup(day=day, tool_name=tool_name, action=action)
+            db.session.add(rollup)
+        rollup.count = count
+        rollup.session_count = session_count
+    return len(rows)
+
+def _sketch_sessions(day, window_start, window_end):
+    """
+    Add the window's sessions to the day's distinct-session sketches.
+
+    One sketch per tracked tool, one for sessions that used a tracked tool anonymously and
+    one for sessions that registered. Adding is idempotent, so only the window is read.
+    """
+    rows = db.session.query(
+        ToolUsage.session_id,
+        ToolUsage.tool_name,
+        func.sum(case((ToolUsage.user_id.is_(None), 1), else_=0))
+    ).filter(
+        ToolUsage.created_at >= window_start,
+        ToolUsage.created_at < window_end,
+        ToolUsage.tool_name.in_(TRACKED_TOOLS + [REGISTER_SKETCH])
+    ).group_by(ToolUsage.session_id, ToolUsage.tool_name).all()
+    if not rows:
+        return 0
+    existing = {sketch.name: sketch for sketch in ToolUsageDailySketch.query.filter_by(day=day)}
+    sketches = {name: HyperLogLog.from_bytes(sketch.registers) for name, sketch in existing.items()}
+    for session_id, tool_name, anonymous_count in rows:
+        sketches.setdefault(tool_name, HyperLogLog()).add(session_id)
+        if tool_name in TRACKED_TOOLS and anonymous_count:
+            sketches.setdefault(ANONYMOUS_SKETCH, HyperLogLog()).add(session_id)
+    for name, sketch in sketches.items():
+        if name in existing:
+            existing[name].registers = sketch.to_bytes()
+        else:
+            db.session.add(ToolUsageDailySketch(day=day, name=name, registers=sketch.to_bytes()))
+    return len(rows)
+
+def engagement_metrics(query_session, start=None, end=None):
+    """
+    Distinct-session engagement estimates from the daily sketches (about 3% error).
+
+    Sketches of each day are merged, so a session active on several days counts once and
+    tools used or a registration made on different days are still attributed to it.
+    Multi-tool sessions are all engaged sessions minus those that used exactly one tool,
+    i.e. |all| - sum over tools t of (|all| - |all tools but t|); converted sessions are
+    |anonymous| + |registered| - |anonymous or registered|.
+
+    Returns:
+        A dict with sessions, multi_tool_sessions, anonymous_sessions and converted_sessions.
+    """
+    query = query_session.query(ToolUsageDailySketch.name, ToolUsageDailySketch.registers)
+    if start is not None:
+        query = query.filter(ToolUsageDailySketch.day >= start)
+    if end is not None:
+        query = query.filter(ToolUsageDailySketch.day < end)
+    merged = {}
+    for name, registers in query:
+        merged.setdefault(name, HyperLogLog()).merge(HyperLogLog.from_bytes(registers))
+    tools = [merged[tool] for tool in TRACKED_TOOLS if tool in merged]
+    sessions = union(tools).count()
+    single_tool = sum(sessions - union(other for other in tools if other is not tool).count() for tool in tools)
+    anonymous = merged.get(ANONYMOUS_SKETCH, HyperLogLog())
+    registered = merged.get(REGISTER_SKETCH, HyperLogLog())
+    anonymous_sessions = anonymous.count()
+    converted = anonymous_sessions + registered.count() - union([anonymous, registered]).count()
+    return {
+        'sessions': sessions,
+        'multi_tool_sessions': max(0, sessions - single_tool),
+        'anonymous_sessions': anonymous_sessions,
+        'converted_sessions': max(0, min(converted, anonymous_sessions))
+    }
+
+def refresh_tool_usage_rollups(now=None):
+    """
+    Fold raw tool_usage rows into the daily rollup and session sketch tables.
+
+    Processes complete hours between the stored watermark and now minus ROLLUP_LAG, in
+    windows that never cross midnight, committing the watermark with each window. The
+    window's day gets its per tool/action rows recomputed and the window's sessions added
+    to its sketches (see engagement_metrics). Both tables grow by day, not by traffic.
+    Clearing the watermark rebuilds them from whatever raw rows exist.
+    Must be called inside an application context.
+
+    Returns:
+        A dict with the number of windows, daily groups and session/tool pairs processed.
+    """
+    now = now or datetime.utcnow()
+    cutoff = floor_hour(now - ROLLUP_LAG)
+    state = db.session.get(RollupState, ROLLUP_NAME)
+    if state is None:
+        state = RollupState(name=ROLLUP_NAME, watermark=None)
+        db.session.add(state)
+    if state.watermark is None:
+        first_event = db.session.query(func.min(ToolUsage.created_at)).scalar()
+        if first_event is None:
+            state.watermark = cutoff
+            state.updated_at = now
+            db.session.commit()
+            return {'windows': 0, 'daily_groups': 0, 'session_tools': 0}
+        state.watermark = floor_hour(_to_datetime(first_event))
+
+    report = {'windows': 0, 'daily_groups': 0, 'session_tools': 0}
+    window_start = state.watermark
+    while window_start < cutoff:
+        window_end = min(next_midnight(window_start), cutoff)
+        try:
+            report['daily_groups'] += _rollup_day(window_start.date(), window_end)
+            report['session_tools'] += _sketch_sessions(window_start.date(), window_start, window_end)
+            state.watermark = window_end
+            state.updated_at = datetime.utcnow()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            logger.exception(f"Failed to roll up tool usage window {window_start} - {window_end}")
+            raise
+        report['windows'] += 1
+        window_start = window_end
+    logger.info(f"Tool usage rollups refreshed up to {state.watermark}: {report}")
+    return report
+
+def get_rollup_watermark():
+    state = db.session.get(RollupState, ROLLUP_NAME)
+    return state.watermark if state else None
@@ -0,0 +1,244 @@
+import logging
+import os
+import socket
+import threading
+from datetime import datetime
+from sqlalchemy import text
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+logger = logging.getLogger('ficore_app.scheduler')
+
+# pg_advisory_lock key shared by every process of this app ('ficore' as an integer)
+ADVISORY_LOCK_KEY = 0x6669636f7265
+LEADER_NAME = 'scheduler'
+
+def process_identity():
+    return {'hostname': socket.gethostname(), 'pid': os.getpid()}
+
+class AdvisoryLock:
+    """
+    Session-level PostgreSQL advisory lock held on a dedicated connection.
+
+    The lock is released by the server when the connection (and so the process) dies,
+    which is what lets another process take over.
+    """
+
+    def __init__(self, engine, key=ADVISORY_LOCK_KEY):
+        self.engine = engine
+        self.key = key
+        self._connection = None
+
+    def acquire(self):
+        connection = self.engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        try:
+            acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {'key': self.key}).scalar()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._connection = connection
+        return True
+
+    def check(self):
+        """Return True while the lock connection is alive (and so still holds the lock)."""
+        if self._connection is None:
+            return False
+        try:
+            self._connection.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.error(f"Scheduler advisory lock connection lost: {str(e)}")
+            self.release()
+            return False
+
+    def release(self):
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': self.key})
+        except Exception:
+            pass
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+
+class FileLock:
+    """
+    Exclusive flock on a file next to the SQLite database.
+
+    The kernel drops the lock when the holding process exits. Only coordinates processes on
+    one host, which is the only setup SQLite supports anyway.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def acquire(self):
+        if fcntl is None:
+            logger.warning("fcntl unavailable; assuming this is the only scheduler process")
+            return True
+        handle = open(self.path, 'a+')
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        identity = process_identity()
+        handle.seek(0)
+        handle.truncate()
+        handle.write(f"{identity['hostname']}:{identity['pid']}\n")
+        handle.flush()
+        self._file = handle
+        return True
+
+    def check(self):
+        return fcntl is None or self._file is not None
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+def create_leader_lock(app, engine):
+    if engine.dialect.name == 'postgresql':
+        return AdvisoryLock(engine)
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'scheduler.lock')
+    return FileLock(app.config.get('SCHEDULER_LOCK_FILE') or default_path)
+
+class SchedulerLeadership:
+    """
+    Runs the scheduler in exactly one process.
+
+    Every process tries to take the leader lock; the winner starts the scheduler and
+    heartbeats the scheduler_leader row, the others retry every check interval and take over
+    when the leader's lock is released (process exit, lost database connection).
+
+    Args:
+        app: Flask application.
+        on_elected: Called with no arguments when this process becomes leader.
+        on_deposed: Called with no arguments when this process loses leadership.
+        check_interval: Seconds between lock checks / acquisition attempts.
+    """
+
+    def __init__(self, app, on_elected, on_deposed, check_interval=15):
+        self.app = app
+        self.on_elected = on_elected
+        self.on_deposed = on_deposed
+        self.check_interval = check_interval
+        self.is_leader = False
+        self.elected_at = None
+        self.lock = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def start(self):
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='scheduler-leadership', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Scheduler leadership check failed: {str(e)}")
+            self._stop.wait(self.check_interval)
+
+    def tick(self):
+        """Run one election / health check round."""
+        from extensions import db
+        with self.app.app_context():
+            if self.lock is None:
+                self.lock = create_leader_lock(self.app, db.engine)
+            if self.is_leader:
+                if self.lock.check():
+                    self._heartbeat()
+                    return
+                self.is_leader = False
+                self.elected_at = None
+                logger.warning(f"Process {os.getpid()} lost scheduler leadership")
+                self.on_deposed()
+                return
+            if self.lock.acquire():
+                self.is_leader = True
+                self.elected_at = datetime.utcnow()
+                logger.info(f"Process {os.getpid()} on {socket.gethostname()} elected scheduler leader")
+                self._heartbeat()
+                try:
+                    self.on_elected()
+                except Exception:
+                    self.lock.release()
+                    self.is_leader = False
+                    self.elected_at = None
+                    raise
+
+    def _heartbeat(self):
+        from extensions import db
+        from models import SchedulerLeader
+        table = SchedulerLeader.__table__
+        identity = process_identity()
+        values = {
+            'holder': f"{identity['hostname']}:{identity['pid']}",
+            'hostname': identity['hostname'],
+            'pid': identity['pid'],
+            'acquired_at': self.elected_at,
+            'heartbeat_at': datetime.utcnow()
+        }
+        try:
+            result = db.session.execute(table.update().where(table.c.name == LEADER_NAME).values(**values))
+            if result.rowcount == 0:
+                db.session.execute(table.insert().values(name=LEADER_NAME, **values))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Failed to record scheduler heartbeat: {str(e)}")
+        finally:
+            db.session.remove()
+
+    def stop(self):
+        """Stop electing and give up leadership (called at interpreter exit)."""
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        if self.is_leader:
+            self.is_leader = False
+            self.on_deposed()
+        if self.lock is not None:
+            self.lock.release()
+
+    def status(self):
+        """Describe this process's role and the last recorded leader."""
+        from extensions import db
+        from models import SchedulerLeader
+        identity = process_identity()
+        leader = db.session.get(SchedulerLeader, LEADER_NAME)
+        heartbeat_age = (datetime.utcnow() - leader.heartbeat_at).total_seconds() if leader and leader.heartbeat_at else None
+        return {
+            'process': {
+                **identity,
+                'role': 'leader' if self.is_leader else 'follower',
+                'elected_at': self.elected_at.isoformat() + 'Z' if self.elected_at else None
+            },
+            'leader': leader.to_dict() if leader else None,
+            'heartbeat_age_seconds': round(heartbeat_age, 1) if heartbeat_age is not None else None,
+            # A heartbeat older than a few check intervals means the holder is gone or stuck
+            'leader_stale': heartbeat_age is None or heartbeat_age > 3 * self.check_interval,
+            'lock_backend': 'postgres_advisory_lock' if isinstance(self.lock, AdvisoryLock) else 'file_lock'
+        }
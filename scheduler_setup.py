@@ -1,107 +1,132 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
-from datetime import datetime, date, timedelta
-from flask import current_app, url_for, session
 from extensions import db
-from models import Bill, User
-from mailersend_email import send_email, trans, EMAIL_CONFIG
+from bill_jobs import run_bill_reminders, run_overdue_update
+from rollups import refresh_tool_usage_rollups
+from scheduler_lock import SchedulerLeadership
+from snapshots import run_scheduled_snapshot
 import atexit
+import os
+
+# Application the scheduler was started for; jobs run in the scheduler's thread pool,
+# outside any request or application context.
+scheduler_app = None
 
 def update_overdue_status():
     """Update status to overdue for past-due bills."""
-    with current_app.app_context():
+    with scheduler_app.app_context():
         try:
-            today = date.today()
-            bills = Bill.query.filter(Bill.status.in_(['pending', 'unpaid'])).all()
-            for bill in bills:
-                if bill.due_date < today:
-                    bill.status = 'overdue'
-            db.session.commit()
-            current_app.logger.info(f"Updated {len(bills)} overdue bill statuses")
+            run_overdue_update()
         except Exception as e:
-            current_app.logger.exception(f"Error in update_overdue_status: {str(e)}")
+            scheduler_app.logger.exception(f"Error in update_overdue_status: {str(e)}")
             db.session.rollback()
 
 def send_bill_reminders():
     """Send reminders for upcoming and overdue bills."""
-    with current_app.app_context():
+    with scheduler_app.app_context():
         try:
-            today = date.today()
-            user_bills = {}
-            bills = Bill.query.all()
-            for bill in bills:
-                email = bill.user.email if bill.user_id and bill.user else bill.user_email
-                lang = bill.user.lang if bill.user_id and bill.user else session.get('lang', 'en')
-                if bill.send_email and email:
-                    reminder_window = today + timedelta(days=bill.reminder_days or 7)
-                    if (bill.status in ['pending', 'overdue'] or 
-                        (today <= bill.due_date <= reminder_window)):
-                        if email not in user_bills:
-                            user_bills[email] = {
-                                'first_name': bill.user.first_name if bill.user_id and bill.user else bill.first_name or 'User',
-                                'bills': [],
-                                'lang': lang
-                            }
-                        user_bills[email]['bills'].append({
-                            'bill_name': bill.bill_name,
-                            'amount': bill.amount,
-                            'due_date': bill.due_date.strftime('%Y-%m-%d'),
-                            'category': trans(f"bill_category_{bill.category}", lang=lang),
-                            'status': trans(f"bill_status_{bill.status}", lang=lang)
-                        })
+            run_bill_reminders(scheduler_app)
+        except Exception as e:
+            scheduler_app.logger.exception(f"Error in send_bill_reminders: {str(e)}")
+            db.session.rollback()
 
-            for email, data in user_bills.items():
-                try:
-                    config = EMAIL_CONFIG["bill_reminder"]
-                    subject = trans(config["subject_key"], lang=data['lang'])
-                    send_email(
-                        app=current_app,
-                        logger=current_app.logger,
-                        to_email=email,
-                        subject=subject,
-                        template_name=config["template"],
-                        data={
-                            'first_name': data['first_name'],
-                            'bills': data['bills'],
-                            'cta_url': url_for('bill.dashboard', _external=True),
-                            'unsubscribe_url': url_for('bill.unsubscribe', email=email, _external=True)
-                        },
-                        lang=data['lang']
-                    )
-                    current_app.logger.info(f"Sent bill reminder email to {email}")
-                except Exception as e:
-                    current_app.logger.error(f"Failed to send reminder email to {email}: {str(e)}")
+def refresh_rollups():
+    """Fold new tool usage rows into the admin rollup tables."""
+    with scheduler_app.app_context():
+        try:
+            refresh_tool_usage_rollups()
         except Exception as e:
-            current_app.logger.exception(f"Error in send_bill_reminders: {str(e)}")
+            scheduler_app.logger.exception(f"Error in refresh_rollups: {str(e)}")
 
-def init_scheduler(app):
-    """Initialize the background scheduler."""
-    try:
-        jobstores = {
-            'default': SQLAlchemyJobStore(url=app.config['SQLALCHEMY_DATABASE_URI'])
-        }
-        scheduler = BackgroundScheduler(jobstores=jobstores)
+def snapshot_database():
+    """Write an incremental (periodically full) database snapshot."""
+    with scheduler_app.app_context():
+        try:
+            run_scheduled_snapshot()
+        except Exception as e:
+            scheduler_app.logger.exception(f"Error in snapshot_database: {str(e)}")
+
+def start_scheduler():
+    """Create and start the BackgroundScheduler; only called in the elected leader process."""
+    app = scheduler_app
+    jobstores = {
+        'default': SQLAlchemyJobStore(url=app.config['SQLALCHEMY_DATABASE_URI'])
+    }
+    scheduler = BackgroundScheduler(jobstores=jobstores)
+    scheduler.add_job(
+        func=send_bill_reminders,
+        trigger='interval',
+        days=1,
+        id='bill_reminders',
+        name='Send bill reminders daily',
+        replace_existing=True
+    )
+    scheduler.add_job(
+        func=update_overdue_status,
+        trigger='interval',
+        days=1,
+        id='overdue_status',
+        name='Update overdue bill statuses daily',
+        replace_existing=True
+    )
+    scheduler.add_job(
+        func=refresh_rollups,
+        trigger='interval',
+        minutes=int(os.environ.get('ROLLUP_INTERVAL_MINUTES', 15)),
+        id='tool_usage_rollups',
+        name='Refresh tool usage rollups',
+        replace_existing=True
+    )
+    if os.environ.get('SNAPSHOT_ENABLED', 'true').lower() == 'true':
         scheduler.add_job(
-            func=send_bill_reminders,
+            func=snapshot_database,
             trigger='interval',
-            days=1,
-            id='bill_reminders',
-            name='Send bill reminders daily',
-            replace_existing=True
+            hours=int(os.environ.get('SNAPSHOT_INTERVAL_HOURS', 24)),
+            id='database_snapshot',
+            name='Snapshot database tables',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
         )
-        scheduler.add_job(
-            func=update_overdue_status,
-            trigger='interval',
-            days=1,
-            id='overdue_status',
-            name='Update overdue bill statuses daily',
-            replace_existing=True
+    scheduler.start()
+    app.config['SCHEDULER'] = scheduler
+    app.logger.info("Bill reminder, overdue status and rollup scheduler started successfully")
+    return scheduler
+
+def stop_scheduler():
+    """Shut down this process's scheduler after losing (or giving up) leadership."""
+    scheduler = scheduler_app.config.pop('SCHEDULER', None)
+    if scheduler is not None and scheduler.running:
+        scheduler.shutdown(wait=False)
+        scheduler_app.logger.info("Scheduler stopped")
+
+def init_scheduler(app):
+    """
+    Start leader election for the background scheduler.
+
+    Every gunicorn worker calls this, but only the process holding the leader lock (an
+    advisory lock on PostgreSQL, a lock file with SQLite) runs the jobs; the others take over
+    if it exits. Set SCHEDULER_ENABLED=false to keep a process out of the election.
+    """
+    global scheduler_app
+    scheduler_app = app
+    app.config.setdefault('SCHEDULER_ENABLED', os.environ.get('SCHEDULER_ENABLED', 'true').lower() == 'true')
+    app.config.setdefault('SCHEDULER_LEADER_CHECK_SECONDS', int(os.environ.get('SCHEDULER_LEADER_CHECK_SECONDS', 15)))
+    app.config.setdefault('SCHEDULER_LOCK_FILE', os.environ.get('SCHEDULER_LOCK_FILE'))
+    if not app.config['SCHEDULER_ENABLED']:
+        app.logger.info("Scheduler disabled for this process")
+        return None
+    try:
+        leadership = SchedulerLeadership(
+            app,
+            on_elected=start_scheduler,
+            on_deposed=stop_scheduler,
+            check_interval=app.config['SCHEDULER_LEADER_CHECK_SECONDS']
         )
-        scheduler.start()
-        app.config['SCHEDULER'] = scheduler
-        app.logger.info("Bill reminder and overdue status scheduler started successfully")
-        atexit.register(lambda: scheduler.shutdown())
-        return scheduler
+        app.extensions['scheduler_leadership'] = leadership
+        leadership.start()
+        atexit.register(leadership.stop)
+        return leadership
     except Exception as e:
         app.logger.error(f"Failed to initialize scheduler: {str(e)}")
         raise
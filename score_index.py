@@ -0,0 +1,95 @@
+import logging
+from sqlalchemy import func, case
+from extensions import db
+from models import FinancialHealth, FinancialHealthScoreBucket
+
+logger = logging.getLogger('ficore_app.financial_health')
+
+MIN_SCORE = 0
+MAX_SCORE = 100
+
+def score_bucket(score):
+    """Map a score to its integer histogram bucket (0-100)."""
+    return max(MIN_SCORE, min(MAX_SCORE, int(round(score))))
+
+def _adjust(score, count_delta):
+    # Buckets are seeded up front (seed_score_buckets), so this is always a plain UPDATE;
+    # inserting on a miss would race between concurrent first scores in the same bucket
+    bucket = score_bucket(score)
+    table = FinancialHealthScoreBucket.__table__
+    result = db.session.execute(
+        table.update()
+        .where(table.c.bucket == bucket)
+        .values(count=table.c.count + count_delta, score_sum=table.c.score_sum + count_delta * score)
+    )
+    if result.rowcount == 0:
+        logger.error(f"Score bucket {bucket} is missing; run `flask rebuild-score-index`")
+
+def seed_score_buckets():
+    """Insert any missing histogram bucket rows with zero counts (idempotent)."""
+    existing = {bucket for bucket, in db.session.query(FinancialHealthScoreBucket.bucket)}
+    missing = [b for b in range(MIN_SCORE, MAX_SCORE + 1) if b not in existing]
+    if missing:
+        db.session.add_all([FinancialHealthScoreBucket(bucket=b, count=0, score_sum=0.0) for b in missing])
+        db.session.commit()
+        logger.info(f"Seeded {len(missing)} financial health score buckets")
+
+def record_score_change(old_score, new_score):
+    """
+    Move a step-3 score between histogram buckets in the caller's transaction.
+
+    Args:
+        old_score: Previous score of the record, or None for a new record.
+        new_score: New score of the record, or None when the record is removed.
+    """
+    if old_score is not None:
+        _adjust(old_score, -1)
+    if new_score is not None:
+        _adjust(new_score, 1)
+
+def score_ranking(score):
+    """
+    Return rank, percentile, total and average for a score using the histogram.
+
+    Reads at most 101 bucket rows regardless of how many records exist.
+    """
+    bucket = score_bucket(score or 0)
+    total, score_sum, above = db.session.query(
+        func.coalesce(func.sum(FinancialHealthScoreBucket.count), 0),
+        func.coalesce(func.sum(FinancialHealthScoreBucket.score_sum), 0.0),
+        func.coalesce(func.sum(case((FinancialHealthScoreBucket.bucket > bucket, FinancialHealthScoreBucket.count), else_=0)), 0)
+    ).one()
+    total = int(total)
+    if not total:
+        return {'rank': 0, 'percentile': 0.0, 'total_users': 0, 'average_score': 0}
+    rank = int(above) + 1
+    return {
+        'rank': rank,
+        'percentile': round((total - rank) / total * 100, 2),
+        'total_users': total,
+        'average_score': score_sum / total
+    }
+
+def rebuild_score_index():
+    """Recompute the histogram from the financial_health table."""
+    bucket = func.round(FinancialHealth.score)
+    rows = db.session.query(
+        bucket,
+        func.count(FinancialHealth.id),
+        func.sum(FinancialHealth.score)
+    ).filter(
+        FinancialHealth.step == 3,
+        FinancialHealth.score.isnot(None)
+    ).group_by(bucket).all()
+    counts = {}
+    for value, count, total in rows:
+        entry = counts.setdefault(score_bucket(value), [0, 0.0])
+        entry[0] += count
+        entry[1] += total or 0.0
+    db.session.query(FinancialHealthScoreBucket).delete()
+    db.session.add_all([
+        FinancialHealthScoreBucket(bucket=b, count=counts.get(b, [0, 0.0])[0], score_sum=counts.get(b, [0, 0.0])[1])
+        for b in range(MIN_SCORE, MAX_SCORE + 1)
+    ])
+    db.session.commit()
+    logger.info(f"Rebuilt financial health score index from {sum(c[0] for c in counts.values())} records")
@@ -0,0 +1,137 @@
+import logging
+import pickle
+import threading
+import time
+import zlib
+from flask import has_request_context, request
+from flask_session.sessions import RedisSessionInterface
+
+logger = logging.getLogger('ficore_app.session')
+
+# Multi-step wizard payloads held in the session between steps
+WIZARD_SESSION_KEYS = {
+    'budget_step1', 'budget_step2', 'budget_step3', 'budget_step4',
+    'health_step1', 'health_step2',
+    'emergency_fund_data', 'emergency_fund_step2', 'emergency_fund_step3',
+    'networth_step1_data', 'networth_step2_data', 'networth_step3_data',
+    'bill_step1', 'bill_step2',
+    'quiz_data', 'quiz_results'
+}
+# Form fields that are captured by form.data but never read back from the session
+TRANSIENT_FORM_FIELDS = ('csrf_token', 'submit')
+
+# Payloads at least this large are zlib-compressed
+COMPRESS_THRESHOLD = 512
+_RAW = b'\x00'
+_ZLIB = b'\x01'
+
+class CompactSessionSerializer:
+    """
+    Pickle-compatible serializer that trims wizard payloads and compresses large sessions.
+
+    Values are framed with a one-byte marker so compressed and uncompressed payloads can be
+    told apart; data written by the stock pickle serializer is still readable.
+    """
+
+    def dumps(self, data):
+        compact = {}
+        for key, value in data.items():
+            if key in WIZARD_SESSION_KEYS and isinstance(value, dict):
+                value = {k: v for k, v in value.items() if k not in TRANSIENT_FORM_FIELDS}
+            compact[key] = value
+        payload = pickle.dumps(compact, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) >= COMPRESS_THRESHOLD:
+            return _ZLIB + zlib.compress(payload, 6)
+        return _RAW + payload
+
+    def loads(self, value):
+        try:
+            marker, payload = value[:1], value[1:]
+            if marker == _ZLIB:
+                return pickle.loads(zlib.decompress(payload))
+            if marker == _RAW:
+                return pickle.loads(payload)
+            # Legacy value written by the plain pickle serializer
+            return pickle.loads(value)
+        except (zlib.error, EOFError, ValueError, TypeError) as e:
+            raise pickle.UnpicklingError(str(e))
+
+class CompactRedisSessionInterface(RedisSessionInterface):
+    """Flask-Session Redis backend using CompactSessionSerializer."""
+
+    serializer = CompactSessionSerializer()
+
+class LocalRedis:
+    """
+    Minimal in-process stand-in for the parts of redis.Redis used by the session store.
+
+    Selected with REDIS_URL=memory:// for tests and single-process development; it is not
+    shared between processes.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name, value, ex=None):
+        with self._lock:
+            self._data[name] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(1 for name in names if self._data.pop(name, None) is not None)
+
+def create_redis_client(url):
+    """Return a Redis client for url, or a LocalRedis for 'memory://'."""
+    if url.startswith('memory://'):
+        return LocalRedis()
+    import redis
+    return redis.Redis.from_url(
+        url,
+        socket_timeout=2,
+        socket_connect_timeout=2,
+        health_check_interval=30
+    )
+
+def skip_static_sessions(interface):
+    """
+    Never save the session or send a session cookie for the static endpoint.
+
+    Fingerprinted assets are served as public and immutable; a Set-Cookie on them stops
+    shared caches from storing them, or gets the cookie cached. Flask-Session's
+    save_session checks should_set_cookie first, so vetoing it there covers every backend.
+    """
+    should_set_cookie = interface.should_set_cookie
+
+    def should_set_cookie_unless_static(app, session):
+        if has_request_context() and request.endpoint == 'static':
+            return False
+        return should_set_cookie(app, session)
+    interface.should_set_cookie = should_set_cookie_unless_static
+    return interface
+
+def init_session_interface(app):
+    """Install the compact Redis session interface when SESSION_TYPE is 'redis'; skip sessions for static files."""
+    if app.config.get('SESSION_TYPE') != 'redis':
+        skip_static_sessions(app.session_interface)
+        return
+    app.session_interface = skip_static_sessions(CompactRedisSessionInterface(
+        app.config['SESSION_REDIS'],
+        app.config.get('SESSION_KEY_PREFIX', 'session:'),
+        app.config.get('SESSION_USE_SIGNER', False),
+        app.config.get('SESSION_PERMANENT', True),
+        app.config.get('SESSION_ID_LENGTH', 32)
+    ))
+    logger.info("Compact Redis session interface installed")
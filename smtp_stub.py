@@ -0,0 +1,122 @@
+"""
+Minimal local SMTP server that accepts and records every message.
+
+Point the 'smtp' email provider at it to exercise the outbox without sending real mail:
+
+    python smtp_stub.py --port 1025
+    SMTP_HOST=localhost SMTP_PORT=1025 EMAIL_PROVIDERS=smtp flask run
+
+In-process use (e.g. from a test):
+
+    with SMTPStub(port=0) as stub:
+        os.environ['SMTP_PORT'] = str(stub.port)
+        ...
+        assert stub.messages[0]['rcpt_tos'] == ['user@example.com']
+"""
+import argparse
+import email
+import logging
+import socketserver
+import threading
+
+logger = logging.getLogger('ficore_app.smtp_stub')
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode('ascii'))
+
+    def handle(self):
+        mail_from, rcpt_tos = None, []
+        self._reply('220 ficore-smtp-stub ready')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+            if verb in ('HELO', 'EHLO'):
+                self._reply('250 ficore-smtp-stub')
+            elif verb == 'AUTH':
+                self._reply('235 Authentication successful')
+            elif verb == 'MAIL':
+                mail_from, rcpt_tos = command.split(':', 1)[1].strip().strip('<>'), []
+                self._reply('250 OK')
+            elif verb == 'RCPT':
+                rcpt_tos.append(command.split(':', 1)[1].strip().strip('<>'))
+                self._reply('250 OK')
+            elif verb == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(data_line[1:] if data_line.startswith(b'..') else data_line)
+                raw = b''.join(lines)
+                self.server.record(mail_from, rcpt_tos, raw)
+                self._reply('250 OK: queued')
+            elif verb == 'RSET':
+                mail_from, rcpt_tos = None, []
+                self._reply('250 OK')
+            elif verb == 'NOOP':
+                self._reply('250 OK')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    """Threaded SMTP sink; received messages are kept in `messages`."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='localhost', port=1025):
+        super().__init__((host, port), _SMTPHandler)
+        self.messages = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def record(self, mail_from, rcpt_tos, raw):
+        message = email.message_from_bytes(raw)
+        with self._lock:
+            self.messages.append({
+                'mail_from': mail_from,
+                'rcpt_tos': list(rcpt_tos),
+                'subject': message.get('Subject'),
+                'raw': raw
+            })
+        logger.info(f"Captured email from {mail_from} to {rcpt_tos}: {message.get('Subject')}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='smtp-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a local SMTP sink that logs received messages.')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=1025)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    server = SMTPStub(args.host, args.port)
+    logger.info(f"SMTP stub listening on {args.host}:{server.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
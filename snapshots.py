@@ -0,0 +1,276 @@
+import base64
+import gzip
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime, date, timedelta
+from sqlalchemy import select, text, Date, DateTime, Integer, LargeBinary
+from extensions import db
+
+logger = logging.getLogger('ficore_app.snapshots')
+
+SNAPSHOT_FORMATS = ('ndjson', 'parquet')
+# Caches and process state that are rebuilt on their own
+SNAPSHOT_EXCLUDED_TABLES = {'dashboard_summaries', 'scheduler_leader'}
+# Rows newer than this are left for the next run, so rows written late by the tool usage
+# buffer (created_at is stamped at enqueue time) are not skipped by the high-water mark
+SNAPSHOT_LAG = timedelta(minutes=5)
+MANIFEST_NAME = 'manifest.json'
+
+def snapshot_dir():
+    return os.environ.get('SNAPSHOT_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'snapshots')
+
+def snapshot_tables():
+    """Tables to snapshot, in foreign key dependency order."""
+    return [table for table in db.metadata.sorted_tables if table.name not in SNAPSHOT_EXCLUDED_TABLES]
+
+def _encode(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    return value
+
+def _decoder(column):
+    if isinstance(column.type, DateTime):
+        return lambda value: datetime.fromisoformat(value) if value else None
+    if isinstance(column.type, Date):
+        return lambda value: date.fromisoformat(value[:10]) if value else None
+    if isinstance(column.type, LargeBinary):
+        return base64.b64decode
+    return None
+
+def list_snapshots(directory=None):
+    """Return manifests of completed runs, oldest first."""
+    directory = directory or snapshot_dir()
+    if not os.path.isdir(directory):
+        return []
+    manifests = []
+    for run_id in sorted(os.listdir(directory)):
+        path = os.path.join(directory, run_id, MANIFEST_NAME)
+        if os.path.exists(path):
+            with open(path) as f:
+                manifests.append(json.load(f))
+    return manifests
+
+def _write_chunk(path, rows, columns, fmt):
+    if fmt == 'parquet':
+        try:
+            import pandas as pd
+            pd.DataFrame(rows, columns=columns).to_parquet(path, compression='gzip', index=False)
+        except ImportError as e:
+            raise RuntimeError(f"Parquet snapshots need pyarrow or fastparquet installed: {str(e)}")
+        return
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=6) as f:
+        for row in rows:
+            f.write(json.dumps(dict(zip(columns, (_encode(v) for v in row))), separators=(',', ':')))
+            f.write('\n')
+
+def _export_table(table, run_path, fmt, chunk_rows, since, until):
+    columns = [column.name for column in table.columns]
+    incremental = 'created_at' in table.c
+    stmt = select(table)
+    if incremental:
+        stmt = stmt.where(table.c.created_at <= until)
+        if since is not None:
+            stmt = stmt.where(table.c.created_at > since)
+        stmt = stmt.order_by(table.c.created_at, *table.primary_key.columns)
+    extension = 'parquet' if fmt == 'parquet' else 'ndjson.gz'
+    files, rows, count = [], [], 0
+    result = db.session.execute(stmt.execution_options(yield_per=min(chunk_rows, 5000)))
+    for row in result:
+        rows.append(tuple(row))
+        if len(rows) >= chunk_rows:
+            files.append(f"{table.name}-{len(files):04d}.{extension}")
+            _write_chunk(os.path.join(run_path, files[-1]), rows, columns, fmt)
+            count += len(rows)
+            rows = []
+    if rows:
+        files.append(f"{table.name}-{len(files):04d}.{extension}")
+        _write_chunk(os.path.join(run_path, files[-1]), rows, columns, fmt)
+        count += len(rows)
+    return {
+        'mode': 'incremental' if incremental else 'full',
+        'rows': count,
+        'files': files,
+        'columns': columns,
+        'since': since.isoformat() if since else None,
+        'until': until.isoformat() if incremental else None
+    }
+
+def create_snapshot(full=False, fmt='ndjson', chunk_rows=None, directory=None):
+    """
+    Export every table to compressed, chunked files under SNAPSHOT_DIR/<run_id>/.
+
+    Tables with a created_at column are exported incrementally: only rows created after
+    the previous run's high-water mark are written, unless full=True or there is no
+    previous run. Other tables (small lookup, rollup and state tables) are copied in full
+    on every run. Note that the high-water mark tracks inserts only; run a full snapshot
+    periodically to capture updates to existing rows (see SNAPSHOT_FULL_INTERVAL_DAYS).
+
+    Must run in an app context.
+
+    Returns:
+        The run manifest.
+    """
+    if fmt not in SNAPSHOT_FORMATS:
+        raise ValueError(f"Invalid snapshot format '{fmt}'. Valid values: {list(SNAPSHOT_FORMATS)}")
+    started = time.monotonic()
+    directory = directory or snapshot_dir()
+    chunk_rows = chunk_rows or int(os.environ.get('SNAPSHOT_CHUNK_ROWS', 50000))
+    previous = list_snapshots(directory)
+    base = previous[-1] if previous and not full else None
+    now = datetime.utcnow()
+    until = now - SNAPSHOT_LAG
+    run_id = now.strftime('%Y%m%dT%H%M%SZ') + ('-full' if base is None else '-incr')
+    run_path = os.path.join(directory, run_id)
+    tmp_path = run_path + '.tmp'
+    os.makedirs(tmp_path, exist_ok=True)
+
+    manifest = {
+        'run_id': run_id,
+        'created_at': now.isoformat() + 'Z',
+        'type': 'full' if base is None else 'incremental',
+        'base': base['run_id'] if base else None,
+        'format': fmt,
+        'tables': {}
+    }
+    try:
+        for table in snapshot_tables():
+            since = None
+            if base is not None and table.name in base['tables']:
+                watermark = base['tables'][table.name].get('until')
+                since = datetime.fromisoformat(watermark) if watermark else None
+            manifest['tables'][table.name] = _export_table(table, tmp_path, fmt, chunk_rows, since, until)
+        db.session.rollback()
+        manifest['duration_seconds'] = round(time.monotonic() - started, 3)
+        with open(os.path.join(tmp_path, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        # Publish atomically so a half-written run is never picked as the next base
+        os.rename(tmp_path, run_path)
+    except Exception:
+        db.session.rollback()
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    total = sum(info['rows'] for info in manifest['tables'].values())
+    logger.info(f"Snapshot {run_id} ({manifest['type']}, {fmt}) wrote {total} rows in {manifest['duration_seconds']}s")
+    return manifest
+
+def _chain(run_id, manifests):
+    """Manifests needed to restore run_id: its full base followed by each incremental run."""
+    by_id = {manifest['run_id']: manifest for manifest in manifests}
+    if run_id not in by_id:
+        raise ValueError(f"Snapshot '{run_id}' not found")
+    chain = []
+    current = by_id[run_id]
+    while current is not None:
+        chain.append(current)
+        if current['base'] is None:
+            break
+        if current['base'] not in by_id:
+            raise ValueError(f"Snapshot '{current['run_id']}' depends on missing snapshot '{current['base']}'")
+        current = by_id[current['base']]
+    return list(reversed(chain))
+
+def _read_chunk(path, fmt):
+    if fmt == 'parquet':
+        import pandas as pd
+        frame = pd.read_parquet(path)
+        return frame.astype(object).where(frame.notna(), None).to_dict('records')
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def _reset_sequences(tables):
+    """
+    Move Postgres serial sequences past the restored ids.
+
+    Explicit ids in the reinserted rows do not advance the sequences, so the next insert
+    into e.g. users, content_metadata or email_outbox would reuse an id and fail.
+    pg_get_serial_sequence is NULL for integer columns without a sequence and setval
+    then does nothing.
+    """
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    for table in tables:
+        for column in table.primary_key.columns:
+            if not isinstance(column.type, Integer):
+                continue
+            db.session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence(:table, :column), "
+                f"COALESCE((SELECT MAX({column.name}) FROM {table.name}), 0) + 1, false)"
+            ), {'table': table.name, 'column': column.name})
+
+def restore_snapshot(run_id=None, tables=None, directory=None):
+    """
+    Replace table contents with the state captured by run_id (default: latest run).
+
+    Replays the run's full base and every incremental run after it. Selected tables are
+    emptied first, then loaded parent-first in one transaction; on Postgres the serial
+    sequences of the loaded tables are then reset to follow the restored ids. Must run in
+    an app context.
+
+    Returns:
+        A dict of {table name: rows restored}.
+    """
+    directory = directory or snapshot_dir()
+    manifests = list_snapshots(directory)
+    if not manifests:
+        raise ValueError(f"No snapshots found in {directory}")
+    chain = _chain(run_id or manifests[-1]['run_id'], manifests)
+    selected = [table for table in snapshot_tables() if tables is None or table.name in tables]
+    restored = {}
+    try:
+        for table in reversed(selected):
+            db.session.execute(table.delete())
+        for table in selected:
+            decoders = {column.name: _decoder(column) for column in table.columns}
+            decoders = {name: fn for name, fn in decoders.items() if fn is not None}
+            restored[table.name] = 0
+            entries = [m for m in chain if table.name in m['tables']]
+            # Tables copied in full on every run only need the latest copy
+            if entries and entries[-1]['tables'][table.name]['mode'] == 'full':
+                entries = entries[-1:]
+            for manifest in entries:
+                run_path = os.path.join(directory, manifest['run_id'])
+                for filename in manifest['tables'][table.name]['files']:
+                    rows = _read_chunk(os.path.join(run_path, filename), manifest['format'])
+                    for row in rows:
+                        for name, decode in decoders.items():
+                            if isinstance(row.get(name), str):
+                                row[name] = decode(row[name])
+                    if rows:
+                        db.session.execute(table.insert(), rows)
+                    restored[table.name] += len(rows)
+        _reset_sequences(selected)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    logger.info(f"Restored snapshot {chain[-1]['run_id']}: {restored}")
+    return restored
+
+def prune_snapshots(keep_full=None, directory=None):
+    """Delete runs older than the newest keep_full full snapshots (and their incrementals)."""
+    directory = directory or snapshot_dir()
+    keep_full = keep_full or int(os.environ.get('SNAPSHOT_KEEP_FULL', 4))
+    manifests = list_snapshots(directory)
+    fulls = [i for i, manifest in enumerate(manifests) if manifest['type'] == 'full']
+    if len(fulls) <= keep_full:
+        return []
+    removed = [manifest['run_id'] for manifest in manifests[:fulls[-keep_full]]]
+    for run_id in removed:
+        shutil.rmtree(os.path.join(directory, run_id), ignore_errors=True)
+    logger.info(f"Pruned {len(removed)} old snapshot runs")
+    return removed
+
+def run_scheduled_snapshot():
+    """Scheduler entry point: incremental run, promoted to full every SNAPSHOT_FULL_INTERVAL_DAYS."""
+    full_interval = timedelta(days=int(os.environ.get('SNAPSHOT_FULL_INTERVAL_DAYS', 7)))
+    fulls = [m for m in list_snapshots() if m['type'] == 'full']
+    last_full = datetime.fromisoformat(fulls[-1]['created_at'].rstrip('Z')) if fulls else None
+    full = last_full is None or datetime.utcnow() - last_full >= full_interval
+    manifest = create_snapshot(full=full, fmt=os.environ.get('SNAPSHOT_FORMAT', 'ndjson'))
+    prune_snapshots()
+    return manifest
@@ -0,0 +1,38 @@
+import logging
+import time
+
+logger = logging.getLogger('ficore_app.startup')
+
+class StartupTimer:
+    """
+    Wall-clock cost of each create_app phase.
+
+    mark(phase) records the time since the previous mark (or since started, for the first
+    one). The report is logged when the app is ready and kept in app.extensions so
+    `flask ficore timings` can print it.
+
+    Args:
+        started: perf_counter() value the first phase is measured from (e.g. taken before
+            the module's imports, so 'imports' covers them).
+    """
+
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self._last = self.started
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self._last) * 1000))
+        self._last = now
+
+    @property
+    def total_ms(self):
+        return (self._last - self.started) * 1000
+
+    def report(self):
+        return {'total_ms': round(self.total_ms, 1), 'phases': {phase: round(ms, 1) for phase, ms in self.phases}}
+
+    def log(self):
+        phases = ', '.join(f"{phase}={ms:.0f}ms" for phase, ms in self.phases)
+        logger.info(f"App startup took {self.total_ms:.0f}ms: {phases}")
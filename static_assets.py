@@ -0,0 +1,180 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+from flask import request, send_file, send_from_directory, url_for, abort
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # Optional: only gzip variants are built without it
+    brotli = None
+
+logger = logging.getLogger('ficore_app.static')
+
+BUILD_DIRNAME = 'build'
+MANIFEST_NAME = 'manifest.json'
+# Text formats worth precompressing; images and icons are already compressed
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.webmanifest', '.map', '.html', '.xml'}
+# Encodings in order of preference, with the suffix of the precompressed variant
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Only these static/ subdirectories are fingerprinted; user uploads (static/uploads) and
+# anything else stay out of the build
+ASSET_DIRS = ('css', 'js', 'img', 'icons')
+HASH_CHUNK_SIZE = 1024 * 1024
+
+mimetypes.add_type('application/manifest+json', '.webmanifest')
+
+def fingerprint_name(filename, digest):
+    root, ext = os.path.splitext(filename)
+    return f"{root}.{digest}{ext}"
+
+def file_digest(path):
+    """Short sha256 content hash of path, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+def _compress(path, data):
+    """Write .br and .gz variants of data next to path, keeping only those that are smaller."""
+    encodings = []
+    if brotli is not None:
+        compressed = brotli.compress(data, quality=11)
+        if len(compressed) < len(data):
+            with open(path + '.br', 'wb') as f:
+                f.write(compressed)
+            encodings.append('br')
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(compressed) < len(data):
+        with open(path + '.gz', 'wb') as f:
+            f.write(compressed)
+        encodings.append('gzip')
+    return encodings
+
+def build_assets(static_dir):
+    """
+    Content-hash the files under ASSET_DIRS of static_dir into static_dir/build/.
+
+    Each file is copied to <name>.<hash>.<ext>; text formats also get .br (when the brotli
+    package is installed) and .gz variants. The manifest maps the original relative path to
+    the fingerprinted one so templates can keep referring to 'css/styles.css'. Other files
+    under static_dir (e.g. uploads) are still served from /static/ but not built.
+
+    Returns:
+        The manifest dict.
+    """
+    build_dir = os.path.join(static_dir, BUILD_DIRNAME)
+    tmp_dir = build_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    manifest = {}
+    for asset_dir in ASSET_DIRS:
+        for root, dirs, files in os.walk(os.path.join(static_dir, asset_dir)):
+            dirs.sort()
+            for name in sorted(files):
+                source = os.path.join(root, name)
+                relative = os.path.relpath(source, static_dir).replace(os.sep, '/')
+                digest = file_digest(source)
+                fingerprinted = fingerprint_name(relative, digest)
+                target = os.path.join(tmp_dir, fingerprinted)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copyfile(source, target)
+                encodings = []
+                if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                    with open(source, 'rb') as f:
+                        encodings = _compress(target, f.read())
+                manifest[relative] = {'path': fingerprinted, 'hash': digest, 'size': os.path.getsize(source), 'encodings': encodings}
+    os.makedirs(tmp_dir, exist_ok=True)
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.rename(tmp_dir, build_dir)
+    logger.info(f"Built {len(manifest)} static assets into {build_dir} (brotli={'yes' if brotli else 'no'})")
+    return manifest
+
+class StaticAssets:
+    """
+    Serves static files, preferring fingerprinted, precompressed builds from static/build/.
+
+    Templates call static_url('css/styles.css'). With a manifest (see `flask assets build`)
+    that yields /static/build/css/styles.<hash>.css, served with Cache-Control: immutable, a
+    content ETag and the best precompressed variant the client accepts. Without one (or with
+    STATIC_FINGERPRINT=false) it falls back to the plain /static/ URL with a short max-age.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.manifest = {}
+        self._by_path = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault('STATIC_FINGERPRINT', os.environ.get('STATIC_FINGERPRINT', 'true').lower() == 'true')
+        app.config.setdefault('STATIC_MAX_AGE', int(os.environ.get('STATIC_MAX_AGE', 3600)))
+        self.static_dir = app.static_folder
+        self.build_dir = os.path.join(self.static_dir, BUILD_DIRNAME)
+        self.load_manifest()
+        app.view_functions['static'] = self.serve
+        app.jinja_env.globals['static_url'] = self.url
+        app.extensions['static_assets'] = self
+
+    def load_manifest(self):
+        path = os.path.join(self.build_dir, MANIFEST_NAME)
+        try:
+            with open(path) as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = {}
+            logger.warning(f"No static asset manifest at {path}; run 'flask assets build' for fingerprinted URLs")
+        except (OSError, ValueError) as e:
+            self.manifest = {}
+            logger.error(f"Failed to load static asset manifest {path}: {str(e)}")
+        self._by_path = {f"{BUILD_DIRNAME}/{entry['path']}": entry for entry in self.manifest.values()}
+
+    def url(self, filename, **values):
+        """Jinja helper: URL of a static file, fingerprinted when the manifest lists it."""
+        entry = self.manifest.get(filename) if self.app.config['STATIC_FINGERPRINT'] else None
+        if entry is not None:
+            filename = f"{BUILD_DIRNAME}/{entry['path']}"
+        return url_for('static', filename=filename, **values)
+
+    def _accepted_encoding(self, entry):
+        accepted = request.accept_encodings
+        for encoding, _ in ENCODINGS:
+            if encoding in entry['encodings'] and accepted[encoding] > 0:
+                return encoding
+        return None
+
+    def serve(self, filename):
+        entry = self._by_path.get(filename)
+        if entry is None:
+            response = send_from_directory(self.static_dir, filename, max_age=self.app.config['STATIC_MAX_AGE'])
+            response.headers.setdefault('X-Content-Type-Options', 'nosniff')
+            return response
+
+        path = safe_join(self.build_dir, entry['path'])
+        if path is None:
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encoding = self._accepted_encoding(entry)
+        etag = entry['hash']
+        if encoding is not None:
+            path += dict(ENCODINGS)[encoding]
+            # Each representation needs its own validator
+            etag = f"{etag}-{encoding}"
+        response = send_file(path, mimetype=mimetype, etag=etag, max_age=IMMUTABLE_MAX_AGE, conditional=True)
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        if entry['encodings']:
+            response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.headers['X-Content-Type-Options'] = 'nosniff'
+        return response
@@ -0,0 +1,26 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The app module builds its app at import time from the environment
+_db_dir = tempfile.mkdtemp(prefix='ficore-tests-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_db_dir, 'test.db')}")
+os.environ.setdefault('SCHEDULER_ENABLED', 'false')
+os.environ.setdefault('EMAIL_WORKER_MODE', 'external')
+os.environ.setdefault('TOOL_USAGE_BUFFER_ENABLED', 'false')
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app as flask_app, initialize_database
+    flask_app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    initialize_database(flask_app)
+    return flask_app
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
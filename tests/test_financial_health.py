@@ -0,0 +1,47 @@
+import uuid
+
+from extensions import db, email_outbox
+from models import FinancialHealth, OutboundEmail
+
+def _start_health_check(client, sid, send_email):
+    with client.session_transaction() as session:
+        session['sid'] = sid
+        session['lang'] = 'en'
+        session['health_step1'] = {
+            'first_name': 'Ada',
+            'email': 'ada@example.com',
+            'user_type': 'individual',
+            'send_email': send_email
+        }
+        session['health_step2'] = {'income': 500000.0, 'expenses': 300000.0}
+
+def test_step3_queues_email_with_the_score(app, client):
+    assert email_outbox.enabled
+    sid = str(uuid.uuid4())
+    _start_health_check(client, sid, send_email=True)
+
+    response = client.post('/financial_health/step3', data={'debt': '100000', 'interest_rate': '10'})
+
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/financial_health/dashboard')
+    with client.session_transaction() as session:
+        categories = [category for category, _ in session.get('_flashes', [])]
+    assert categories == ['success']
+    with app.app_context():
+        record = FinancialHealth.query.filter_by(session_id=sid, step=3).one()
+        assert record.score is not None
+        queued = OutboundEmail.query.filter_by(session_id=sid).all()
+        assert [(m.template_key, m.to_email, m.status) for m in queued] == [('financial_health', 'ada@example.com', 'pending')]
+        db.session.remove()
+
+def test_step3_without_send_email_queues_nothing(app, client):
+    sid = str(uuid.uuid4())
+    _start_health_check(client, sid, send_email=False)
+
+    response = client.post('/financial_health/step3', data={'debt': '0', 'interest_rate': '0'})
+
+    assert response.status_code == 302
+    with app.app_context():
+        assert FinancialHealth.query.filter_by(session_id=sid, step=3).count() == 1
+        assert OutboundEmail.query.filter_by(session_id=sid).count() == 0
+        db.session.remove()
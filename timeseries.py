@@ -0,0 +1,94 @@
+from datetime import datetime, date, timedelta
+from sqlalchemy import func
+from extensions import db
+
+GRANULARITIES = ('day', 'week', 'month')
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+def bucket_start(value, granularity='day'):
+    """Return the first day of the bucket containing value."""
+    value = _to_date(value)
+    if granularity == 'week':
+        return value - timedelta(days=value.weekday())
+    if granularity == 'month':
+        return value.replace(day=1)
+    return value
+
+def next_bucket(value, granularity='day'):
+    if granularity == 'week':
+        return value + timedelta(days=7)
+    if granularity == 'month':
+        return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return value + timedelta(days=1)
+
+def bucket_labels(start, end, granularity='day'):
+    """List 'YYYY-MM-DD' labels for every bucket overlapping [start, end)."""
+    labels = []
+    current = bucket_start(start, granularity)
+    end = _to_date(end)
+    while current < end:
+        labels.append(current.strftime('%Y-%m-%d'))
+        current = next_bucket(current, granularity)
+    return labels
+
+def bucket_expression(column, granularity='day'):
+    """
+    SQL expression mapping a timestamp column to its bucket label ('YYYY-MM-DD' of the bucket start).
+
+    Weeks start on Monday on both SQLite and PostgreSQL.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Invalid granularity '{granularity}'. Valid values: {list(GRANULARITIES)}")
+    if db.engine.dialect.name == 'postgresql':
+        return func.to_char(func.date_trunc(granularity, column), 'YYYY-MM-DD')
+    if granularity == 'week':
+        return func.date(column, 'weekday 0', '-6 days')
+    if granularity == 'month':
+        return func.strftime('%Y-%m-01', column)
+    return func.strftime('%Y-%m-%d', column)
+
+def bucketed_counts(query_session, column, measure, start, end, series_column=None, filters=(), granularity='day'):
+    """
+    Build a gap-filled time series from a single GROUP BY query.
+
+    Args:
+        query_session: Session used to run the query.
+        column: Timestamp column to bucket on.
+        measure: Aggregate expression per bucket (e.g. func.count(ToolUsage.id)).
+        start: Inclusive lower bound (date or datetime).
+        end: Exclusive upper bound (date or datetime).
+        series_column: Optional column splitting the counts into named series.
+        filters: Additional SQLAlchemy filter expressions.
+        granularity: 'day', 'week' or 'month'.
+
+    Returns:
+        A dict with 'labels', 'totals' and 'series' ({series value: counts}), where every
+        list is aligned with 'labels' and buckets without rows are filled with 0.
+    """
+    labels = bucket_labels(start, end, granularity)
+    index = {label: i for i, label in enumerate(labels)}
+    bucket = bucket_expression(column, granularity).label('bucket')
+    columns = [bucket] + ([series_column] if series_column is not None else []) + [measure]
+    group_by = [bucket] + ([series_column] if series_column is not None else [])
+    rows = query_session.query(*columns)\
+        .filter(column >= start, column < end, *filters)\
+        .group_by(*group_by)\
+        .all()
+
+    totals = [0] * len(labels)
+    series = {}
+    for row in rows:
+        idx = index.get(str(row[0])[:10])
+        if idx is None:
+            continue
+        count = int(row[-1] or 0)
+        totals[idx] += count
+        if series_column is not None:
+            series.setdefault(row[1], [0] * len(labels))[idx] = count
+    return {'labels': labels, 'totals': totals, 'series': series}
@@ -1,6 +1,7 @@
 import logging
 from flask import session, has_request_context, g, request  
-from typing import Dict, Optional, Union
+from string import Formatter
+from typing import Any, Callable, Dict, Optional, Tuple, Union
 
 # Set up logger to match app.py
 root_logger = logging.getLogger('ficore_app')
@@ -78,9 +79,133 @@ for module_name, translations in translation_modules.items():
         lang_dict = translations.get(lang, {})
         logger.info(f"Loaded {len(lang_dict)} translations for module '{module_name}', lang='{lang}'")
 
+SUPPORTED_LANGS = ('en', 'ha')
+# Marks entries whose fields need str.format (format specs, conversions, escaped braces)
+FORMAT_FALLBACK = object()
+
+def _module_for_key(key: str) -> str:
+    for prefix, mod in KEY_PREFIX_TO_MODULE.items():
+        if key.startswith(prefix):
+            return mod
+    return 'core'
+
+def _compile_entry(text: str) -> Tuple[str, Any]:
+    """
+    Pre-parse a translation string.
+
+    Returns (text, pieces) where pieces is None for plain text, a tuple of
+    (literal, field_name) pairs for strings with only simple named fields, or
+    the sentinel FORMAT_FALLBACK when str.format is needed at call time.
+    """
+    if '{' not in text and '}' not in text:
+        return text, None
+    try:
+        parsed = list(Formatter().parse(text))
+    except ValueError:
+        return text, FORMAT_FALLBACK
+    if '{{' in text or '}}' in text:
+        return text, FORMAT_FALLBACK
+    pieces = []
+    for literal, field_name, format_spec, conversion in parsed:
+        if field_name is not None and (not field_name.isidentifier() or format_spec or conversion):
+            return text, FORMAT_FALLBACK
+        pieces.append((literal, field_name))
+    return text, tuple(pieces)
+
+
+def compile_catalog() -> Dict[str, Dict[str, Tuple[str, Any]]]:
+    """
+    Build a flat key -> entry catalog per language.
+
+    Keys are routed to their module by prefix exactly as at lookup time, and the
+    English text is merged in wherever the requested language lacks a key.
+    """
+    all_keys = set()
+    for translations in translation_modules.values():
+        for lang_dict in translations.values():
+            all_keys.update(lang_dict)
+    catalog = {lang: {} for lang in SUPPORTED_LANGS}
+    for key in all_keys:
+        module = translation_modules[_module_for_key(key)]
+        for lang in SUPPORTED_LANGS:
+            text = module.get(lang, {}).get(key)
+            if text is None:
+                text = module.get('en', {}).get(key)
+            if text is not None:
+                catalog[lang][key] = _compile_entry(text)
+    return catalog
+
+def _compile_quiz_catalog() -> Dict[str, Dict[str, Tuple[str, Any]]]:
+    quiz = translation_modules['quiz']
+    catalog = {lang: {} for lang in SUPPORTED_LANGS}
+    for key in QUIZ_SPECIFIC_KEYS:
+        for lang in SUPPORTED_LANGS:
+            text = quiz.get(lang, {}).get(key)
+            if text is None:
+                text = quiz.get('en', {}).get(key)
+            if text is not None:
+                catalog[lang][key] = _compile_entry(text)
+    return catalog
+
+CATALOG = compile_catalog()
+QUIZ_CATALOG = _compile_quiz_catalog()
+_reported_missing = set()
+# Called on every lookup when set (request profiler's trans call counter)
+_lookup_observer = None
+
+def set_lookup_observer(callback: Optional[Callable[[], None]]) -> None:
+    """Register a no-argument callable invoked on every translation lookup (None removes it)."""
+    global _lookup_observer
+    _lookup_observer = callback
+
+def _render(key: str, lang: str, entry: Optional[Tuple[str, Any]], kwargs: Dict) -> str:
+    if _lookup_observer is not None:
+        _lookup_observer()
+    if entry is None:
+        if (key, lang) not in _reported_missing:
+            _reported_missing.add((key, lang))
+            current_logger = g.get('logger', logger) if has_request_context() else logger
+            current_logger.warning(f"Missing translation for key='{key}' in module '{_module_for_key(key)}', lang='{lang}'")
+        return key
+    text, pieces = entry
+    if not kwargs or pieces is None:
+        return text
+    try:
+        if pieces is FORMAT_FALLBACK:
+            return text.format(**kwargs)
+        return ''.join(literal + (str(kwargs[field]) if field is not None else '') for literal, field in pieces)
+    except (KeyError, ValueError, IndexError) as e:
+        current_logger = g.get('logger', logger) if has_request_context() else logger
+        current_logger.error(f"Formatting failed for key '{key}', lang='{lang}', kwargs={kwargs}, error={str(e)}")
+        return text
+
+class Translator:
+    """Translation callable bound to one language, for use across a single request or render."""
+
+    __slots__ = ('lang', 'catalog', 'quiz_catalog')
+
+    def __init__(self, lang: str = 'en', quiz_context: bool = False):
+        self.lang = lang if lang in SUPPORTED_LANGS else 'en'
+        self.catalog = CATALOG[self.lang]
+        self.quiz_catalog = QUIZ_CATALOG[self.lang] if quiz_context else None
+
+    def __call__(self, key: str, lang: Optional[str] = None, **kwargs: str) -> str:
+        if lang is not None and lang != self.lang:
+            return trans(key, lang=lang, **kwargs)
+        if self.quiz_catalog is not None and key in QUIZ_SPECIFIC_KEYS:
+            return _render(key, self.lang, self.quiz_catalog.get(key), kwargs)
+        return _render(key, self.lang, self.catalog.get(key), kwargs)
+
+def bind_translator(lang: Optional[str] = None) -> Translator:
+    """Return a Translator for lang (default: session language) and the current request path."""
+    if lang is None:
+        lang = session.get('lang', 'en') if has_request_context() else 'en'
+    quiz_context = has_request_context() and '/quiz/' in request.path
+    return Translator(lang, quiz_context)
+
 def trans(key: str, lang: Optional[str] = None, **kwargs: str) -> str:
     """
-    Translate a key using the appropriate module's translation dictionary.
+    Translate a key using the compiled catalog.
     
     Args:
         key: The translation key (e.g., 'core_submit', 'quiz_yes', 'Yes').
@@ -93,53 +218,18 @@ def trans(key: str, lang: Optional[str] = None, **kwargs: str) -> str:
     
     Notes:
         - Uses session['lang'] if lang is None and request context exists.
-        - Logs warnings for missing translations.
-        - Uses g.logger if available, else the default logger.
+        - Logs a warning the first time a missing key is seen per language.
+        - Quiz-specific keys ('Yes', 'No', ...) resolve to the quiz module under /quiz/.
     """
-    current_logger = g.get('logger', logger) if has_request_context() else logger
-    session_id = session.get('sid', 'no-session-id') if has_request_context() else 'no-session-id'
-
-    # Default to session language or 'en'
     if lang is None:
         lang = session.get('lang', 'en') if has_request_context() else 'en'
-    if lang not in ['en', 'ha']:
-        current_logger.warning(f"Invalid language '{lang}', falling back to 'en'", extra={'session_id': session_id})
+    if lang not in SUPPORTED_LANGS:
+        current_logger = g.get('logger', logger) if has_request_context() else logger
+        current_logger.warning(f"Invalid language '{lang}', falling back to 'en'")
         lang = 'en'
-
-    # Determine module based on key prefix or specific keys
-    module_name = 'core'
-    for prefix, mod in KEY_PREFIX_TO_MODULE.items():
-        if key.startswith(prefix):
-            module_name = mod
-            break
     if key in QUIZ_SPECIFIC_KEYS and has_request_context() and '/quiz/' in request.path:
-        module_name = 'quiz'
-
-    module = translation_modules.get(module_name, translation_modules['core'])
-    lang_dict = module.get(lang, {})
-
-    # Get translation
-    translation = lang_dict.get(key)
-
-    # Fallback to English, then key
-    if translation is None:
-        en_dict = module.get('en', {})
-        translation = en_dict.get(key, key)
-        if translation == key:
-            current_logger.warning(
-                f"Missing translation for key='{key}' in module '{module_name}', lang='{lang}'",
-                extra={'session_id': session_id}
-            )
-
-    # Apply string formatting
-    try:
-        return translation.format(**kwargs) if kwargs else translation
-    except (KeyError, ValueError) as e:
-        current_logger.error(
-            f"Formatting failed for key '{key}', lang='{lang}', kwargs={kwargs}, error={str(e)}",
-            extra={'session_id': session_id}
-        )
-        return translation
+        return _render(key, lang, QUIZ_CATALOG[lang].get(key), kwargs)
+    return _render(key, lang, CATALOG[lang].get(key), kwargs)
 
 def get_translations(lang: Optional[str] = None) -> Dict[str, callable]:
     """
@@ -157,7 +247,7 @@ def get_translations(lang: Optional[str] = None) -> Dict[str, callable]:
         logger.warning(f"Invalid language '{lang}', falling back to 'en'")
         lang = 'en'
     return {
-        'trans': lambda key, **kwargs: trans(key, lang=lang, **kwargs)
+        'trans': Translator(lang)
     }
 
-__all__ = ['trans']
+__all__ = ['trans', 'Translator', 'bind_translator']
@@ -0,0 +1,116 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import weakref
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+
+logger = logging.getLogger('ficore_app.uploads')
+
+# Multipart overhead allowed on top of the file size limit (boundaries, other form fields)
+FORM_OVERHEAD_BYTES = 64 * 1024
+COPY_CHUNK_BYTES = 1024 * 1024
+# Stored names end in -<first 12 hex chars of the sha256>, so their content never changes
+CONTENT_HASH_RE = re.compile(r'-[0-9a-f]{12}(\.[A-Za-z0-9]+)?$')
+
+# endpoint -> callable(app) returning (upload directory, max file bytes)
+_streamed_endpoints = {}
+
+def stream_uploads(endpoint, target):
+    """Stream file parts posted to endpoint straight into target(app)'s directory."""
+    _streamed_endpoints[endpoint] = target
+
+def _discard(handle, path):
+    try:
+        handle.close()
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+
+class ChecksumFile:
+    """
+    Temporary upload file in the destination directory, hashed and size-checked as written.
+
+    Werkzeug's multipart parser writes each file part to this object in chunks, so the upload
+    never sits in memory, the sha256 is known when parsing ends and oversize uploads are cut
+    off with 413 as soon as they pass the limit. commit() renames it into place; otherwise the
+    partial file is removed when the object is garbage collected.
+    """
+
+    def __init__(self, directory, max_bytes):
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=directory, prefix='.upload-', suffix='.part')
+        self._file = os.fdopen(fd, 'w+b')
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.max_bytes = max_bytes
+        self._finalizer = weakref.finalize(self, _discard, self._file, self.path)
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_bytes and self.size > self.max_bytes:
+            raise RequestEntityTooLarge(f"Upload exceeds the {self.max_bytes} byte limit")
+        self.sha256.update(data)
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def commit(self, destination):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.path, destination)
+        self._finalizer.detach()
+
+    def discard(self):
+        self._finalizer()
+
+class StreamingUploadRequest(Request):
+    """Request class that streams file uploads of registered endpoints to disk (see stream_uploads)."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        target = _streamed_endpoints.get(self.endpoint)
+        if target is None or not filename:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        directory, max_bytes = target(current_app)
+        if max_bytes and total_content_length and total_content_length > max_bytes + FORM_OVERHEAD_BYTES:
+            raise RequestEntityTooLarge(f"Upload of {total_content_length} bytes exceeds the {max_bytes} byte limit")
+        return ChecksumFile(directory, max_bytes)
+
+def stored_name(filename, checksum):
+    root, ext = os.path.splitext(filename)
+    return f"{root}-{checksum[:12]}{ext}"
+
+def store_upload(file_storage, directory, filename, max_bytes=None):
+    """
+    Move an uploaded file into directory under a content-addressed name.
+
+    Uploads that were streamed by StreamingUploadRequest are renamed into place; others are
+    copied in chunks while hashing.
+
+    Returns:
+        A dict with filename (stored name), checksum (sha256 hex) and size in bytes.
+    """
+    os.makedirs(directory, exist_ok=True)
+    stream = file_storage.stream
+    if not isinstance(stream, ChecksumFile):
+        stream.seek(0)
+        copy = ChecksumFile(directory, max_bytes)
+        try:
+            while True:
+                chunk = stream.read(COPY_CHUNK_BYTES)
+                if not chunk:
+                    break
+                copy.write(chunk)
+        except Exception:
+            copy.discard()
+            raise
+        stream = copy
+    checksum = stream.sha256.hexdigest()
+    name = stored_name(filename, checksum)
+    stream.commit(os.path.join(directory, name))
+    logger.info(f"Stored upload {name} ({stream.size} bytes, sha256 {checksum})")
+    return {'filename': name, 'checksum': checksum, 'size': stream.size}
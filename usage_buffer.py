@@ -0,0 +1,178 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+logger = logging.getLogger('ficore_app.tool_usage')
+
+# Overflow policies applied when the in-memory queue is full
+OVERFLOW_POLICIES = ('drop_newest', 'drop_oldest', 'block')
+
+class ToolUsageBuffer:
+    """
+    Buffered ToolUsage ingestion.
+
+    The request thread only enqueues a row dict; a background flusher thread drains the
+    queue and writes rows as one multi-row INSERT per batch. A batch is flushed when it
+    reaches TOOL_USAGE_BATCH_SIZE rows or TOOL_USAGE_FLUSH_INTERVAL_MS has elapsed,
+    whichever comes first. Pending rows are flushed on interpreter shutdown.
+
+    Config:
+        TOOL_USAGE_BUFFER_ENABLED: Turn buffering on/off (False writes synchronously).
+        TOOL_USAGE_QUEUE_SIZE: Maximum number of rows held in memory.
+        TOOL_USAGE_BATCH_SIZE: Maximum rows per INSERT.
+        TOOL_USAGE_FLUSH_INTERVAL_MS: Maximum time a row waits before being written.
+        TOOL_USAGE_OVERFLOW_POLICY: 'drop_newest', 'drop_oldest' or 'block'.
+        TOOL_USAGE_BLOCK_TIMEOUT_MS: How long 'block' waits before dropping the row.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.stats = {'enqueued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('TOOL_USAGE_BUFFER_ENABLED', os.environ.get('TOOL_USAGE_BUFFER_ENABLED', 'true').lower() == 'true')
+        app.config.setdefault('TOOL_USAGE_QUEUE_SIZE', int(os.environ.get('TOOL_USAGE_QUEUE_SIZE', 10000)))
+        app.config.setdefault('TOOL_USAGE_BATCH_SIZE', int(os.environ.get('TOOL_USAGE_BATCH_SIZE', 200)))
+        app.config.setdefault('TOOL_USAGE_FLUSH_INTERVAL_MS', int(os.environ.get('TOOL_USAGE_FLUSH_INTERVAL_MS', 500)))
+        app.config.setdefault('TOOL_USAGE_OVERFLOW_POLICY', os.environ.get('TOOL_USAGE_OVERFLOW_POLICY', 'drop_oldest'))
+        app.config.setdefault('TOOL_USAGE_BLOCK_TIMEOUT_MS', int(os.environ.get('TOOL_USAGE_BLOCK_TIMEOUT_MS', 50)))
+        if app.config['TOOL_USAGE_OVERFLOW_POLICY'] not in OVERFLOW_POLICIES:
+            logger.warning(f"Invalid TOOL_USAGE_OVERFLOW_POLICY '{app.config['TOOL_USAGE_OVERFLOW_POLICY']}', falling back to 'drop_oldest'")
+            app.config['TOOL_USAGE_OVERFLOW_POLICY'] = 'drop_oldest'
+
+        self.app = app
+        self.enabled = app.config['TOOL_USAGE_BUFFER_ENABLED']
+        self.queue_size = app.config['TOOL_USAGE_QUEUE_SIZE']
+        self.batch_size = app.config['TOOL_USAGE_BATCH_SIZE']
+        self.flush_interval = app.config['TOOL_USAGE_FLUSH_INTERVAL_MS'] / 1000.0
+        self.overflow_policy = app.config['TOOL_USAGE_OVERFLOW_POLICY']
+        self.block_timeout = app.config['TOOL_USAGE_BLOCK_TIMEOUT_MS'] / 1000.0
+        app.extensions['tool_usage_buffer'] = self
+        atexit.register(self.shutdown)
+        logger.info(f"Tool usage buffer configured: enabled={self.enabled}, batch_size={self.batch_size}, flush_interval={self.flush_interval}s, policy={self.overflow_policy}")
+
+    def _ensure_started(self):
+        """Start the flusher thread lazily, restarting it in forked worker processes."""
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='tool-usage-flusher', daemon=True)
+            self._thread.start()
+
+    def enqueue(self, tool_name, user_id, session_id, action):
+        """
+        Queue a ToolUsage row for the next batch.
+
+        Returns:
+            True if the row was accepted, False if it was dropped by the overflow policy.
+        """
+        self._ensure_started()
+        row = {
+            'id': str(uuid.uuid4()),
+            'tool_name': tool_name,
+            'user_id': user_id,
+            'session_id': session_id,
+            'action': action,
+            'created_at': datetime.utcnow()
+        }
+        try:
+            if self.overflow_policy == 'block':
+                self._queue.put(row, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            if self.overflow_policy != 'drop_oldest':
+                self.stats['dropped'] += 1
+                return False
+            try:
+                self._queue.get_nowait()
+                self.stats['dropped'] += 1
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self.stats['dropped'] += 1
+                return False
+        self.stats['enqueued'] += 1
+        return True
+
+    def _drain(self, limit):
+        rows = []
+        while len(rows) < limit:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _run(self):
+        while not self._stop.is_set():
+            deadline = time.monotonic() + self.flush_interval
+            batch = []
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+                batch.extend(self._drain(self.batch_size - len(batch)))
+            if batch:
+                self._write(batch)
+
+    def _write(self, rows):
+        """Insert rows in a single executemany statement inside a fresh app context."""
+        from extensions import db
+        from models import ToolUsage
+        with self.app.app_context():
+            try:
+                db.session.execute(ToolUsage.__table__.insert(), rows)
+                db.session.commit()
+                self.stats['written'] += len(rows)
+                self.stats['batches'] += 1
+                logger.debug(f"Flushed {len(rows)} tool usage rows")
+            except Exception as e:
+                db.session.rollback()
+                self.stats['failed'] += len(rows)
+                logger.error(f"Failed to flush {len(rows)} tool usage rows: {str(e)}")
+            finally:
+                db.session.remove()
+
+    def flush(self):
+        """Synchronously write everything currently queued in this process."""
+        if self._queue is None or self._pid != os.getpid():
+            return
+        while True:
+            rows = self._drain(self.batch_size)
+            if not rows:
+                break
+            self._write(rows)
+
+    def shutdown(self, timeout=5.0):
+        """Stop the flusher thread and flush pending rows."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+        self.flush()
+        logger.info(f"Tool usage buffer shut down: {self.stats}")
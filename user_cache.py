@@ -0,0 +1,199 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import event, DateTime
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+logger = logging.getLogger('ficore_app.auth')
+
+# Columns kept out of the cache; they load from the database on first access (e.g. at login
+# or password change) instead of sitting in Redis
+UNCACHED_COLUMNS = {'password_hash'}
+
+class UserCache:
+    """
+    Identity cache behind Flask-Login's user_loader.
+
+    A small per-process LRU with a TTL, backed by an optional shared Redis tier, maps user id
+    to the user's column values. A hit rebuilds a User and merges it into the request's session
+    without a SELECT; relationships (referrals, records) still lazy-load as before.
+
+    Commits that update or delete a User invalidate both tiers in the committing process. Other
+    processes can serve a stale local entry for at most USER_CACHE_TTL seconds.
+
+    Config (environment variables of the same name):
+        USER_CACHE_ENABLED: Default true.
+        USER_CACHE_TTL: Seconds an entry is trusted (default 60).
+        USER_CACHE_SIZE: Local LRU capacity (default 1024).
+        USER_CACHE_REDIS_URL: Shared tier (falls back to REDIS_URL; unset disables it).
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.ttl = 60
+        self.max_size = 1024
+        self.redis = None
+        self.key_prefix = 'ficore:user:'
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'redis_hits': 0, 'misses': 0, 'invalidations': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('USER_CACHE_ENABLED', os.environ.get('USER_CACHE_ENABLED', 'true').lower() == 'true')
+        app.config.setdefault('USER_CACHE_TTL', int(os.environ.get('USER_CACHE_TTL', 60)))
+        app.config.setdefault('USER_CACHE_SIZE', int(os.environ.get('USER_CACHE_SIZE', 1024)))
+        app.config.setdefault('USER_CACHE_REDIS_URL', os.environ.get('USER_CACHE_REDIS_URL') or os.environ.get('REDIS_URL'))
+        self.enabled = app.config['USER_CACHE_ENABLED']
+        self.ttl = app.config['USER_CACHE_TTL']
+        self.max_size = app.config['USER_CACHE_SIZE']
+        self.redis = None
+        if self.enabled and app.config['USER_CACHE_REDIS_URL']:
+            try:
+                from session_store import create_redis_client
+                self.redis = create_redis_client(app.config['USER_CACHE_REDIS_URL'])
+            except Exception as e:
+                logger.error(f"User cache Redis tier unavailable, using the local tier only: {str(e)}")
+        register_user_cache_listeners(self)
+        app.extensions['user_cache'] = self
+        logger.info(f"User cache configured: enabled={self.enabled}, ttl={self.ttl}s, size={self.max_size}, redis={'yes' if self.redis else 'no'}")
+
+    def _local_get(self, user_id):
+        with self._lock:
+            entry = self._local.get(user_id)
+            if entry is None:
+                return None
+            expires_at, values = entry
+            if expires_at <= time.monotonic():
+                del self._local[user_id]
+                return None
+            self._local.move_to_end(user_id)
+            return values
+
+    def _local_set(self, user_id, values):
+        with self._lock:
+            self._local[user_id] = (time.monotonic() + self.ttl, values)
+            self._local.move_to_end(user_id)
+            while len(self._local) > self.max_size:
+                self._local.popitem(last=False)
+
+    def _redis_get(self, user_id):
+        if self.redis is None:
+            return None
+        try:
+            raw = self.redis.get(f"{self.key_prefix}{user_id}")
+            return json.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning(f"User cache Redis read failed for user {user_id}: {str(e)}")
+            return None
+
+    def _redis_set(self, user_id, values):
+        if self.redis is None:
+            return
+        try:
+            self.redis.set(f"{self.key_prefix}{user_id}", json.dumps(values), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"User cache Redis write failed for user {user_id}: {str(e)}")
+
+    @staticmethod
+    def _serialize(user):
+        values = {}
+        for column in user.__table__.columns:
+            if column.key in UNCACHED_COLUMNS:
+                continue
+            value = getattr(user, column.key)
+            values[column.key] = value.isoformat() if isinstance(value, datetime) else value
+        return values
+
+    @staticmethod
+    def _rebuild(model, values):
+        user = model()
+        for column in model.__table__.columns:
+            if column.key not in values:
+                continue
+            value = values[column.key]
+            if isinstance(column.type, DateTime) and isinstance(value, str):
+                value = datetime.fromisoformat(value)
+            setattr(user, column.key, value)
+        make_transient_to_detached(user)
+        return user
+
+    def load(self, session, model, user_id):
+        """Return the User for user_id attached to session, from cache when possible."""
+        if not self.enabled:
+            return session.get(model, user_id)
+        values = self._local_get(user_id)
+        if values is not None:
+            self.stats['hits'] += 1
+        else:
+            values = self._redis_get(user_id)
+            if values is not None:
+                self.stats['redis_hits'] += 1
+                self._local_set(user_id, values)
+        if values is not None:
+            # Already loaded in this session (e.g. by a query earlier in the request)
+            existing = session.identity_map.get(session.identity_key(model, user_id))
+            if existing is not None:
+                return existing
+            return session.merge(self._rebuild(model, values), load=False)
+        self.stats['misses'] += 1
+        user = session.get(model, user_id)
+        if user is not None:
+            values = self._serialize(user)
+            self._local_set(user_id, values)
+            self._redis_set(user_id, values)
+        return user
+
+    def invalidate(self, *user_ids):
+        """Drop user_ids from both tiers."""
+        user_ids = [user_id for user_id in user_ids if user_id is not None]
+        if not user_ids:
+            return
+        with self._lock:
+            for user_id in user_ids:
+                self._local.pop(user_id, None)
+        self.stats['invalidations'] += len(user_ids)
+        if self.redis is not None:
+            try:
+                self.redis.delete(*[f"{self.key_prefix}{user_id}" for user_id in user_ids])
+            except Exception as e:
+                logger.warning(f"User cache Redis invalidation failed for users {user_ids}: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+_caches = []
+_listeners_registered = False
+
+def _track_user_changes(session, flush_context):
+    from models import User
+    changed = session.info.setdefault('changed_user_ids', set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+
+def _users_committed(session):
+    changed = session.info.pop('changed_user_ids', None)
+    if changed:
+        for cache in _caches:
+            cache.invalidate(*changed)
+
+def _users_rolled_back(session):
+    session.info.pop('changed_user_ids', None)
+
+def register_user_cache_listeners(cache):
+    """Invalidate cache after every commit that updated or deleted a User (profile, password, admin edits)."""
+    global _listeners_registered
+    if cache not in _caches:
+        _caches.append(cache)
+    if not _listeners_registered:
+        event.listen(Session, 'after_flush', _track_user_changes)
+        event.listen(Session, 'after_commit', _users_committed)
+        event.listen(Session, 'after_rollback', _users_rolled_back)
+        _listeners_registered = True